@@ -0,0 +1,106 @@
+"""
+Benchmark of the reduced-resolution JPEG decoding used for hashing.
+
+Hashes the same JPEG files with the full decoding and with the reduced
+decode mode ('--reduced_decode') in one process and reports the throughput
+of both modes and how closely the hashes agree.
+
+Usage:
+    python -m benchmarks.reduced_decode [folder] [--count 100] [--core_size 16]
+
+Without a folder, synthetic 3840x2160 JPEG frames are generated in a
+temporary directory.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from services.hamming import hamming_distances
+from tools.comparer.img_comparer.hasher.dhash import DHash
+
+
+def generate_frames(folder: Path, count: int, size: Tuple[int, int] = (3840, 2160)) -> List[Path]:
+    """
+    Writes synthetic frames with smooth gradients, shapes and sensor noise.
+
+    Args:
+        folder (Path): Target directory.
+        count (int): Number of frames.
+        size (Tuple[int, int]): Frame width and height.
+
+    Returns:
+        List[Path]: Paths of the written JPEG files.
+    """
+    rng = np.random.default_rng(0)
+    width, height = size
+    gradient = np.linspace(0, 160, width, dtype=np.float32)[None, :].repeat(height, axis=0)
+    paths = []
+
+    for index in range(count):
+        frame = gradient + rng.normal(0, 6, (height, width)).astype(np.float32)
+
+        for _ in range(12):
+            x, y = rng.integers(0, width), rng.integers(0, height)
+            radius = int(rng.integers(40, 400))
+            cv2.circle(frame, (int(x), int(y)), radius, float(rng.integers(0, 255)), -1)
+
+        path = folder / f"frame_{index:05d}.jpg"
+        cv2.imwrite(str(path), np.clip(frame, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, 90])
+        paths.append(path)
+
+    return paths
+
+
+def hash_all(paths: List[Path], core_size: int, reduced_decode: bool) -> Tuple[np.ndarray, float]:
+    """
+    Hashes all files in the current process.
+
+    Args:
+        paths (List[Path]): Images to hash.
+        core_size (int): Hash grid size.
+        reduced_decode (bool): Decode mode.
+
+    Returns:
+        Tuple[np.ndarray, float]: The hash matrix and the elapsed time in seconds.
+    """
+    start = time.perf_counter()
+    hashes = [DHash.compute_hash(path, core_size, reduced_decode) for path in paths]
+    return np.vstack(hashes), time.perf_counter() - start
+
+
+def main() -> None:
+    """Runs the benchmark and prints the results."""
+    parser = argparse.ArgumentParser(description="Reduced JPEG decoding benchmark")
+    parser.add_argument("folder", nargs="?", default=None)
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--core_size", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.folder:
+            paths = sorted(path for path in Path(args.folder).iterdir() if path.suffix.lower() in DHash.JPEG_SUFFIXES)
+            paths = paths[:args.count]
+        else:
+            print(f"Generating {args.count} synthetic 3840x2160 frames...")
+            paths = generate_frames(Path(temp_dir), args.count)
+
+        full_hashes, full_time = hash_all(paths, args.core_size, reduced_decode=False)
+        fast_hashes, fast_time = hash_all(paths, args.core_size, reduced_decode=True)
+
+    distances = hamming_distances(full_hashes, fast_hashes)
+    n_bits = args.core_size * args.core_size
+
+    print(f"images: {len(paths)}, hash: {n_bits} bits")
+    print(f"full decode:    {len(paths) / full_time:8.1f} img/s")
+    print(f"reduced decode: {len(paths) / fast_time:8.1f} img/s ({full_time / fast_time:.1f}x)")
+    print(f"identical hashes: {np.mean(distances == 0):.1%}")
+    print(f"mean distance: {distances.mean():.2f} bits ({distances.mean() / n_bits:.2%}), max: {distances.max()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -35,3 +35,31 @@ class Arguments:
     extensions: str = "--ext"
     margin: str = "--margin"
     report_path: str = "--report_path"
+    search_index: str = "--search_index"
+    reduced_decode: str = "--reduced_decode"
+    hash_methods: str = "--hash_methods"
+    hash_pyramid: str = "--hash_pyramid"
+    cascade: str = "--cascade"
+    cascade_factor: str = "--cascade_factor"
+    exact_prefilter: str = "--exact_prefilter"
+    incremental: str = "--incremental"
+    out_of_core: str = "--out_of_core"
+    reference: str = "--reference"
+    temporal_window: str = "--temporal_window"
+    temporal_global: str = "--temporal_global"
+    graph_threshold: str = "--graph_threshold"
+    sweep: str = "--sweep"
+    keep_best: str = "--keep_best"
+    stream_remove: str = "--stream_remove"
+    invariant: str = "--invariant"
+    exif_thumbnail: str = "--exif_thumbnail"
+    exif_confirm: str = "--exif_confirm"
+    shard_dir: str = "--shard_dir"
+    shards: str = "--shards"
+    shard_timeout: str = "--shard_timeout"
+    link_duplicates: str = "--link_duplicates"
+    object_dedup: str = "--object_dedup"
+    serve_host: str = "--serve_host"
+    serve_port: str = "--serve_port"
+    serve_socket: str = "--serve_socket"
+    serve_top_k: str = "--serve_top_k"
@@ -9,4 +9,5 @@ class Commands:
     dedup: str = "dedup"
     clean_annotations: str = "clean-annotations"
     convert_annotations: str = "convert-annotations"
-    stats: str = "stats"
\ No newline at end of file
+    stats: str = "stats"
+    serve: str = "serve"
\ No newline at end of file
@@ -5,8 +5,16 @@ from pathlib import Path
 @dataclass
 class Constants:
     image: str = "image"
+    video: str = "video"
     phash: str = "phash"
     dhash: str = "dhash"
     ahash: str = "ahash"
+    whash: str = "whash"
     cnn: str = "cnn"
+    auto: str = "auto"
+    linear: str = "linear"
+    mih: str = "mih"
+    tiled: str = "tiled"
+    hardlink: str = "hardlink"
+    reflink: str = "reflink"
     config_file = Path("config.json").resolve()
\ No newline at end of file
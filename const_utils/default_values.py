@@ -31,7 +31,7 @@ class AppSettings(BaseSettings):
         step_sec (float): Time interval in seconds for video slicing.
         log_path (Path): Directory where log files are stored.
         log_level (str): Verbosity level of the logger (e.g., INFO, DEBUG).
-        datatype (str): The category of files being processed (e.g., image).
+        datatype (str): The category of files being processed ('image' or 'video').
         method (str): The algorithm name for hashing or comparison.
         hash_threshold (int): Distance threshold for identifying duplicates (0-100).
         confirm_choice (tuple): Keywords used to confirm interactive deletion.
@@ -43,6 +43,57 @@ class AppSettings(BaseSettings):
         a_source (Optional[Path]): Directory where annotation files are located.
         destination_type (Optional[str]): Target format for annotations.
         extensions (Tuple[str, ...]): Supported image file extensions.
+        search_index (str): Duplicate search strategy ('auto', 'linear', 'tiled' or 'mih').
+        hash_chunksize (int): Number of images sent to a hashing worker at once.
+        checkpoint_every (int): Save computed hashes to disk after this many images.
+        checkpoint_interval (float): Save computed hashes to disk after this many seconds.
+        reduced_decode (bool): If True, JPEG files are decoded at a reduced resolution for hashing.
+        hash_methods (Tuple[str, ...]): Extra hashing algorithms computed from the same decode
+            as 'method' and cached together with it.
+        hash_pyramid (Tuple[int, ...]): Extra core sizes hashed from the same decode, so
+            'core_size' can be changed without re-hashing; each must be a power of 2.
+        cascade (bool): If True, duplicates are searched with 64-bit hashes first and
+            confirmed with full hashes.
+        cascade_factor (float): How many times the coarse threshold is looser than 'hash_threshold'.
+        exact_prefilter (bool): If True, byte-identical files are found by size and content
+            digest before hashing, and only one file per group is decoded.
+        incremental (bool): If True, in repeat mode only new images are searched against
+            the duplicate-free index of the previous cycle.
+        out_of_core (bool): If True, the searched hashes are kept in a memory-mapped file
+            next to the cache and read from disk block by block.
+        reference (Tuple[Path, ...]): Reference folders (or their Parquet caches); if set,
+            'dedup' reports images that near-duplicate any reference image.
+        temporal_window (int): If above 0, frames named '{video_stem}_{n}' are compared only
+            with this many previous frames of the same video.
+        temporal_global (bool): If True, frames kept by the temporal search are also
+            compared across videos.
+        graph_threshold (Optional[int]): If set, all pairs within this distance (0-100) are
+            saved as a neighbour graph next to the cache and any lower threshold is
+            answered from it.
+        sweep (bool): If True, 'dedup' only reports the number of duplicates per threshold.
+        keep_best (bool): If True, duplicates are grouped into connected clusters, the image
+            with the highest resolution and sharpness of every cluster is kept and the
+            clusters are saved to 'report_path'.
+        stream_remove (bool): If True (with 'remove'), duplicates are deleted by background
+            threads while the search is still running.
+        invariant (bool): If True, flipped and 90-degree rotated copies are matched too.
+        exif_thumbnail (bool): If True, JPEG files are hashed from their embedded EXIF
+            thumbnails when possible (falling back to a reduced decode).
+        exif_confirm (bool): If True, matches of thumbnail hashes are confirmed with hashes
+            of a regular decode before duplicates are reported.
+        shard_dir (Optional[Path]): If set, the search is split into shards shared by all
+            processes started with the same directory (see 'ShardedIndex').
+        shards (int): The number of shards in the sharded search.
+        shard_timeout (float): Seconds the sharded search waits for other processes without
+            progress, and the age after which an unfinished shard claim is taken over.
+        link_duplicates (Optional[str]): If set ('hardlink', 'reflink' or 'auto'), 'dedup'
+            replaces byte-identical files with links to one copy instead of searching.
+        object_dedup (bool): If True, 'dedup' matches the annotated object crops (VOC or YOLO
+            boxes from 'a_source' or next to the images) and reports matched (image, box) pairs.
+        serve_host (str): The host of the 'serve' query server.
+        serve_port (int): The TCP port of the 'serve' query server.
+        serve_socket (Optional[Path]): If set, 'serve' listens on this Unix socket instead of a port.
+        serve_top_k (int): The number of results of a query without 'k' and 'threshold'.
     """
     max_percentage: int = 100
     model_config = SettingsConfigDict(
@@ -73,6 +124,37 @@ class AppSettings(BaseSettings):
     extensions: Tuple[str, ...] = Field(default=(".jpg", ".jpeg,", ".png"))
     margin_threshold: int = Field(default=5, ge=0, le=100)
     report_path: Path = Field(default=Path("./reports"))
+    search_index: str = Field(default=Constants.auto)
+    hash_chunksize: int = Field(default=32, ge=1)
+    checkpoint_every: int = Field(default=5000, ge=1)
+    checkpoint_interval: float = Field(default=300.0, gt=0)
+    reduced_decode: bool = Field(default=False)
+    hash_methods: Tuple[str, ...] = Field(default_factory=tuple)
+    hash_pyramid: Tuple[int, ...] = Field(default=(8, 16, 32))
+    cascade: bool = Field(default=False)
+    cascade_factor: float = Field(default=2.0, ge=1.0)
+    exact_prefilter: bool = Field(default=True)
+    incremental: bool = Field(default=True)
+    out_of_core: bool = Field(default=False)
+    reference: Tuple[Path, ...] = Field(default_factory=tuple)
+    temporal_window: int = Field(default=0, ge=0)
+    temporal_global: bool = Field(default=False)
+    graph_threshold: Optional[int] = Field(default=None, ge=0, le=100)
+    sweep: bool = Field(default=False)
+    keep_best: bool = Field(default=False)
+    stream_remove: bool = Field(default=False)
+    invariant: bool = Field(default=False)
+    exif_thumbnail: bool = Field(default=False)
+    exif_confirm: bool = Field(default=False)
+    shard_dir: Optional[Path] = Field(default=None)
+    shards: int = Field(default=64, ge=1)
+    shard_timeout: float = Field(default=3600.0, gt=0)
+    link_duplicates: Optional[str] = Field(default=None)
+    object_dedup: bool = Field(default=False)
+    serve_host: str = Field(default="127.0.0.1")
+    serve_port: int = Field(default=8765, ge=0, le=65535)
+    serve_socket: Optional[Path] = Field(default=None)
+    serve_top_k: int = Field(default=10, ge=1)
     img_dataset_report_schema: List[Dict[str, Any]] = Field(default=[
         {
             "title": "GEOMETRY",
@@ -142,6 +224,27 @@ class AppSettings(BaseSettings):
         return value
 
 
+    @field_validator('hash_pyramid')
+    @classmethod
+    def check_pyramid_sizes(cls, value: Tuple[int, ...]) -> Tuple[int, ...]:
+        """
+        Validates that every pyramid level is a power of 2 not less than 8.
+
+        Args:
+            value (Tuple[int, ...]): The core sizes to check.
+
+        Returns:
+            Tuple[int, ...]: Unique sizes in ascending order.
+
+        Raises:
+            ValueError: If a size is not a power of 2 or is less than 8.
+        """
+        for size in value:
+            if size < 8 or (size & (size - 1) != 0):
+                raise ValueError(f"hash_pyramid sizes must be powers of 2 not less than 8, got {size}")
+        return tuple(sorted(set(value)))
+
+
     @field_validator("report_path", "log_path", "cache_file_path", "a_source", mode='before')
     @classmethod
     def ensure_path(cls, value: Union[str, Path]) -> Path:
@@ -18,8 +18,9 @@ class HelpStrings:
     remove: str = "remove files after processing"
     log_path: str = "path to log directory"
     log_level: str = f"A level of logging matches mapping: {str(LevelMapping.mapping())}"
-    datatype: str = "Type of data. Currently this parameter only supports 'image'"
-    method: str = "Default: dhash. A method of comparing images. It's can be ['phash, dhash, ahash, cnn]"
+    datatype: str = ("Type of data: 'image', or 'video' to find near-duplicate videos (re-uploads, transcodes) "
+                     "before slicing them")
+    method: str = "Default: dhash. A method of comparing images. It's can be ['phash', 'dhash', 'ahash', 'whash']"
     threshold: str = ("A minimal difference between files that means the files"
                       f" have a different information. Using Hemming distance for *hash methods")
     core_size: str = ("The size at which the image will be resized to square. This means that the actual hash size "
@@ -39,4 +40,60 @@ class HelpStrings:
                        "converting from yolo to other formats")
     margin: str = ("A threshold value of margin from any image border. If any side of object bbox cloaser that this"
                    "value to image boarder - object will be defined as truncated")
-    report_path: str = "A path to directory where reports will be stored"
\ No newline at end of file
+    report_path: str = "A path to directory where reports will be stored"
+    search_index: str = ("A duplicate search strategy: 'linear' compares each image with each, 'tiled' does the same "
+                         "tile by tile on n_jobs threads, 'mih' uses multi-index hashing (fast for small thresholds), "
+                         "'auto' picks one by images count and threshold")
+    reduced_decode: str = ("Decode JPEG files at 1/2, 1/4 or 1/8 resolution for hashing. Much faster for large "
+                           "images, hashes may differ from the full decoding in a few bits")
+    hash_methods: str = ("Extra hashing methods (dhash, phash, ahash, whash) computed from the same image decode "
+                         "and cached together with --method, so switching methods later needs no new hashing pass")
+    hash_pyramid: str = ("Core sizes (powers of 2) hashed from the same image decode and cached together, e.g. 8 16 32. "
+                         "Changing --core_size to any of them later needs no new hashing pass")
+    cascade: str = ("Search duplicates coarse-to-fine: 64-bit hashes at a loose threshold select candidates, "
+                    "full hashes confirm them. Much faster for core_size 16 and 32. The coarse filter is heuristic: "
+                    "pairs near --threshold can be missed; raise --cascade_factor for higher recall")
+    cascade_factor: str = "How many times the coarse cascade threshold is looser than --threshold. Default: 2"
+    exact_prefilter: str = ("Find byte-identical files by size and content digest before hashing and decode only "
+                            "one file per group; they are reported as duplicates with distance 0. Default: on")
+    incremental: str = ("In repeat mode compare only new images with the duplicate-free index of the previous "
+                        "cycle (kept next to the cache) instead of searching the whole folder again. Default: on")
+    out_of_core: str = ("Keep the searched hashes in a memory-mapped file next to the cache and stream them from "
+                        "disk block by block. For datasets whose hashes do not fit into memory")
+    reference: str = ("Reference folders (or their .parquet caches) built by earlier 'dedup' runs, e.g. a curated "
+                      "training set. Reports images of the source folder that near-duplicate any reference image "
+                      "instead of duplicates inside the folder")
+    temporal_window: str = ("For frames made by 'slice' ({video_stem}_{n}): compare every frame only with this many "
+                            "previous frames of the same video. 0 compares all images with each other. Default: 0")
+    temporal_global: str = ("With --temporal_window: also compare the frames kept by the temporal search across "
+                            "videos")
+    graph_threshold: str = ("Save all pairs within this distance (0-100) as a neighbour graph next to the cache. Later "
+                            "runs with any --threshold up to it are answered from the graph without a new search")
+    sweep: str = ("Print the number of duplicates for every threshold from 0 to --graph_threshold (or --threshold) "
+                  "from one search, without removing anything")
+    keep_best: str = ("Group matches into clusters and keep the image with the highest resolution and sharpness of "
+                      "every cluster. Clusters are saved to --report_path as .parquet and .json")
+    stream_remove: str = ("With --remove: delete duplicates on background threads as soon as they are found, while "
+                          "the search continues. A consistency check runs at the end")
+    invariant: str = ("Also find flipped and 90-degree rotated copies. The hashes of all 8 flips and rotations are "
+                      "computed from the same decode and cached. Not used with --reference, --temporal_window "
+                      "and --shard_dir")
+    exif_thumbnail: str = ("Hash JPEG files from their embedded EXIF thumbnails, without decoding the full image. "
+                           "Files without a large enough thumbnail fall back to a reduced decode")
+    exif_confirm: str = ("With --exif_thumbnail: decode the images of matched pairs again and drop pairs that are "
+                         "not within the threshold at full quality")
+    shard_dir: str = ("A directory shared by several dedup processes (or machines). The search is split into shards "
+                      "that the processes claim from it; one of them merges the pairs and reports the duplicates")
+    shards: str = "The number of shards of the --shard_dir search"
+    shard_timeout: str = ("Seconds a --shard_dir process waits for the others without progress. A shard claimed "
+                          "longer ago without a result is taken over, so it should exceed the time of one shard")
+    link_duplicates: str = ("Replace byte-identical files with links to one copy instead of deleting them: 'hardlink', "
+                            "'reflink' (copy-on-write clone, e.g. Btrfs/XFS) or 'auto' (reflink if supported). "
+                            "All paths are kept and the reclaimed bytes are reported")
+    object_dedup: str = ("Match annotated objects instead of whole images: every VOC/YOLO box (from --a_source or "
+                         "next to the image) is cropped and hashed, and matched (image, box) pairs are saved to "
+                         "--report_path. Nothing is removed")
+    serve_host: str = "Host of the query server"
+    serve_port: str = "TCP port of the query server"
+    serve_socket: str = "Listen on this Unix socket instead of --serve_host/--serve_port"
+    serve_top_k: str = "Number of results of a query that sets neither 'k' nor 'threshold'"
@@ -9,6 +9,7 @@ from file_operations.convert_annotations import ConvertAnnotationsOperation
 from file_operations.deduplicate import DedupOperation
 from file_operations.delete import DeleteOperation
 from file_operations.move import MoveOperation
+from file_operations.serve import ServeOperation
 from file_operations.slice import SliceOperation
 from file_operations.clean_annotations import CleanAnnotationsOperation
 from file_operations.stats_operation import StatsOperation
@@ -46,7 +47,8 @@ class DataForge:
             Commands.dedup: DedupOperation,
             Commands.clean_annotations: CleanAnnotationsOperation,
             Commands.convert_annotations: ConvertAnnotationsOperation,
-            Commands.stats: StatsOperation
+            Commands.stats: StatsOperation,
+            Commands.serve: ServeOperation
         }
         self.settings = AppSettings.load_config(Constants.config_file)
         self._setup_commands()
@@ -1,5 +1,8 @@
 import argparse
 import time
+from typing import Union
+
+import numpy as np
 
 from const_utils.arguments import Arguments
 from const_utils.copmarer import Constants
@@ -7,23 +10,31 @@ from const_utils.default_values import AppSettings
 from const_utils.parser_help import HelpStrings
 from file_operations.file_operation import FileOperation
 from services.timeout import wait
+from tools.mixins.file_linker import FileLinkerMixin
 from tools.mixins.file_remover import FileRemoverMixin
+from tools.comparer.img_comparer.hasher.exact_duplicates import ExactDuplicateFinder
+from tools.comparer.img_comparer.hasher.object_hasher import ObjectHasher
 from tools.comparer.img_comparer.img_comparer import ImageComparer
+from tools.comparer.video_comparer.video_comparer import VideoComparer
 
 
-class DedupOperation(FileOperation, FileRemoverMixin):
+class DedupOperation(FileOperation, FileRemoverMixin, FileLinkerMixin):
     """
     An operation to find and remove visual duplicates in a dataset.
 
     This class compares images in the source folder using hashing algorithms
     (like dHash). It identifies similar images based on a similarity threshold
     and can either delete them automatically or ask the user for confirmation.
+    With 'link_duplicates' byte-identical files are replaced with links to
+    one copy instead, so every path is kept. With the 'video' datatype
+    near-duplicate videos are found from a few frames each (see
+    'VideoComparer'), so they can be removed before slicing.
 
     Attributes:
-        filetype (str): The type of files to process (e.g., 'image').
+        filetype (str): The type of files to process ('image' or 'video').
         method (str): The hashing method used for comparison (e.g., 'dhash').
         remove (bool): If True, duplicates are deleted automatically without asking.
-        comparer (ImageComparer): The engine that performs the actual image comparison.
+        comparer (Union[ImageComparer, VideoComparer]): The engine that performs the actual comparison.
     """
     def __init__(self, **kwargs):
         """
@@ -35,13 +46,14 @@ class DedupOperation(FileOperation, FileRemoverMixin):
         """
         super().__init__(**kwargs)
         self.mapping = {
-            Constants.image: ImageComparer
+            Constants.image: ImageComparer,
+            Constants.video: VideoComparer
         }
 
         self.filetype = kwargs.get("filetype", self.settings.datatype)
         self.method = kwargs.get("method", self.settings.method)
         self.remove = kwargs.get("remove", self.settings.remove)
-        self.comparer: ImageComparer = self.mapping[self.filetype](self.settings)
+        self.comparer: Union[ImageComparer, VideoComparer] = self.mapping[self.filetype](self.settings)
 
     @staticmethod
     def add_arguments(settings: AppSettings, parser: argparse.ArgumentParser) -> None:
@@ -87,17 +99,200 @@ class DedupOperation(FileOperation, FileRemoverMixin):
             help=HelpStrings.cache_name,
             default=None
         )
+        parser.add_argument(
+            Arguments.search_index,
+            help=HelpStrings.search_index,
+            default=settings.search_index
+        )
+        parser.add_argument(
+            Arguments.reduced_decode,
+            help=HelpStrings.reduced_decode,
+            action="store_true",
+            default=settings.reduced_decode
+        )
+        parser.add_argument(
+            Arguments.hash_methods,
+            help=HelpStrings.hash_methods,
+            nargs="+",
+            default=settings.hash_methods
+        )
+        parser.add_argument(
+            Arguments.hash_pyramid,
+            help=HelpStrings.hash_pyramid,
+            nargs="+",
+            default=settings.hash_pyramid
+        )
+        parser.add_argument(
+            Arguments.cascade,
+            help=HelpStrings.cascade,
+            action="store_true",
+            default=settings.cascade
+        )
+        parser.add_argument(
+            Arguments.cascade_factor,
+            help=HelpStrings.cascade_factor,
+            default=settings.cascade_factor
+        )
+        parser.add_argument(
+            Arguments.exact_prefilter,
+            help=HelpStrings.exact_prefilter,
+            action=argparse.BooleanOptionalAction,
+            default=settings.exact_prefilter
+        )
+        parser.add_argument(
+            Arguments.incremental,
+            help=HelpStrings.incremental,
+            action=argparse.BooleanOptionalAction,
+            default=settings.incremental
+        )
+        parser.add_argument(
+            Arguments.out_of_core,
+            help=HelpStrings.out_of_core,
+            action="store_true",
+            default=settings.out_of_core
+        )
+        parser.add_argument(
+            Arguments.reference,
+            help=HelpStrings.reference,
+            nargs="+",
+            default=settings.reference
+        )
+        parser.add_argument(
+            Arguments.temporal_window,
+            help=HelpStrings.temporal_window,
+            default=settings.temporal_window
+        )
+        parser.add_argument(
+            Arguments.temporal_global,
+            help=HelpStrings.temporal_global,
+            action="store_true",
+            default=settings.temporal_global
+        )
+        parser.add_argument(
+            Arguments.graph_threshold,
+            help=HelpStrings.graph_threshold,
+            default=settings.graph_threshold
+        )
+        parser.add_argument(
+            Arguments.sweep,
+            help=HelpStrings.sweep,
+            action="store_true",
+            default=settings.sweep
+        )
+        parser.add_argument(
+            Arguments.keep_best,
+            help=HelpStrings.keep_best,
+            action="store_true",
+            default=settings.keep_best
+        )
+        parser.add_argument(
+            Arguments.stream_remove,
+            help=HelpStrings.stream_remove,
+            action="store_true",
+            default=settings.stream_remove
+        )
+        parser.add_argument(
+            Arguments.invariant,
+            help=HelpStrings.invariant,
+            action="store_true",
+            default=settings.invariant
+        )
+        parser.add_argument(
+            Arguments.exif_thumbnail,
+            help=HelpStrings.exif_thumbnail,
+            action="store_true",
+            default=settings.exif_thumbnail
+        )
+        parser.add_argument(
+            Arguments.exif_confirm,
+            help=HelpStrings.exif_confirm,
+            action="store_true",
+            default=settings.exif_confirm
+        )
+        parser.add_argument(
+            Arguments.shard_dir,
+            help=HelpStrings.shard_dir,
+            default=settings.shard_dir
+        )
+        parser.add_argument(
+            Arguments.shards,
+            help=HelpStrings.shards,
+            default=settings.shards
+        )
+        parser.add_argument(
+            Arguments.shard_timeout,
+            help=HelpStrings.shard_timeout,
+            default=settings.shard_timeout
+        )
+        parser.add_argument(
+            Arguments.link_duplicates,
+            help=HelpStrings.link_duplicates,
+            default=settings.link_duplicates
+        )
+        parser.add_argument(
+            Arguments.object_dedup,
+            help=HelpStrings.object_dedup,
+            action="store_true",
+            default=settings.object_dedup
+        )
+        parser.add_argument(
+            Arguments.a_source,
+            help=HelpStrings.a_source,
+            default=settings.a_source
+        )
+        parser.add_argument(
+            Arguments.report_path,
+            help=HelpStrings.report_path,
+            default=settings.report_path
+        )
 
     def do_task(self):
         """
         Executes the deduplication process.
 
-        This method uses the 'ImageComparer' to find duplicates among the
-        collected files. If duplicates are found, it checks for user
-        confirmation (or uses the 'remove' flag) and deletes the files
-        using 'FileRemoverMixin'.
+        The first matching mode below handles the cycle and returns:
+        1. 'link_duplicates': byte-identical files are replaced with links
+           to one copy (see 'link_exact_duplicates'); nothing is removed.
+        2. 'object_dedup' (images only): matched annotated objects are
+           saved to a report (see 'report_object_duplicates').
+        3. 'sweep' (images only): the duplicate counts at several thresholds
+           are reported (see 'report_sweep').
+        4. 'stream_remove' with 'remove': duplicates are deleted while the
+           search is still running (see 'remove_streamed').
+        Otherwise the 'ImageComparer' finds duplicates among the collected
+        files. If duplicates are found, it checks for user confirmation (or
+        uses the 'remove' flag) and deletes the files using 'FileRemoverMixin'.
+        Every mode waits 'sleep' seconds before the next cycle.
         """
-        duplicates = self.comparer.compare(self.files_for_task)
+        if self.settings.link_duplicates:
+            self.link_exact_duplicates()
+            wait(logger=self.logger, timeout=self.sleep)
+            return
+
+        is_image = self.filetype == Constants.image
+
+        if not is_image and (self.settings.object_dedup or self.settings.sweep):
+            self.logger.warning(f"--object_dedup and --sweep work only with '{Constants.image}' files, ignored")
+
+        if self.settings.object_dedup and is_image:
+            self.report_object_duplicates()
+            wait(logger=self.logger, timeout=self.sleep)
+            return
+
+        if self.settings.sweep and is_image:
+            self.report_sweep()
+            wait(logger=self.logger, timeout=self.sleep)
+            return
+
+        if self.settings.stream_remove and self.remove:
+            self.remove_streamed()
+            wait(logger=self.logger, timeout=self.sleep)
+            return
+
+        if self.settings.stream_remove:
+            self.logger.warning("--stream_remove works only with --remove, duplicates are removed after the search")
+
+        duplicates = self.comparer.compare(self.files_for_task, self.files_stats)
         duplicates_count = len(duplicates)
         self.logger.info(f"Found {duplicates_count} duplicates in {len(self.files_for_task)} files")
 
@@ -106,6 +301,75 @@ class DedupOperation(FileOperation, FileRemoverMixin):
 
         wait(logger=self.logger, timeout=self.sleep)
 
+
+    def remove_streamed(self) -> None:
+        """
+        Removes duplicates while the search is still running.
+
+        Batches of final duplicates from 'ImageComparer.iter_duplicates' are
+        deleted by a background thread pool (see 'remove_streaming'). At the
+        end every removed path is checked once more: a path reported twice
+        or a file still on disk is logged as an error.
+        """
+        removed = self.remove_streaming(self.comparer.iter_duplicates(self.files_for_task, self.files_stats))
+        self.logger.info(f"Found {len(removed)} duplicates in {len(self.files_for_task)} files")
+
+        if len(set(removed)) != len(removed):
+            self.logger.error(f"{len(removed) - len(set(removed))} duplicates were reported more than once")
+
+        remaining = self.find_remaining(removed)
+
+        if remaining:
+            self.logger.error(f"{len(remaining)} duplicates are still on disk, e.g. {remaining[:5]}")
+        else:
+            self.logger.info(f"Consistency check passed: all {len(removed)} duplicates are removed")
+
+    def link_exact_duplicates(self) -> None:
+        """
+        Replaces byte-identical files with links to the first file of their group.
+
+        Files are grouped by size and content digest (see
+        'ExactDuplicateFinder'); images are not decoded or hashed. The
+        groups are linked in parallel (see 'link_groups') and the number
+        of reclaimed bytes is reported.
+        """
+        paths = self.files_for_task
+        sizes = np.array([stat.st_size if stat else -1 for stat in map(self.files_stats.get, paths)], dtype=np.int64)
+        groups = ExactDuplicateFinder(self.settings).find_groups(paths, sizes)
+        reclaimed = self.link_groups([[paths[row] for row in group] for group in groups], self.settings.link_duplicates)
+        copies = sum(len(group) - 1 for group in groups)
+        self.logger.info(
+            f"Linked {copies} exact duplicates in {len(groups)} groups ({self.settings.link_duplicates}), "
+            f"reclaimed {reclaimed} bytes ({reclaimed / 1024 ** 3:.2f} GiB)"
+        )
+
+    def report_object_duplicates(self) -> None:
+        """
+        Reports annotated objects that are pasted into several images.
+
+        The matches come from 'ImageComparer.find_object_duplicates' and are
+        saved to 'report_path'. Nothing is removed, since an object is a
+        part of an image.
+        """
+        report = self.comparer.find_object_duplicates(self.files_for_task)
+        image_columns = (ObjectHasher.IMAGE, f"{ObjectHasher.DUPLICATE}{ObjectHasher.IMAGE}")
+        images = set().union(*(report.column(column).to_pylist() for column in image_columns))
+        self.logger.info(f"Found {report.num_rows} matched object pairs in {len(images)} images")
+
+    def report_sweep(self) -> None:
+        """
+        Logs the number of duplicates for every threshold.
+
+        The counts come from one neighbour graph search (see
+        'ImageComparer.sweep'), so a threshold can be picked without
+        repeating the comparison. Nothing is removed.
+        """
+        counts = self.comparer.sweep(self.files_for_task, self.files_stats)
+        lines = [f"{'threshold, %':>12} | {'duplicates':>10}"]
+        lines.extend(f"{threshold:>12} | {count:>10}" for threshold, count in counts.items())
+        report = "\n".join(lines)
+        self.logger.info(f"Duplicates per threshold for {len(self.files_for_task)} files:\n{report}")
+
     def confirm_removing(self) -> bool:
         """
         Checks if the operation has permission to delete the found duplicates.
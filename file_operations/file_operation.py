@@ -1,12 +1,15 @@
 import argparse
+import fnmatch
+import os
 import time
 
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Tuple, Union, Optional
+from typing import Tuple, Union, Optional, Dict
 
 from const_utils.default_values import AppSettings
 from logger.logger import LoggerConfigurator
+from tools.mixins.file_linker import FileLinkerMixin
 
 
 class FileOperation(ABC):
@@ -23,6 +26,8 @@ class FileOperation(ABC):
         sleep (float): Time in seconds to wait between cycles if 'repeat' is True.
         repeat (bool): If True, the operation runs in a continuous loop.
         files_for_task (Tuple[Path]): A collection of files found for processing.
+        files_stats (Dict[Path, os.stat_result]): File stats gathered while
+            scanning the source directory for 'files_for_task'.
         pattern (tuple): File extensions or keywords to match files for processing.
         source_directory (Path): The directory to search for files for processing.
         target_directory (Path): The directory where results are saved.
@@ -43,6 +48,7 @@ class FileOperation(ABC):
         self.sleep: float = kwargs.get('sleep', settings.sleep)
         self.repeat: bool = kwargs.get('repeat', settings.repeat)
         self.files_for_task: Tuple[Union[Path]] = tuple()
+        self.files_stats: Dict[Path, os.stat_result] = {}
         self.pattern: tuple = kwargs.get('pattern', settings.pattern)
         self.src: str = kwargs.get('src', '')
         self.dst: str = kwargs.get('dst', '')
@@ -74,17 +80,64 @@ class FileOperation(ABC):
         Returns:
             Tuple[Path]: A tuple containing Path objects of the found files.
         """
-        files = set()
-
-        for p in pattern:
-            current_pattern_files = source_directory.glob(f"*{p}*")
-            files.update(current_pattern_files)
-
-        files_for_task = tuple(file.resolve() for file in files)
+        files_for_task = tuple(self.scan_files(source_directory, pattern))
         self.logger.debug(f"Total files_for_task: {len(files_for_task)}")
         return files_for_task
 
 
+    def scan_files(
+            self,
+            source_directory: Path,
+            pattern: Union[Tuple[str], Tuple[str, ...]]
+    ) -> Dict[Path, os.stat_result]:
+        """
+        Scans the source directory once and collects stats of matching files.
+
+        Matching follows the 'glob' rules used before: an entry matches if its
+        name fits '*{pattern}*' for any pattern, hidden entries included. Only
+        the temporary links of 'FileLinkerMixin' ('.{name}.link.tmp', left
+        behind if a link was interrupted) are skipped, so they are never
+        processed as images.
+        The stats come from the directory scan, so callers like the hash cache
+        can detect changed files without calling 'stat' a second time.
+
+        Args:
+            source_directory (Path): The folder to search in.
+            pattern (Union[Tuple[str], Tuple[str, ...]]): A tuple of strings
+                to match filenames (e.g., ('.jpg', '.png')).
+
+        Returns:
+            Dict[Path, os.stat_result]: Resolved file paths and their stats.
+        """
+        masks = tuple(f"*{p}*" for p in pattern)
+        files_stats = {}
+
+        with os.scandir(source_directory) as entries:
+            for entry in entries:
+                if not any(fnmatch.fnmatch(entry.name, mask) for mask in masks) or self.is_link_temp(entry.name):
+                    continue
+                try:
+                    files_stats[Path(entry.path).resolve()] = entry.stat()
+                except OSError as e:
+                    self.logger.warning(f"Unable to stat {entry.path}: {e}")
+
+        return files_stats
+
+
+    @staticmethod
+    def is_link_temp(name: str) -> bool:
+        """
+        Checks whether a file name is a temporary link of 'FileLinkerMixin'.
+
+        Args:
+            name (str): The file name.
+
+        Returns:
+            bool: True for '.{name}.link.tmp' names.
+        """
+        return name.startswith(".") and name.endswith(FileLinkerMixin.LINK_TEMP_SUFFIX)
+
+
     def check_source_directory(self) -> None:
         """
         Validates that the source directory exists on the file system.
@@ -119,7 +172,9 @@ class FileOperation(ABC):
         self.check_directories()
         while True:
             try:
-                self.files_for_task = self.get_files(source_directory=self.source_directory, pattern=self.pattern)
+                self.files_stats = self.scan_files(source_directory=self.source_directory, pattern=self.pattern)
+                self.files_for_task = tuple(self.files_stats)
+                self.logger.debug(f"Total files_for_task: {len(self.files_for_task)}")
 
                 if len(self.files_for_task) == 0 and self.repeat:
                     self.logger.info(f"No files found for task'{self.pattern}'. Wait for {self.sleep} seconds...")
@@ -0,0 +1,90 @@
+import argparse
+
+from const_utils.arguments import Arguments
+from const_utils.default_values import AppSettings
+from const_utils.parser_help import HelpStrings
+from file_operations.file_operation import FileOperation
+from tools.comparer.img_comparer.img_comparer import ImageComparer
+from tools.comparer.img_comparer.query_server import QueryServer
+from tools.comparer.img_comparer.similarity_index import SimilarityIndex
+
+
+class ServeOperation(FileOperation):
+    """
+    An operation that keeps the hashes of a folder in memory and answers similarity queries.
+
+    The hashes are loaded from the same cache as 'dedup' (only new or
+    changed images are hashed), then a 'QueryServer' answers top-k and
+    within-threshold queries and accepts new images until Ctrl+C.
+
+    Attributes:
+        comparer (ImageComparer): Provides the configured hasher and its cache.
+    """
+    def __init__(self, **kwargs):
+        """
+        Initializes the serve operation.
+
+        Args:
+            **kwargs (dict): Parameters from the command line or settings, including
+                'method', 'core_size' and the server address.
+        """
+        super().__init__(**kwargs)
+        self.comparer = ImageComparer(self.settings)
+
+    @staticmethod
+    def add_arguments(settings: AppSettings, parser: argparse.ArgumentParser) -> None:
+        """
+        Defines CLI arguments for the query server.
+
+        Args:
+            settings (AppSettings): Global configuration for default values.
+            parser (argparse.ArgumentParser): The parser to which arguments are added.
+        """
+        parser.add_argument(
+            Arguments.method, Arguments.m,
+            help=HelpStrings.method,
+            default=settings.method
+        )
+        parser.add_argument(
+            Arguments.core_size,
+            help=HelpStrings.core_size,
+            default=settings.core_size
+        )
+        parser.add_argument(
+            Arguments.n_jobs,
+            help=HelpStrings.n_jobs,
+            default=settings.n_jobs
+        )
+        parser.add_argument(
+            Arguments.cache_name,
+            help=HelpStrings.cache_name,
+            default=None
+        )
+        parser.add_argument(
+            Arguments.serve_host,
+            help=HelpStrings.serve_host,
+            default=settings.serve_host
+        )
+        parser.add_argument(
+            Arguments.serve_port,
+            help=HelpStrings.serve_port,
+            default=settings.serve_port
+        )
+        parser.add_argument(
+            Arguments.serve_socket,
+            help=HelpStrings.serve_socket,
+            default=settings.serve_socket
+        )
+        parser.add_argument(
+            Arguments.serve_top_k,
+            help=HelpStrings.serve_top_k,
+            default=settings.serve_top_k
+        )
+
+    def do_task(self):
+        """
+        Loads the hashes of the source folder and serves queries until interrupted.
+        """
+        hash_table = self.comparer.method.get_hashmap(self.files_for_task, self.files_stats)
+        index = SimilarityIndex(self.settings, self.comparer.method, hash_table)
+        QueryServer(self.settings, index).serve()
@@ -0,0 +1,94 @@
+import numpy as np
+
+
+WORD_BITS: int = 64
+WORD_DTYPE: np.dtype = np.dtype("<u8")
+POPCOUNT_TABLE: np.ndarray = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def words_count(n_bits: int) -> int:
+    """
+    Calculates how many 64-bit words are needed to store a hash.
+
+    Args:
+        n_bits (int): The length of the hash in bits.
+
+    Returns:
+        int: The number of uint64 words (the last word is zero-padded).
+    """
+    return -(-int(n_bits) // WORD_BITS)
+
+
+def pack_bits(bits: np.ndarray) -> np.ndarray:
+    """
+    Packs a boolean hash (or a matrix of hashes) into uint64 words.
+
+    Bits are packed along the last axis. If the bit count is not a multiple
+    of 64, the last word is padded with zeros, so padded bits never
+    contribute to the Hamming distance.
+
+    Args:
+        bits (np.ndarray): A 1D boolean hash or a 2D boolean matrix (one hash per row).
+
+    Returns:
+        np.ndarray: A contiguous array of little-endian uint64 words with the
+            same leading shape and ceil(n_bits / 64) words on the last axis.
+    """
+    packed = np.packbits(np.asarray(bits, dtype=bool), axis=-1)
+    pad = (-packed.shape[-1]) % (WORD_BITS // 8)
+
+    if pad:
+        pad_width = [(0, 0)] * (packed.ndim - 1) + [(0, pad)]
+        packed = np.pad(packed, pad_width)
+
+    return np.ascontiguousarray(packed).view(WORD_DTYPE)
+
+
+def unpack_bits(words: np.ndarray, n_bits: int) -> np.ndarray:
+    """
+    Restores a boolean hash (or a matrix of hashes) from packed uint64 words.
+
+    Args:
+        words (np.ndarray): Packed hash words produced by 'pack_bits'.
+        n_bits (int): The original length of the hash in bits.
+
+    Returns:
+        np.ndarray: A boolean array with n_bits values on the last axis.
+    """
+    raw_bytes = np.ascontiguousarray(words, dtype=WORD_DTYPE).view(np.uint8)
+    return np.unpackbits(raw_bytes, axis=-1, count=n_bits).astype(bool)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """
+    Counts set bits over the last axis of a packed array.
+
+    Uses 'np.bitwise_count' when NumPy provides it and falls back to a
+    256-entry byte lookup table otherwise.
+
+    Args:
+        words (np.ndarray): An array of uint64 words.
+
+    Returns:
+        np.ndarray: The number of set bits per row (int32).
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int32)
+
+    raw_bytes = np.ascontiguousarray(words).view(np.uint8)
+    return POPCOUNT_TABLE[raw_bytes].sum(axis=-1, dtype=np.int32)
+
+
+def hamming_distances(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    Calculates Hamming distances between one packed hash and every matrix row.
+
+    Args:
+        matrix (np.ndarray): A 2D array of packed hashes (N x words).
+        query (np.ndarray): A packed hash (words,) or a stack of hashes
+            broadcastable against the matrix.
+
+    Returns:
+        np.ndarray: Distances in bits for every row of the matrix.
+    """
+    return popcount(np.bitwise_xor(matrix, query))
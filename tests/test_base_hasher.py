@@ -1,9 +1,20 @@
 import pytest
 import numpy as np
 import pandas as pd
+import struct
 from pathlib import Path
 from unittest.mock import MagicMock, patch
+import cv2
+import pyarrow as pa
+from services.hamming import unpack_bits
+from tools.cache import CacheIO
+from tools.comparer.img_comparer.hasher.ahash import AHash
+from tools.comparer.img_comparer.hasher.base_hasher import BaseHasher
 from tools.comparer.img_comparer.hasher.dhash import DHash
+from tools.comparer.img_comparer.hasher.phash import PHash
+from tools.comparer.img_comparer.hasher.hash_checkpoint import HashCheckpoint
+from tools.comparer.img_comparer.hasher.hash_table import HashBatch, HashTable
+from tools.comparer.img_comparer.index.base_index import HashPairs
 
 
 @pytest.fixture
@@ -13,37 +24,39 @@ def mock_cache_io():
 
 @pytest.fixture
 def hasher(settings, mock_cache_io):
-    """Create hasher with mock CacheIO."""
-    return DHash(settings=settings, cache_io=mock_cache_io)
+    """Create hasher with mock CacheIO and a single hash size."""
+    hasher = DHash(settings=settings, cache_io=mock_cache_io)
+    hasher.hash_pyramid = ()
+    return hasher
 
 
-def test_df_to_hash_map_conversion(hasher):
-    """Test convertion from Pandas back to Dict[Path, np.array]."""
+def test_legacy_cache_is_not_reused():
+    """The old Parquet layout (path + list of bools) has no hash columns and loads as an empty table."""
     test_df = pd.DataFrame([
         {'path': '/tmp/1.jpg', 'hash': [True, False]},
         {'path': '/tmp/2.jpg', 'hash': [False, True]}
     ])
 
-    result = hasher._df_to_hash_map(test_df)
+    result = HashTable.from_arrow(pa.Table.from_pandas(test_df))
 
-    assert len(result) == 2
-    assert isinstance(list(result.keys())[0], Path)
-    assert isinstance(list(result.values())[0], np.ndarray)
-    assert result[Path('/tmp/1.jpg')][0] == True
+    assert len(result) == 0
 
 
 def test_validate_hash_map_sync(hasher):
     """Synchronization test: removing old files and detecting new ones."""
     # Дані в кеші (один файл видалено з диска)
-    existing_hash_map = {
-        Path("old.jpg"): np.array([True]),
-        Path("stay.jpg"): np.array([True])
-    }
+    existing_table = HashTable.from_dict({
+        Path("old.jpg"): np.array([1], dtype=np.uint64),
+        Path("stay.jpg"): np.array([1], dtype=np.uint64)
+    }, key=hasher.hash_column)
 
     current_paths = (Path("stay.jpg"), Path("new.jpg"))
 
-    with patch.object(hasher, 'update_hashes', return_value=[np.array([False])]):
-        is_valid, final_map = hasher.validate_hash_map(current_paths, existing_hash_map)
+    new_hashes = HashBatch.from_rows([{hasher.hash_column: np.array([0], dtype=np.uint64)}])
+
+    with patch.object(hasher, 'update_hashes', return_value=new_hashes):
+        is_valid, final_table = hasher.validate_hash_map(current_paths, existing_table)
+        final_map = final_table.to_dict()
 
         assert is_valid is False
         assert Path("old.jpg") not in final_map
@@ -51,20 +64,298 @@ def test_validate_hash_map_sync(hasher):
         assert Path("new.jpg") in final_map
 
 
+def test_validate_hash_map_detects_changed_stats(hasher):
+    """Files overwritten in place (new size or mtime) must be re-hashed, unchanged ones reused."""
+    existing_table = HashTable.from_dict(
+        {
+            Path("same.jpg"): np.array([1], dtype=np.uint64),
+            Path("changed.jpg"): np.array([2], dtype=np.uint64)
+        },
+        stats={Path("same.jpg"): (100, 1), Path("changed.jpg"): (100, 1)},
+        key=hasher.hash_column
+    )
+    files_stats = {Path("same.jpg"): (100, 1), Path("changed.jpg"): (100, 2)}
+    current_paths = (Path("same.jpg"), Path("changed.jpg"))
+
+    new_hashes = HashBatch.from_rows([{hasher.hash_column: np.array([3], dtype=np.uint64)}])
+
+    with patch.object(hasher, 'update_hashes', return_value=new_hashes) as mock_update:
+        is_valid, final_table = hasher.validate_hash_map(current_paths, existing_table, files_stats)
+        final_map = final_table.to_dict()
+
+        assert is_valid is False
+        mock_update.assert_called_once()
+        assert mock_update.call_args.args[0] == (Path("changed.jpg"),)
+        assert final_map[Path("changed.jpg")][0] == 3
+        assert final_map[Path("same.jpg")][0] == 1
+
+
+def test_collect_stats_reuses_scan_results(hasher, tmp_path):
+    """Stats from the directory scan are used as is; missing ones are read from disk."""
+    scanned = tmp_path / "scanned.jpg"
+    other = tmp_path / "other.jpg"
+    scanned.write_bytes(b"1")
+    other.write_bytes(b"123")
+    fake_stat = MagicMock(st_size=42, st_mtime_ns=7)
+
+    stats = hasher.collect_stats((scanned, other, tmp_path / "ghost.jpg"), {scanned: fake_stat})
+
+    assert stats[scanned] == (42, 7)
+    assert stats[other][0] == 3
+    assert tmp_path / "ghost.jpg" not in stats
+
+
 def test_get_hashmap_cache_hit(hasher, mock_cache_io):
     """Test that when cache is valid, no new hash calculations are performed."""
     path = Path("test.jpg")
-    test_df = pd.DataFrame([{'path': str(path), 'hash': [True]}])
+    test_table = HashTable.from_dict({path: np.array([1], dtype=np.uint64)}, key=hasher.hash_column).to_arrow()
 
-    mock_cache_io.load.return_value = test_df
+    mock_cache_io.load_table.return_value = test_table
 
     with patch.object(hasher, 'update_hashes') as mock_update:
         result = hasher.get_hashmap((path,))
 
-        assert path in result
+        assert path in result.to_dict()
         mock_update.assert_not_called()  # Важливо: ми не рахували заново
 
 
+def test_update_hashes_streams_into_checkpoint(hasher, tmp_path):
+    """Hashes keep the input order and are flushed to checkpoint parts while streaming."""
+    images = []
+
+    for index in range(3):
+        image = np.full((32, 32, 3), index * 100, dtype=np.uint8)
+        image[:, :16] = 255 - index * 50
+        path = tmp_path / f"{index}.png"
+        cv2.imwrite(str(path), image)
+        images.append(path)
+
+    images.append(tmp_path / "broken.png")
+    checkpoint = HashCheckpoint(CacheIO(hasher.settings), tmp_path / "cache.parquet", every=2, interval=3600)
+
+    hasher.n_jobs = 1
+    hashes = hasher.update_hashes(tuple(images), checkpoint)
+
+    assert hashes.is_read.tolist() == [True, True, True, False]
+    assert np.array_equal(hashes.columns[hasher.hash_column][0], DHash.compute_hash(images[0], hasher.core_size))
+    assert len(list(checkpoint.directory.glob(HashCheckpoint.PART_PATTERN))) == 2
+    assert set(checkpoint.load().paths) == {str(path) for path in images[:3]}
+
+
+def test_get_hashmap_resumes_from_checkpoint(hasher, mock_cache_io, tmp_path, monkeypatch):
+    """Hashes saved by an interrupted run are reused and only the rest is computed."""
+    monkeypatch.setattr(hasher.settings, "cache_file_path", tmp_path)
+    done, pending = Path("done.jpg"), Path("pending.jpg")
+    mock_cache_io.generate_cache_filename.return_value = "cache.parquet"
+    mock_cache_io.load_table.return_value = None
+
+    restored = HashTable.from_dict({done: np.array([1], dtype=np.uint64)}, key=hasher.hash_column)
+    new_hashes = HashBatch.from_rows([{hasher.hash_column: np.array([2])}])
+
+    with patch.object(HashCheckpoint, 'load', return_value=restored), \
+            patch.object(HashCheckpoint, 'clear') as mock_clear, \
+            patch.object(hasher, 'update_hashes', return_value=new_hashes) as mock_update:
+        result = hasher.get_hashmap((done, pending))
+
+    assert mock_update.call_args.args[0] == (pending,)
+    assert result.to_dict()[done][0] == 1
+    assert result.to_dict()[pending][0] == 2
+    mock_cache_io.save.assert_called_once()
+    mock_clear.assert_called_once()
+
+
+def test_companions_share_one_decode(hasher, tmp_path, monkeypatch):
+    """Companion hashes are computed from one decode and stored as separate columns."""
+    image_path = tmp_path / "img.png"
+    cv2.imwrite(str(image_path), np.tile(np.linspace(0, 255, 64, dtype=np.uint8), (48, 1)))
+    monkeypatch.setattr(hasher, "companions", (PHash, AHash))
+
+    with patch.object(BaseHasher, 'decode', wraps=BaseHasher.decode) as mock_load:
+        hashes = hasher.compute_hashes(image_path, hasher.hash_specs)
+
+    mock_load.assert_called_once()
+    assert list(hashes) == ["dhash_8", "phash_8", "ahash_8"]
+    assert np.array_equal(hashes["phash_8"], PHash.compute_hash(image_path, 8))
+
+    table = hasher._build_table((image_path,), HashBatch.from_rows([hashes]), np.array([1]), np.array([2]))
+    restored = HashTable.from_arrow(table.to_arrow())
+
+    assert set(restored.columns) == {"dhash_8", "phash_8", "ahash_8"}
+    assert np.array_equal(restored.columns["ahash_8"][0], hashes["ahash_8"])
+
+
+def test_quality_metrics_come_from_the_hashing_decode(hasher, tmp_path):
+    """Sharpness and resolution are measured from the same decode and kept in the cache."""
+    rng = np.random.default_rng(0)
+    sharp = rng.integers(0, 256, (120, 160), dtype=np.uint8)
+    paths = (tmp_path / "sharp.png", tmp_path / "blurred.png")
+    cv2.imwrite(str(paths[0]), sharp)
+    cv2.imwrite(str(paths[1]), cv2.GaussianBlur(sharp, (9, 9), 3))
+
+    with patch.object(BaseHasher, 'decode', wraps=BaseHasher.decode) as mock_decode:
+        hashes = [hasher.compute_hashes(path, hasher.hash_specs, measure_quality=True) for path in paths]
+
+    assert mock_decode.call_count == 2
+    table = HashTable.from_arrow(hasher._build_table(
+        paths, HashBatch.from_rows(hashes), np.array([1, 2]), np.array([3, 4])
+    ).to_arrow())
+
+    assert list(table.columns) == [hasher.hash_column]
+    assert table.metrics[HashTable.PIXELS].tolist() == [120 * 160, 120 * 160]
+    assert table.metrics[HashTable.SHARPNESS][0] > table.metrics[HashTable.SHARPNESS][1]
+
+
+def test_invariant_mode_adds_dihedral_column(hasher, tmp_path, monkeypatch):
+    """The 8 flip and rotation hashes are derived from the same decode as the ordinary hash."""
+    image_path = tmp_path / "img.png"
+    cv2.imwrite(str(image_path), np.tile(np.linspace(0, 255, 64, dtype=np.uint8), (48, 1)))
+    monkeypatch.setattr(hasher, "invariant", True)
+
+    with patch.object(BaseHasher, 'decode', wraps=BaseHasher.decode) as mock_decode:
+        hashes = hasher.compute_hashes(image_path, hasher.hash_specs)
+
+    mock_decode.assert_called_once()
+    assert list(hashes) == [hasher.hash_column, hasher.dihedral_column]
+    assert hashes[hasher.dihedral_column].shape == (8 * hashes[hasher.hash_column].size,)
+    # brightness grows to the right: every dHash bit is set, the horizontal flip clears all of them
+    variants = unpack_bits(hashes[hasher.dihedral_column].reshape(8, -1), 64)
+    assert variants[0].all() and not variants[4].any()
+
+
+def write_jpeg_with_thumbnail(path: Path, image: np.ndarray, thumbnail: np.ndarray, orientation: int = 1):
+    """Writes a JPEG with an APP1 segment holding the orientation (IFD0) and a JPEG thumbnail (IFD1)."""
+    thumbnail_bytes = cv2.imencode(".jpg", thumbnail)[1].tobytes()
+    ifd0 = struct.pack("<HHHIHHI", 1, 0x0112, 3, 1, orientation, 0, 26)
+    ifd1 = struct.pack("<HHHIIHHIII", 2, 0x0201, 4, 1, 56, 0x0202, 4, 1, len(thumbnail_bytes), 0)
+    payload = b"Exif\x00\x00" + b"II*\x00" + struct.pack("<I", 8) + ifd0 + ifd1 + thumbnail_bytes
+    segment = b"\xff\xe1" + (len(payload) + 2).to_bytes(2, "big") + payload
+    jpeg = cv2.imencode(".jpg", image)[1].tobytes()
+    path.write_bytes(jpeg[:2] + segment + jpeg[2:])
+
+
+def test_exif_thumbnail_replaces_the_decode(hasher, tmp_path):
+    """The oriented EXIF thumbnail is hashed instead of the image; files without one fall back to a decode."""
+    gradient = np.tile(np.linspace(0, 255, 160, dtype=np.uint8), (120, 1))
+    with_thumbnail, without_thumbnail = tmp_path / "camera.jpg", tmp_path / "plain.jpg"
+    # the full frame has the opposite gradient, so the hash shows which pixels were used
+    write_jpeg_with_thumbnail(with_thumbnail, gradient.T.copy(), gradient[:, ::-1].T.copy(), orientation=6)
+    cv2.imwrite(str(without_thumbnail), gradient)
+
+    thumbnail = hasher.decode(with_thumbnail, hasher.core_size, exif_thumbnail=True)
+    assert thumbnail.source == BaseHasher.SOURCE_THUMBNAIL
+    np.testing.assert_array_equal(thumbnail.image[:, 0] < thumbnail.image[:, -1], True)
+
+    hashes = [hasher.compute_hashes(path, hasher.hash_specs, exif_thumbnail=True)
+              for path in (with_thumbnail, without_thumbnail)]
+
+    assert [int(h[HashTable.SOURCE]) for h in hashes] == [BaseHasher.SOURCE_THUMBNAIL, BaseHasher.SOURCE_DECODE]
+    assert unpack_bits(hashes[0][hasher.hash_column][None], 64)[0].all()
+    table = HashTable.from_arrow(hasher._build_table(
+        (with_thumbnail, without_thumbnail), HashBatch.from_rows(hashes), np.array([1, 2]), np.array([3, 4])
+    ).to_arrow())
+    assert table.metrics[HashTable.SOURCE].tolist() == [BaseHasher.SOURCE_THUMBNAIL, BaseHasher.SOURCE_DECODE]
+
+
+def test_validate_hash_map_replaces_thumbnail_hashes(hasher):
+    """Once the thumbnail mode is off, cached thumbnail hashes are computed again from a decode."""
+    paths = (Path("thumb.jpg"), Path("decoded.jpg"))
+    existing_table = HashTable(
+        [str(path) for path in paths],
+        np.array([[1], [2]], dtype=np.uint64),
+        key=hasher.hash_column,
+        metrics={HashTable.SOURCE: np.array([BaseHasher.SOURCE_THUMBNAIL, BaseHasher.SOURCE_DECODE], dtype=np.int8)}
+    )
+    new_hashes = HashBatch.from_rows([{hasher.hash_column: np.array([7], dtype=np.uint64)}])
+
+    with patch.object(hasher, 'update_hashes', return_value=new_hashes) as mock_update:
+        is_valid, final_table = hasher.validate_hash_map(paths, existing_table)
+
+    assert is_valid is False
+    assert mock_update.call_args.args[0] == (Path("thumb.jpg"),)
+    assert sorted(final_table.hashes[:, 0].tolist()) == [2, 7]
+    assert HashTable.SOURCE not in final_table.metrics
+
+
+def test_confirm_pairs_rehashes_thumbnail_matches(hasher):
+    """Only thumbnail-hashed rows are decoded again and pairs beyond the threshold are dropped."""
+    table = HashTable(
+        ["a.jpg", "b.jpg", "c.jpg"],
+        np.zeros((3, 1), dtype=np.uint64),
+        key=hasher.hash_column,
+        metrics={HashTable.SOURCE: np.array([1, 0, 1], dtype=np.int8)}
+    )
+    pairs = HashPairs(np.array([0, 1]), np.array([1, 2]), np.array([0, 0]))
+    full_hashes = HashBatch.from_rows([{hasher.hash_column: np.array([0], dtype=np.uint64)},
+                                       {hasher.hash_column: np.array([2 ** 64 - 1], dtype=np.uint64)}])
+
+    with patch.object(hasher, 'update_hashes', return_value=full_hashes) as mock_update:
+        confirmed = hasher.confirm_pairs(table, pairs)
+
+    assert mock_update.call_args.args[0] == (Path("a.jpg"), Path("c.jpg"))
+    assert mock_update.call_args.kwargs["exif_thumbnail"] is False
+    assert confirmed.first.tolist() == [0] and confirmed.second.tolist() == [1]
+
+
+def test_validate_hash_map_rehashes_missing_column(hasher, monkeypatch):
+    """A newly requested method without a cached column triggers hashing of all images."""
+    existing_table = HashTable.from_dict({Path("a.jpg"): np.array([1], dtype=np.uint64)}, key=hasher.hash_column)
+    monkeypatch.setattr(hasher, "companions", (PHash,))
+    new_hashes = HashBatch.from_rows([
+        {hasher.hash_column: np.array([1], dtype=np.uint64), "phash_8": np.array([5], dtype=np.uint64)}
+    ])
+
+    with patch.object(hasher, 'update_hashes', return_value=new_hashes) as mock_update:
+        is_valid, final_table = hasher.validate_hash_map((Path("a.jpg"),), existing_table)
+
+    assert is_valid is False
+    assert mock_update.call_args.args[0] == (Path("a.jpg"),)
+    assert final_table.key == hasher.hash_column
+    assert final_table.columns["phash_8"][0][0] == 5
+
+
+def test_hash_pyramid_serves_any_stored_core_size(hasher, tmp_path, monkeypatch):
+    """Changing core_size to a size from the pyramid reuses the cache without hashing."""
+    image_path = tmp_path / "img.png"
+    cv2.imwrite(str(image_path), np.tile(np.linspace(0, 255, 80, dtype=np.uint8), (60, 1)))
+    monkeypatch.setattr(hasher, "hash_pyramid", (8, 16, 32))
+    monkeypatch.setattr(hasher, "core_size", 8)
+
+    hashes = hasher.compute_hashes(image_path, hasher.hash_specs)
+    cached = hasher._build_table((image_path,), HashBatch.from_rows([hashes]), np.array([-1]), np.array([-1]))
+
+    assert list(hashes) == ["dhash_8", "dhash_16", "dhash_32"]
+    assert hashes["dhash_32"].shape == (16,)
+
+    hasher.core_size = 16
+
+    with patch.object(hasher, 'update_hashes') as mock_update:
+        is_valid, table = hasher.validate_hash_map((image_path,), cached)
+
+    mock_update.assert_not_called()
+    assert is_valid is True
+    assert table.key == "dhash_16"
+    assert np.array_equal(table.hashes[0], DHash.compute_hash(image_path, 16))
+
+
+def test_exact_copies_are_hashed_once(hasher, tmp_path, monkeypatch):
+    """Byte-identical files are decoded once and found as duplicates with distance 0."""
+    monkeypatch.setattr(hasher.settings, "cache_file_path", tmp_path)
+    monkeypatch.setattr(hasher, "cache_io", CacheIO(hasher.settings))
+    image = np.tile(np.linspace(0, 255, 64, dtype=np.uint8), (48, 1))
+    paths = [tmp_path / f"{name}.png" for name in ("orig", "other", "copy")]
+    cv2.imwrite(str(paths[0]), image)
+    cv2.imwrite(str(paths[1]), image[::-1, ::-1])
+    paths[2].write_bytes(paths[0].read_bytes())
+    hasher.n_jobs = 1
+
+    with patch.object(hasher, 'update_hashes', wraps=hasher.update_hashes) as mock_update:
+        table = hasher.get_hashmap(tuple(paths))
+
+    assert mock_update.call_args.args[0] == (paths[0], paths[1])
+    assert np.array_equal(table.to_dict()[paths[2]], table.to_dict()[paths[0]])
+    assert hasher.find_duplicates(table) == [paths[2]]
+
+
 def test_find_duplicates_vectorization(hasher):
     """Test that find_duplicates correctly identifies duplicates based on the threshold."""
     # Два однакові хеші, один різний
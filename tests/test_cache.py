@@ -1,6 +1,7 @@
 import pytest
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 from pathlib import Path
 from tools.cache import CacheIO
 
@@ -33,13 +34,14 @@ def test_generate_cache_filename_manual(cache_io, tmp_path):
     assert name == "custom_export__size_32.parquet"
 
 
-def test_save_and_load_dict(cache_io, tmp_path):
-    """Tests saving a dictionary of hashes and loading it back as a DataFrame."""
+def test_save_and_load_arrow_table(cache_io, tmp_path):
+    """Tests saving an Arrow table (e.g. a converted hash table) and loading it back as a DataFrame."""
     cache_file = tmp_path / "test_hashes.parquet"
-    test_data = {
-        Path("/tmp/img1.jpg"): np.array([True, False, True], dtype=bool),
-        Path("/tmp/img2.jpg"): np.array([False, False, True], dtype=bool)
-    }
+    test_data = pa.table({
+        "dir": ["/tmp", "/tmp"],
+        "name": ["img1.jpg", "img2.jpg"],
+        "hash": pa.array([b"\x05", b"\x04"], pa.binary(1))
+    })
 
     # Save
     cache_io.save(test_data, cache_file)
@@ -49,8 +51,8 @@ def test_save_and_load_dict(cache_io, tmp_path):
     df = cache_io.load(cache_file)
     assert isinstance(df, pd.DataFrame)
     assert len(df) == 2
-    assert "path" in df.columns
-    assert "hash" in df.columns
+    assert {"dir", "name", "hash"} <= set(df.columns)
+    assert cache_io.load_table(cache_file).equals(test_data)
 
 
 def test_save_and_load_dataframe(cache_io, tmp_path):
@@ -79,4 +81,7 @@ def test_load_non_existent_file(cache_io, tmp_path):
 def test_save_invalid_type(cache_io, tmp_path):
     """Checks if passing invalid data types raises a TypeError."""
     with pytest.raises(TypeError):
-        cache_io.save(["not", "a", "dict"], tmp_path / "fail.parquet")
\ No newline at end of file
+        cache_io.save(["not", "a", "table"], tmp_path / "fail.parquet")
+
+    with pytest.raises(TypeError):
+        cache_io.save({Path("/tmp/img1.jpg"): np.array([True])}, tmp_path / "fail.parquet")
\ No newline at end of file
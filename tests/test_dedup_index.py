@@ -0,0 +1,144 @@
+import cv2
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from services.hamming import pack_bits
+from tools.cache import CacheIO
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+from tools.comparer.img_comparer.img_comparer import ImageComparer
+from tools.comparer.img_comparer.index.dedup_index import DedupIndex
+from tools.comparer.img_comparer.index.invariant_index import InvariantIndex
+from tools.comparer.img_comparer.index.linear_index import LinearIndex
+
+
+def make_table(n_images: int, seed: int = 0) -> HashTable:
+    """Creates 64-bit hashes where every third image is a near-copy of an earlier one."""
+    rng = np.random.default_rng(seed)
+    bits = rng.random((n_images, 64)) > 0.5
+
+    for row in range(3, n_images, 3):
+        bits[row] = bits[rng.integers(0, row)]
+        bits[row, rng.integers(0, 64)] ^= True
+
+    return HashTable([f"/data/{row:04d}.jpg" for row in range(n_images)], pack_bits(bits), key="dhash_8")
+
+
+def full_search(settings, table: HashTable, threshold: int) -> list:
+    index = LinearIndex(settings)
+    return index.resolve_duplicates(index.find_pairs(table.hashes, threshold), len(table)).tolist()
+
+
+@pytest.fixture
+def dedup_index(settings, tmp_path):
+    return DedupIndex(settings, CacheIO(settings), tmp_path / "cache_index_dhash_8_6.parquet")
+
+
+def test_incremental_cycles_match_full_search(settings, dedup_index):
+    """New images are searched only against the index, with the same result as a full search."""
+    table = make_table(120)
+    old, new = table.take(np.arange(80)), table
+
+    old_duplicates = dedup_index.update(old, LinearIndex(settings), 6)
+    kept = old.take(np.setdiff1d(np.arange(80), old_duplicates))
+    new_table = HashTable.concat([kept, new.take(np.arange(80, 120))])
+    new_duplicates = dedup_index.update(new_table, LinearIndex(settings), 6)
+
+    assert old_duplicates.tolist() == full_search(settings, old, 6)
+    assert new_duplicates.tolist() == full_search(settings, new_table, 6)
+    assert len(dedup_index.table) == len(new_table) - len(new_duplicates)
+
+
+def test_index_is_restored_from_disk(settings, dedup_index):
+    """A restarted watcher reads the saved index and searches only the new images."""
+    table = make_table(60)
+    duplicates = dedup_index.update(table.take(np.arange(50)), LinearIndex(settings), 6)
+    table = table.take(np.setdiff1d(np.arange(60), duplicates))
+    restored = DedupIndex(settings, CacheIO(settings), dedup_index.index_file)
+    search_index = LinearIndex(settings)
+
+    with patch.object(search_index, "find_pairs", wraps=search_index.find_pairs) as mock_find:
+        restored.update(table, search_index, 6)
+
+    assert len(mock_find.call_args.args[0]) == 10
+
+
+def test_changed_hash_is_searched_again(settings, dedup_index):
+    """An indexed image whose hash changed is treated as a new image."""
+    table = make_table(10)
+    dedup_index.update(table, LinearIndex(settings), 6)
+    table.hashes[1] = table.hashes[0]
+
+    duplicates = dedup_index.update(table, LinearIndex(settings), 6)
+
+    assert 1 in duplicates.tolist()
+
+
+def test_incremental_search_uses_invariant_index(settings, dedup_index):
+    """A new image that matches an indexed one only when flipped is found like in the full invariant search."""
+    table = make_table(12, seed=3)
+    rng = np.random.default_rng(4)
+    table.hashes[9] = rng.integers(0, 2 ** 63, dtype=np.uint64)
+    variants = rng.integers(0, 2 ** 63, (12, InvariantIndex.VARIANTS), dtype=np.uint64)
+    variants[:, 0] = table.hashes[:, 0]
+    variants[9, 5] = table.hashes[2, 0]
+
+    def invariant_index(rows):
+        return InvariantIndex(settings, LinearIndex(settings), variants[rows])
+
+    full_index = invariant_index(np.arange(12))
+    full = full_index.resolve_duplicates(full_index.find_pairs(table.hashes, 6), 12)
+    old_duplicates = dedup_index.update(table.take(np.arange(8)), invariant_index(np.arange(8)), 6)
+    new_duplicates = dedup_index.update(table, full_index, 6)
+
+    assert 9 in full.tolist()
+    assert 9 not in full_search(settings, table, 6)
+    assert np.union1d(old_duplicates, new_duplicates).tolist() == full.tolist()
+
+
+def test_confirmation_filters_incremental_and_streamed_pairs(settings, dedup_index):
+    """The confirmation gets pairs of table rows and both modes resolve only the confirmed pairs."""
+    table = make_table(120)
+    old_duplicates = dedup_index.update(table.take(np.arange(80)), LinearIndex(settings), 6)
+    kept = table.take(np.setdiff1d(np.arange(80), old_duplicates))
+    new_table = HashTable.concat([kept, table.take(np.arange(80, 120))])
+    seen = []
+
+    def confirm(pairs):
+        seen.append(pairs)
+        is_kept = pairs.second % 2 == 0
+        return type(pairs)(pairs.first[is_kept], pairs.second[is_kept], pairs.distance[is_kept])
+
+    new_duplicates = dedup_index.update(new_table, LinearIndex(settings), 6, confirm)
+    streamed = np.concatenate(list(LinearIndex(settings).iter_duplicates(new_table.hashes, 6, 16, confirm)))
+    pairs = seen[0]
+    distances = np.unpackbits((new_table.hashes[pairs.first] ^ new_table.hashes[pairs.second]).view(np.uint8), axis=1)
+    index = LinearIndex(settings)
+    expected = index.resolve_duplicates(confirm(index.find_pairs(new_table.hashes, 6)), len(new_table)).tolist()
+
+    assert len(pairs.first) and distances.sum(axis=1).tolist() == pairs.distance.tolist()
+    assert new_duplicates.tolist() == streamed.tolist() == expected
+    assert expected and expected != full_search(settings, new_table, 6)
+
+
+def test_each_search_mode_keeps_its_own_index(settings, tmp_path, monkeypatch):
+    """A flipped copy indexed as distinct without the invariant mode is found once the mode is on."""
+    monkeypatch.setattr(settings, "cache_file_path", tmp_path / "cache")
+    monkeypatch.setattr(settings, "n_jobs", 1)
+    monkeypatch.setattr(settings, "core_size", 16)
+    monkeypatch.setattr(settings, "repeat", True)
+    monkeypatch.setattr(settings, "incremental", True)
+    folder = tmp_path / "images"
+    folder.mkdir()
+    image = cv2.resize(np.random.default_rng(2).integers(0, 256, (9, 13), dtype=np.uint8), (160, 120))
+    paths = (folder / "a.png", folder / "b.png")
+    cv2.imwrite(str(paths[0]), image)
+    cv2.imwrite(str(paths[1]), np.fliplr(image))
+
+    plain = ImageComparer(settings).compare(paths)
+    monkeypatch.setattr(settings, "invariant", True)
+    invariant = ImageComparer(settings).compare(paths)
+
+    assert plain == []
+    assert invariant == [paths[1]]
+    assert len(list((tmp_path / "cache").glob("*_index_*"))) == 2
@@ -102,10 +102,10 @@ def test_n_jobs_clamping(hasher, input_value, expected_value):
 
 
 @pytest.mark.parametrize("input_value, expected_val", [
-    (16, 16 * 16),
-    ((10, 25), 10 * 10),
-    (17.5, 17 * 17),
-    ("8", 8 * 8)
+    (16, 16 * 16 // 64),
+    ((10, 25), 2),      # 100 bits -> 2 words
+    (17.5, 5),          # 289 bits -> 5 words
+    ("8", 8 * 8 // 64)
 ])
 def test_compute_hash_returns_correct_shape(hasher, create_test_image, input_value, expected_val):
     # Arrange
@@ -118,9 +118,9 @@ def test_compute_hash_returns_correct_shape(hasher, create_test_image, input_val
     # Assert
     assert result is not None
     assert isinstance(result, np.ndarray)
-    # the shape must be core_size * core_size (16*16=256)
+    # the hash must be packed into ceil(core_size * core_size / 64) uint64 words (16*16=256 -> 4)
     assert result.shape == (expected_val,)
-    assert result.dtype == bool
+    assert result.dtype == np.uint64
 
 def test_compute_hash_with_invalid_file(hasher, tmp_path):
     # Arrange
@@ -247,4 +247,37 @@ def test_different_images_with_similar_composition(hasher, input_value, expected
         assert bool(result) == expected_value
     finally:
         if os.path.exists(path_img1): os.remove(path_img1)
-        if os.path.exists(path_img2): os.remove(path_img2)
\ No newline at end of file
+        if os.path.exists(path_img2): os.remove(path_img2)
+
+@pytest.mark.parametrize("width, height, expected_shape", [
+    (2400, 1600, (200, 300)),     # 1/8 is still 4x larger than the 17 px grid
+    (640, 320, (80, 160)),        # 1/8 is too small, 1/4 is enough
+    (60, 60, (60, 60)),           # tiny image is decoded in full
+])
+def test_load_grayscale_reduced_jpeg(create_test_image, width, height, expected_shape):
+    image_path = create_test_image("large.jpg", width=width, height=height)
+
+    image = DHash.load_grayscale(image_path, core_size=16, reduced_decode=True)
+
+    assert image.shape == expected_shape
+
+
+def test_load_grayscale_reduced_skips_non_jpeg(create_test_image):
+    image_path = create_test_image("large.png", width=2400, height=1600)
+
+    image = DHash.load_grayscale(image_path, core_size=16, reduced_decode=True)
+
+    assert image.shape == (1600, 2400)
+
+
+def test_reduced_decode_hash_agrees_with_full_decode(hasher, tmp_path):
+    rng = np.random.default_rng(0)
+    image = cv2.resize(rng.integers(0, 255, (18, 32), dtype=np.uint8), (3200, 1800), interpolation=cv2.INTER_CUBIC)
+    image_path = tmp_path / "frame.jpg"
+    cv2.imwrite(str(image_path), image)
+
+    full_hash = hasher.compute_hash(image_path, 16)
+    reduced_hash = hasher.compute_hash(image_path, 16, reduced_decode=True)
+    distance = int(np.unpackbits(np.bitwise_xor(full_hash, reduced_hash).view(np.uint8)).sum())
+
+    assert distance <= hasher.threshold
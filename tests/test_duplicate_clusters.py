@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+from tools.comparer.img_comparer.index.base_index import HashPairs
+from tools.comparer.img_comparer.index.duplicate_clusters import DuplicateClusters
+
+
+def make_pairs(edges):
+    first, second = np.array(edges, dtype=np.int64).reshape(-1, 2).T
+    return HashPairs(first, second, np.zeros(len(first), dtype=np.int32))
+
+
+@pytest.fixture
+def hash_table():
+    paths = [f"img_{row}.jpg" for row in range(7)]
+    metrics = {
+        HashTable.PIXELS: np.array([100, 400, 400, 50, 50, 10, 10], dtype=np.float64),
+        HashTable.SHARPNESS: np.array([9.0, 1.0, 5.0, 2.0, 2.0, 1.0, 1.0]),
+    }
+    return HashTable(paths, np.zeros((7, 1), dtype=np.uint64), metrics=metrics)
+
+
+def test_chains_form_one_component():
+    """Rows connected through other rows share the label of the smallest row."""
+    pairs = make_pairs([(5, 6), (1, 2), (0, 6), (2, 3), (3, 4)])
+
+    labels = DuplicateClusters.connected_components(pairs, 8)
+
+    assert labels.tolist() == [0, 1, 1, 1, 1, 0, 0, 7]
+
+
+def test_components_match_a_reference_union_find():
+    rng = np.random.default_rng(3)
+    size = 500
+    edges = rng.integers(0, size, (300, 2))
+    edges = np.sort(edges[edges[:, 0] != edges[:, 1]], axis=1)
+    parent = list(range(size))
+
+    def find(row):
+        while parent[row] != row:
+            row = parent[row]
+        return row
+
+    for first, second in edges.tolist():
+        roots = sorted((find(first), find(second)))
+        parent[roots[1]] = roots[0]
+
+    labels = DuplicateClusters.connected_components(make_pairs(edges), size)
+
+    assert labels.tolist() == [find(row) for row in range(size)]
+
+
+def test_best_member_is_kept(settings, hash_table):
+    """Resolution wins over sharpness, ties go to the earlier row."""
+    clusters = DuplicateClusters(settings)
+
+    duplicates, table = clusters.build(make_pairs([(0, 1), (1, 2), (3, 4)]), hash_table)
+
+    assert duplicates.tolist() == [0, 1, 4]
+    assert table.column(DuplicateClusters.PATH).to_pylist() == [f"img_{row}.jpg" for row in (2, 0, 1, 3, 4)]
+    assert table.column(DuplicateClusters.CLUSTER).to_pylist() == [0, 0, 0, 1, 1]
+    assert table.column(DuplicateClusters.KEEP).to_pylist() == [True, False, False, True, False]
+
+
+def test_clusters_are_saved_as_parquet_and_json(settings, hash_table, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "report_path", tmp_path)
+    clusters = DuplicateClusters(settings)
+    _, table = clusters.build(make_pairs([(0, 1), (1, 2), (3, 4)]), hash_table)
+
+    parquet_file, json_file = clusters.save(table, "folder")
+    records = json.loads(json_file.read_text())
+
+    assert pq.read_table(parquet_file).equals(table)
+    assert [record[DuplicateClusters.KEEP]["path"] for record in records] == ["img_2.jpg", "img_3.jpg"]
+    assert [row["path"] for row in records[0]["duplicates"]] == ["img_0.jpg", "img_1.jpg"]
+    assert records[0][DuplicateClusters.KEEP][HashTable.SHARPNESS] == 5.0
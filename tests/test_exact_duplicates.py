@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from tools.comparer.img_comparer.hasher.exact_duplicates import ExactDuplicateFinder
+
+
+@pytest.fixture
+def finder(settings):
+    return ExactDuplicateFinder(settings)
+
+
+def write_files(tmp_path, contents):
+    paths = []
+
+    for index, content in enumerate(contents):
+        path = tmp_path / f"{index}.jpg"
+        path.write_bytes(content)
+        paths.append(path)
+
+    return paths, np.array([len(content) for content in contents], dtype=np.int64)
+
+
+def test_find_groups_splits_by_size_and_content(finder, tmp_path):
+    """Only byte-identical files are grouped; equal sizes alone are not enough."""
+    paths, sizes = write_files(tmp_path, [b"aaaa", b"bbbb", b"aaaa", b"abc", b"aaaa", b"bbbb"])
+
+    groups = finder.find_groups(paths, sizes)
+
+    assert [group.tolist() for group in groups] == [[0, 2, 4], [1, 5]]
+
+
+def test_find_groups_reads_past_the_head(finder, tmp_path):
+    """Large files with an equal head but a different tail are not grouped."""
+    head = bytes(ExactDuplicateFinder.HEAD_BYTES)
+    paths, sizes = write_files(tmp_path, [head + b"tail", head + b"tail", head + b"TAIL"])
+
+    groups = finder.find_groups(paths, sizes)
+
+    assert [group.tolist() for group in groups] == [[0, 1]]
+
+
+def test_find_groups_skips_unknown_and_unreadable_files(finder, tmp_path):
+    """Files without a known size or that cannot be read are never grouped."""
+    paths, sizes = write_files(tmp_path, [b"same", b"same", b"same"])
+    sizes[0] = -1
+    paths[1] = tmp_path / "missing.jpg"
+
+    assert finder.find_groups(paths, sizes) == []
+
+
+def test_representatives_map_copies_to_first_file(finder, tmp_path):
+    paths, sizes = write_files(tmp_path, [b"x1", b"y", b"x1"])
+
+    assert finder.representatives(paths, sizes).tolist() == [0, 1, 0]
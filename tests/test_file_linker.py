@@ -0,0 +1,76 @@
+import pytest
+
+from tools.mixins.file_linker import FileLinkerMixin
+
+
+class MockLogger:
+    def __init__(self):
+        self.warnings = []
+        self.infos = []
+
+    def warning(self, msg: str):
+        self.warnings.append(msg)
+
+    def info(self, msg: str):
+        self.infos.append(msg)
+
+    def error(self, msg: str):
+        self.warnings.append(msg)
+
+
+class DummyLinker(FileLinkerMixin):
+    def __init__(self):
+        self.logger = MockLogger()
+
+
+@pytest.fixture
+def linker():
+    """Fixture to provide a DummyLinker instance."""
+    return DummyLinker()
+
+
+def write_copies(tmp_path, count, content=b"identical content"):
+    paths = [tmp_path / f"copy_{i}.bin" for i in range(count)]
+
+    for path in paths:
+        path.write_bytes(content)
+
+    return paths
+
+
+def test_hardlink_replaces_copies(linker, tmp_path):
+    """Duplicates become hardlinks of the first file, every path is kept and a second run reclaims nothing."""
+    first = write_copies(tmp_path, 3)
+    groups = [first]
+
+    assert linker.link_groups(groups, "hardlink") == 2 * len(b"identical content")
+    assert all(path.exists() for path in first)
+    assert len({path.stat().st_ino for path in first}) == 1
+    assert first[1].read_bytes() == b"identical content"
+    assert not list(tmp_path.glob(".*.link.tmp"))
+    assert linker.link_groups(groups, "hardlink") == 0
+
+
+def test_changed_file_is_skipped(linker, tmp_path):
+    """A file whose size changed since the scan is not linked."""
+    source, target = write_copies(tmp_path, 2)
+    target.write_bytes(b"changed")
+
+    assert linker.link_file(source, target, "hardlink") == 0
+    assert target.read_bytes() == b"changed"
+    assert linker.logger.warnings
+
+
+def test_auto_falls_back_to_hardlink(linker, tmp_path):
+    """The auto mode links the file even where reflinks are not supported."""
+    source, target = write_copies(tmp_path, 2)
+
+    assert linker.link_file(source, target, "auto") == len(b"identical content")
+    assert target.read_bytes() == b"identical content"
+    assert any("hardlink" in msg or "reflink" in msg for msg in linker.logger.infos)
+
+
+def test_unknown_mode_raises(linker, tmp_path):
+    """An unknown mode is rejected before any file is touched."""
+    with pytest.raises(ValueError):
+        linker.link_groups([write_copies(tmp_path, 2)], "symlink")
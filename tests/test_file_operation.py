@@ -61,3 +61,15 @@ def test_move_files(tmp_path, settings):
     assert (dst / "video1.mp4").exists()
     assert (dst / "video2.avi").exists()
     assert not (dst / "image1.jpg").exists()
+
+def test_get_files_keeps_dotfiles_but_not_link_temps(tmp_path, settings):
+    src = tmp_path / "source"
+    src.mkdir()
+    (src / "image.jpg").write_text("fake_data")
+    (src / ".hidden.jpg").write_text("fake_data")
+    (src / ".image.jpg.link.tmp").write_text("fake_data")
+
+    operation = MoveOperation(settings=settings, src=str(src), dst=str(tmp_path / "dst"), pattern=(".jpg",))
+    files_for_task = operation.get_files(source_directory=operation.source_directory, pattern=operation.pattern)
+
+    assert sorted(file.name for file in files_for_task) == [".hidden.jpg", "image.jpg"]
@@ -15,6 +15,9 @@ class MockLogger:
     def info(self, msg: str):
         self.infos.append(msg)
 
+    def error(self, msg: str):
+        self.warnings.append(msg)
+
 class DummyRemover(FileRemoverMixin):
     def __init__(self):
         self.logger = MockLogger()
@@ -84,3 +87,16 @@ def test_remove_all_invalid_type(remover):
     """Test that _remove_all raises TypeError for invalid input."""
     with pytest.raises(TypeError, match="filepaths should be a list or a tuple or a Path"):
         remover.remove_all("not a path")
+
+
+def test_remove_streaming_deletes_every_batch(remover, tmp_path):
+    """Batches from a generator are deleted in the background and checked afterwards."""
+    files = [tmp_path / f"file{number}.txt" for number in range(6)]
+
+    for path in files:
+        path.write_text("x")
+
+    removed = remover.remove_streaming(files[start:start + 2] for start in range(0, 4, 2))
+
+    assert removed == files[:4]
+    assert remover.find_remaining(files) == files[4:]
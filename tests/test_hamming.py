@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from services.hamming import pack_bits, unpack_bits, popcount, hamming_distances, words_count, POPCOUNT_TABLE
+
+
+@pytest.mark.parametrize("n_bits, expected_words", [
+    (64, 1),
+    (100, 2),
+    (256, 4),
+    (1024, 16),
+])
+def test_pack_unpack_roundtrip(n_bits, expected_words):
+    """Packed hashes must restore to the same bits and use ceil(n_bits / 64) words."""
+    rng = np.random.default_rng(0)
+    bits = rng.random((5, n_bits)) > 0.5
+
+    packed = pack_bits(bits)
+
+    assert packed.dtype == np.uint64
+    assert packed.shape == (5, expected_words)
+    assert words_count(n_bits) == expected_words
+    assert np.array_equal(unpack_bits(packed, n_bits), bits)
+
+
+def test_popcount_matches_boolean_count():
+    """XOR + popcount must give the same distance as comparing boolean arrays."""
+    rng = np.random.default_rng(1)
+    bits = rng.random((20, 256)) > 0.5
+    query = bits[3]
+
+    expected = np.count_nonzero(bits != query, axis=1)
+    distances = hamming_distances(pack_bits(bits), pack_bits(query))
+
+    assert np.array_equal(distances, expected)
+
+
+def test_popcount_lookup_table():
+    """The fallback lookup table must count bits of every byte value."""
+    assert POPCOUNT_TABLE[0] == 0
+    assert POPCOUNT_TABLE[255] == 8
+    assert popcount(np.array([np.uint64(2**64 - 1)], dtype=np.uint64)) == 64
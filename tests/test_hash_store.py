@@ -0,0 +1,108 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from services.hamming import pack_bits
+from tools.cache import CacheIO
+from tools.comparer.img_comparer.hasher.hash_store import HashStore
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+from tools.comparer.img_comparer.img_comparer import ImageComparer
+from tools.comparer.img_comparer.index.linear_index import LinearIndex
+from tools.comparer.img_comparer.index.tiled_index import TiledIndex
+
+
+@pytest.fixture
+def hash_table():
+    rng = np.random.default_rng(0)
+    bits = rng.random((50, 256)) > 0.5
+    bits[10] = bits[3]
+    return HashTable(
+        [f"/data/{row}.jpg" for row in range(50)],
+        {"dhash_16": pack_bits(bits), "dhash_8": pack_bits(bits[:, :64])},
+        key="dhash_16"
+    )
+
+
+@pytest.fixture
+def store(settings, tmp_path):
+    cache_file = tmp_path / "cache.parquet"
+    cache_file.touch()
+    os.utime(cache_file, ns=(1, 1))
+    return HashStore(settings, CacheIO(settings), cache_file, "dhash_16")
+
+
+def test_load_moves_hashes_to_memmap(store, hash_table):
+    """The active column is served from the file and the row table keeps the row order."""
+    table = store.load(hash_table, keep=["dhash_8"])
+
+    assert isinstance(table.hashes.base, np.memmap)
+    assert np.array_equal(table.hashes, hash_table.hashes)
+    assert set(table.columns) == {"dhash_16", "dhash_8"}
+
+    restored = store.read(hash_table.words, keep=["dhash_8"])
+
+    assert isinstance(restored.hashes.base, np.memmap)
+    assert restored.paths.tolist() == hash_table.paths.tolist()
+    assert np.array_equal(restored.columns["dhash_8"], hash_table.columns["dhash_8"])
+    assert store.read(hash_table.words, keep=["phash_8"]) is None
+
+
+def test_fresh_store_skips_the_cache(settings, tmp_path, monkeypatch):
+    """A fresh store matching the files on disk is opened without loading the hash cache."""
+    monkeypatch.setattr(settings, "cache_file_path", tmp_path / "cache")
+    monkeypatch.setattr(settings, "out_of_core", True)
+    monkeypatch.setattr(settings, "n_jobs", 1)
+    rng = np.random.default_rng(0)
+    folder = tmp_path / "images"
+    folder.mkdir()
+    paths = tuple(folder / f"{row}.png" for row in range(3))
+
+    for path in paths:
+        cv2.imwrite(str(path), rng.integers(0, 256, (32, 32), dtype=np.uint8))
+
+    comparer = ImageComparer(settings)
+    first = comparer.load_hashes(paths)
+
+    with patch.object(comparer.method, "get_hashmap") as mock_get_hashmap:
+        second = comparer.load_hashes(paths)
+
+    mock_get_hashmap.assert_not_called()
+    assert isinstance(second.hashes.base, np.memmap)
+    assert second.paths.tolist() == first.paths.tolist()
+    assert np.array_equal(second.hashes, first.hashes)
+
+    cv2.imwrite(str(paths[0]), rng.integers(0, 256, (32, 32), dtype=np.uint8))
+    os.utime(paths[0], ns=(1, 1))
+
+    with patch.object(comparer.method, "get_hashmap", wraps=comparer.method.get_hashmap) as mock_get_hashmap:
+        comparer.load_hashes(paths)
+
+    mock_get_hashmap.assert_called_once()
+
+
+def test_fresh_store_is_reused(store, hash_table):
+    """The store is not rewritten while it is newer than the cache and has the same shape."""
+    store.load(hash_table)
+
+    with patch.object(store, "write") as mock_write:
+        store.load(hash_table)
+
+    mock_write.assert_not_called()
+    assert not store.is_fresh(len(hash_table) + 1, hash_table.words)
+
+
+def test_search_on_memmap_matches_in_memory(settings, store, hash_table):
+    """The tiled search streams the memory-mapped matrix with the same result."""
+    table = store.load(hash_table)
+    index = TiledIndex(settings)
+    index.MIN_TILE = 8
+    index.TILE_BYTES = 8 * 8 * 4 * 8
+
+    pairs = index.find_pairs(table.hashes, 0)
+    expected = LinearIndex(settings).find_pairs(hash_table.hashes, 0)
+
+    assert pairs.first.tolist() == expected.first.tolist() == [3]
+    assert pairs.second.tolist() == expected.second.tolist() == [10]
@@ -0,0 +1,77 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+from pathlib import Path
+
+from tools.cache import CacheIO
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(0)
+    paths = [f"/data/set {index // 3}/img_{index}.jpg" for index in range(10)]
+    hashes = rng.integers(0, 2**63, size=(10, 4), dtype=np.int64).astype(np.uint64)
+    return HashTable(paths, hashes, np.arange(10), np.arange(10) * 1000)
+
+
+def test_arrow_roundtrip(table):
+    """Paths, hashes and stats must survive the conversion to Arrow and back."""
+    arrow_table = table.to_arrow()
+    restored = HashTable.from_arrow(arrow_table)
+
+    assert pa.types.is_fixed_size_binary(arrow_table.schema.field(HashTable.HASH).type)
+    assert pa.types.is_dictionary(arrow_table.schema.field(HashTable.DIR).type)
+    assert restored.paths.tolist() == table.paths.tolist()
+    assert np.array_equal(restored.hashes, table.hashes)
+    assert np.array_equal(restored.sizes, table.sizes)
+    assert np.array_equal(restored.mtimes, table.mtimes)
+
+
+def test_relative_paths_roundtrip():
+    """Paths without a directory part must not get a leading separator."""
+    table = HashTable(["img.jpg"], np.array([[7]], dtype=np.uint64))
+
+    restored = HashTable.from_arrow(table.to_arrow())
+
+    assert restored.paths.tolist() == ["img.jpg"]
+
+
+def test_parquet_roundtrip(settings, table, tmp_path):
+    """Cache files must load straight into a contiguous hash matrix."""
+    cache_io = CacheIO(settings)
+    cache_file = tmp_path / "hashes.parquet"
+
+    cache_io.save(table.to_arrow(), cache_file)
+    restored = HashTable.from_arrow(cache_io.load_table(cache_file))
+
+    assert restored.hashes.flags["C_CONTIGUOUS"]
+    assert np.array_equal(restored.hashes, table.hashes)
+    assert restored.path_list([0])[0] == Path("/data/set 0/img_0.jpg")
+
+
+def test_take_and_concat(table):
+    """Row selection and joining must keep all columns aligned."""
+    joined = HashTable.concat([table.take([0, 1]), table.take(np.array([False] * 9 + [True]))])
+
+    assert len(joined) == 3
+    assert joined.paths[2] == table.paths[9]
+    assert np.array_equal(joined.hashes[2], table.hashes[9])
+    assert joined.sizes.tolist() == [0, 1, 9]
+
+
+def test_multiple_hash_columns(table, tmp_path):
+    """Every hash column is stored separately and any of them can be made active."""
+    extra = table.hashes[:, :1] + np.uint64(1)
+    multi = HashTable(table.paths, {"dhash_16": table.hashes, "phash_8": extra}, table.sizes, table.mtimes)
+
+    restored = HashTable.from_arrow(multi.to_arrow())
+    phash = restored.select(["phash_8"])
+
+    assert set(restored.columns) == {"dhash_16", "phash_8"}
+    assert phash.key == "phash_8"
+    assert np.array_equal(phash.hashes, extra)
+    assert list(HashTable.concat([restored, phash]).columns) == ["phash_8"]
+
+    with pytest.raises(KeyError):
+        restored.select(["whash_16"])
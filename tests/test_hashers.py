@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+import pytest
+
+from services.hamming import hamming_distances
+from tools.comparer.img_comparer.hasher.ahash import AHash
+from tools.comparer.img_comparer.hasher.dhash import DHash
+from tools.comparer.img_comparer.hasher.phash import PHash
+from tools.comparer.img_comparer.hasher.whash import WHash
+
+
+HASHERS = [DHash, PHash, AHash, WHash]
+
+
+@pytest.fixture
+def scene():
+    """A smooth random scene that survives resizing and compression."""
+    rng = np.random.default_rng(1)
+    return cv2.resize(rng.integers(0, 255, (12, 16), dtype=np.uint8), (640, 480), interpolation=cv2.INTER_CUBIC)
+
+
+@pytest.mark.parametrize("hasher", HASHERS)
+@pytest.mark.parametrize("core_size, words", [(8, 1), (16, 4)])
+def test_hash_image_shape(hasher, scene, core_size, words):
+    result = hasher.hash_image(scene, core_size)
+
+    assert result.dtype == np.uint64
+    assert result.shape == (words,)
+
+
+@pytest.mark.parametrize("hasher", HASHERS)
+def test_near_duplicates_are_close(hasher, scene, tmp_path):
+    """A recompressed and downscaled copy must stay within 10% of bits; another scene must not."""
+    original_path = tmp_path / "original.png"
+    copy_path = tmp_path / "copy.jpg"
+    other_path = tmp_path / "other.png"
+    cv2.imwrite(str(original_path), scene)
+    cv2.imwrite(str(copy_path), cv2.resize(scene, (320, 240)), [cv2.IMWRITE_JPEG_QUALITY, 30])
+    cv2.imwrite(str(other_path), np.ascontiguousarray(scene[::-1]))
+
+    original = hasher.compute_hash(original_path, 16)
+    copy = hasher.compute_hash(copy_path, 16)
+    other = hasher.compute_hash(other_path, 16)
+
+    assert hamming_distances(original[None, :], copy)[0] <= 25
+    assert hamming_distances(original[None, :], other)[0] > 25
+
+
+@pytest.mark.parametrize("hasher", HASHERS)
+def test_compute_hash_with_invalid_file(hasher, tmp_path):
+    not_an_image = tmp_path / "text.txt"
+    not_an_image.write_text("This is not a picture")
+
+    assert hasher.compute_hash(not_an_image, 8) is None
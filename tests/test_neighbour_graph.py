@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from services.hamming import pack_bits
+from tools.cache import CacheIO
+from tools.comparer.img_comparer.index.base_index import BaseIndex
+from tools.comparer.img_comparer.index.cascade_index import CascadeIndex
+from tools.comparer.img_comparer.index.linear_index import LinearIndex
+from tools.comparer.img_comparer.index.neighbour_graph import NeighbourGraph
+
+
+@pytest.fixture
+def matrix():
+    rng = np.random.default_rng(1)
+    bits = rng.random((60, 64)) > 0.5
+
+    for row in range(30, 60):
+        bits[row] = bits[row - 30]
+        bits[row, rng.choice(64, row % 12, replace=False)] ^= True
+
+    return pack_bits(bits)
+
+
+@pytest.fixture
+def graph(settings, tmp_path):
+    cache_file = tmp_path / "cache.parquet"
+    cache_file.touch()
+    return NeighbourGraph(settings, CacheIO(settings), cache_file, "dhash_8")
+
+
+def test_lower_threshold_is_answered_from_graph(settings, graph, matrix):
+    """Edges saved at the maximal distance reproduce the search at any lower threshold."""
+    graph.build(matrix, LinearIndex(settings), 10)
+
+    pairs = graph.load(len(matrix), 4)
+    expected = LinearIndex(settings).find_pairs(matrix, 4)
+
+    assert pairs.size > 0
+    assert sorted(zip(pairs.first.tolist(), pairs.second.tolist())) == \
+        sorted(zip(expected.first.tolist(), expected.second.tolist()))
+
+
+@pytest.mark.parametrize("rows, threshold", [(59, 4), (60, 11)])
+def test_graph_is_not_used_when_it_does_not_cover_the_search(settings, graph, matrix, rows, threshold):
+    graph.build(matrix, LinearIndex(settings), 10)
+
+    assert graph.load(rows, threshold) is None
+
+
+def test_graph_of_another_mode_is_rejected(settings, tmp_path, matrix):
+    """A graph built by a cascade or invariant search is not reused by another mode."""
+    cache_file = tmp_path / "cache.parquet"
+    cache_file.touch()
+    coarse = np.ascontiguousarray(matrix[:, :1])
+    cascade = CascadeIndex(settings, LinearIndex(settings), coarse, coarse_threshold=3)
+    mode = NeighbourGraph.mode_of(cascade)
+    NeighbourGraph(settings, CacheIO(settings), cache_file, "dhash_8", mode).build(matrix, cascade, 10)
+
+    assert mode == "cascade_3"
+    assert NeighbourGraph(settings, CacheIO(settings), cache_file, "dhash_8").load(len(matrix), 4) is None
+    assert NeighbourGraph(settings, CacheIO(settings), cache_file, "dhash_8", mode).load(len(matrix), 4) is not None
+
+
+def test_sweep_counts_match_separate_searches(settings, graph, matrix):
+    pairs = graph.build(matrix, LinearIndex(settings), 10)
+
+    counts = NeighbourGraph.sweep(pairs, len(matrix), range(11))
+
+    for threshold, count in counts.items():
+        expected = BaseIndex.resolve_duplicates(LinearIndex(settings).find_pairs(matrix, threshold), len(matrix))
+        assert count == len(expected)
+
+    assert counts[0] < counts[10]
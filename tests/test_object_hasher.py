@@ -0,0 +1,108 @@
+import json
+
+import cv2
+import numpy as np
+
+from tools.comparer.img_comparer.hasher.dhash import DHash
+from tools.comparer.img_comparer.hasher.object_hasher import ObjectHasher
+from tools.comparer.img_comparer.img_comparer import ImageComparer
+
+
+def write_voc(path, boxes):
+    objects = "".join(
+        f"<object><name>{name}</name><bndbox><xmin>{xmin}</xmin><ymin>{ymin}</ymin>"
+        f"<xmax>{xmax}</xmax><ymax>{ymax}</ymax></bndbox></object>"
+        for name, (xmin, ymin, xmax, ymax) in boxes
+    )
+    path.write_text(f"<annotation><size><width>160</width><height>120</height></size>{objects}</annotation>")
+
+
+def test_read_boxes_from_voc_and_yolo(tmp_path):
+    """VOC boxes are read as pixels (also a single object), YOLO boxes are scaled and clipped to the image."""
+    write_voc(tmp_path / "a.xml", [("cat", (10, 20, 50, 60))])
+    (tmp_path / "b.txt").write_text("3 0.5 0.5 0.25 0.5\n0 0.95 0.5 0.2 0.2\n")
+
+    labels, boxes = ObjectHasher.read_boxes(tmp_path / "a.xml", 160, 120)
+    assert labels == ["cat"]
+    assert boxes.tolist() == [[10, 20, 50, 60]]
+
+    labels, boxes = ObjectHasher.read_boxes(tmp_path / "b.txt", 160, 120)
+    assert labels == ["3", "0"]
+    assert boxes.tolist() == [[60, 30, 100, 90], [136, 48, 160, 72]]
+
+
+def test_pasted_object_is_matched_across_backgrounds(settings, tmp_path, monkeypatch):
+    """The same crop pasted into different backgrounds is reported as a pair of (image, box)."""
+    monkeypatch.setattr(settings, "report_path", tmp_path / "reports")
+    monkeypatch.setattr(settings, "n_jobs", 1)
+    rng = np.random.default_rng(0)
+    crop = cv2.resize(rng.integers(0, 256, (6, 6), dtype=np.uint8), (48, 48), interpolation=cv2.INTER_LINEAR)
+    other = cv2.resize(rng.integers(0, 256, (6, 6), dtype=np.uint8), (48, 48), interpolation=cv2.INTER_LINEAR)
+    folder = tmp_path / "images"
+    folder.mkdir()
+    paths = []
+
+    for name, (x, y), objects in (("first", (10, 20), [crop]), ("second", (90, 50), [crop, other])):
+        image = rng.integers(0, 256, (120, 160), dtype=np.uint8)
+        boxes = []
+
+        for offset, obj in enumerate(objects):
+            left = x if not offset else 10
+            top = y if not offset else 10
+            image[top:top + 48, left:left + 48] = obj
+            boxes.append((f"object_{offset}", (left, top, left + 48, top + 48)))
+
+        paths.append(folder / f"{name}.png")
+        cv2.imwrite(str(paths[-1]), image)
+        write_voc(folder / f"{name}.xml", boxes)
+
+    (folder / "plain.png").write_bytes((folder / "first.png").read_bytes())
+    paths.append(folder / "plain.png")
+
+    report = ImageComparer(settings).find_object_duplicates(tuple(paths))
+
+    assert report.num_rows == 1
+    row = report.to_pylist()[0]
+    assert (row["image"], row["duplicate_image"]) == (str(paths[0]), str(paths[1]))
+    assert [row[name] for name in ObjectHasher.BOX] == [10, 20, 58, 68]
+    assert [row[f"duplicate_{name}"] for name in ObjectHasher.BOX] == [90, 50, 138, 98]
+    assert row["distance"] == 0
+    assert json.loads((tmp_path / "reports" / "images_objects.json").read_text()) == [row]
+
+
+def test_small_objects_are_skipped(tmp_path):
+    """Crops below MIN_SIDE pixels are not hashed."""
+    image = np.random.default_rng(1).integers(0, 256, (120, 160), dtype=np.uint8)
+    cv2.imwrite(str(tmp_path / "a.png"), image)
+    write_voc(tmp_path / "a.xml", [("big", (0, 0, 40, 40)), ("small", (50, 50, 60, 90))])
+
+    labels, boxes, hashes = ObjectHasher.hash_crops(tmp_path / "a.png", tmp_path / "a.xml", DHash, 8)
+
+    assert labels == ["big"]
+    assert hashes.shape == (1, 1)
+
+
+def test_repeated_objects_in_one_image_are_not_reported(settings, tmp_path, monkeypatch):
+    """Two copies of an object in one frame match only the copy in the other image, not each other."""
+    monkeypatch.setattr(settings, "report_path", tmp_path / "reports")
+    monkeypatch.setattr(settings, "n_jobs", 1)
+    rng = np.random.default_rng(3)
+    crop = cv2.resize(rng.integers(0, 256, (6, 6), dtype=np.uint8), (48, 48), interpolation=cv2.INTER_LINEAR)
+    folder = tmp_path / "images"
+    folder.mkdir()
+    paths = []
+
+    for name, corners in (("repeated", [(10, 10), (90, 60)]), ("single", [(50, 30)])):
+        image = rng.integers(0, 256, (120, 160), dtype=np.uint8)
+
+        for left, top in corners:
+            image[top:top + 48, left:left + 48] = crop
+
+        paths.append(folder / f"{name}.png")
+        cv2.imwrite(str(paths[-1]), image)
+        write_voc(folder / f"{name}.xml", [("obj", (left, top, left + 48, top + 48)) for left, top in corners])
+
+    report = ImageComparer(settings).find_object_duplicates(tuple(paths)).to_pylist()
+
+    assert len(report) == 2
+    assert all((row["image"], row["duplicate_image"]) == (str(paths[0]), str(paths[1])) for row in report)
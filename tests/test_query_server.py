@@ -0,0 +1,97 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock
+
+import cv2
+import numpy as np
+import pytest
+
+from tools.comparer.img_comparer.hasher.dhash import DHash
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+from tools.comparer.img_comparer.query_server import QueryServer
+from tools.comparer.img_comparer.similarity_index import SimilarityIndex
+
+
+@pytest.fixture
+def hasher(settings):
+    hasher = DHash(settings=settings, cache_io=MagicMock())
+    hasher.hash_pyramid = ()
+    return hasher
+
+
+@pytest.fixture
+def index(settings, hasher):
+    """Four indexed hashes at distances 0, 1, 3 and 64 bits from zero."""
+    hashes = np.array([[0], [1], [7], [2 ** 64 - 1]], dtype=np.uint64)
+    table = HashTable([f"/data/{name}.jpg" for name in "abcd"], hashes, key=hasher.hash_column)
+    return SimilarityIndex(settings, hasher, table)
+
+
+def write_image(path, seed):
+    rng = np.random.default_rng(seed)
+    cv2.imwrite(str(path), cv2.resize(rng.integers(0, 256, (6, 8), dtype=np.uint8), (64, 48)))
+    return path
+
+
+def test_search_returns_top_k_and_threshold_matches(index):
+    """Top-k returns the nearest images, a threshold returns every image within it."""
+    query = np.zeros(1, dtype=np.uint64)
+
+    assert index.search(query, k=2) == [("/data/a.jpg", 0), ("/data/b.jpg", 1)]
+    assert index.search(query, threshold=3) == [("/data/a.jpg", 0), ("/data/b.jpg", 1), ("/data/c.jpg", 3)]
+    assert index.search(query, threshold=3, exclude=0) == [("/data/b.jpg", 1), ("/data/c.jpg", 3)]
+
+
+def test_insert_keeps_the_index_warm(index, tmp_path, monkeypatch):
+    """Inserted images grow the buffers, are found by later queries and replace their rows when inserted again."""
+    monkeypatch.setattr(index, "_matrix", index._matrix[:4])
+    monkeypatch.setattr(index, "_paths", index._paths[:4])
+    first, second = write_image(tmp_path / "first.png", 1), write_image(tmp_path / "second.png", 2)
+    copy = write_image(tmp_path / "copy.png", 1)
+
+    assert index.insert([first, second, tmp_path / "missing.png"]) == 2
+    assert len(index) == 6
+    # the query image itself is not reported, its copy is found at distance 0
+    assert index.query(first, threshold=0) == []
+    assert index.query(copy, k=1) == [(str(first.resolve()), 0)]
+
+    write_image(first, 2)
+    assert index.insert([first]) == 1
+    assert len(index) == 6
+    assert index.query(second, threshold=0) == [(str(first.resolve()), 0)]
+
+
+def test_server_answers_json_over_http(settings, index, tmp_path, monkeypatch):
+    """Status, insert and query requests are answered by a running server."""
+    monkeypatch.setattr(settings, "serve_port", 0)
+    server = QueryServer(settings, index).create_server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def post(route, payload):
+        request = urllib.request.Request(f"{url}{route}", data=json.dumps(payload).encode("utf-8"), method="POST")
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.loads(response.read())
+
+    try:
+        image = write_image(tmp_path / "new.png", 3)
+
+        with urllib.request.urlopen(f"{url}/status", timeout=10) as response:
+            assert json.loads(response.read()) == {"images": 4, "column": index.spec.column}
+
+        assert post("/insert", {"paths": [str(image)]}) == {"inserted": 1, "images": 5}
+        answer = post("/query", {"path": str(image), "threshold": 100})
+        distances = [match["distance"] for match in answer["matches"]]
+        assert {match["path"] for match in answer["matches"]} == {f"/data/{name}.jpg" for name in "abcd"}
+        assert distances == sorted(distances) and answer["elapsed_ms"] >= 0
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post("/query", {"path": str(tmp_path / "missing.png")})
+
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from services.hamming import pack_bits
+from tools.cache import CacheIO
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+from tools.comparer.img_comparer.hasher.reference_store import ReferenceStore
+from tools.comparer.img_comparer.index.tiled_index import TiledIndex
+
+
+def make_table(prefix: str, bits: np.ndarray) -> HashTable:
+    return HashTable([f"/{prefix}/{row}.jpg" for row in range(len(bits))], pack_bits(bits), key="dhash_8")
+
+
+@pytest.fixture
+def bits():
+    return np.random.default_rng(0).random((40, 64)) > 0.5
+
+
+@pytest.fixture
+def store(settings, tmp_path, monkeypatch, bits):
+    monkeypatch.setattr(settings, "cache_file_path", tmp_path)
+    cache_io = CacheIO(settings)
+    sources = [tmp_path / "train.parquet", tmp_path / "val.parquet"]
+    cache_io.save(make_table("train", bits[:20]).to_arrow(), sources[0])
+    cache_io.save(make_table("val", bits[20:30]).to_arrow(), sources[1])
+
+    for source in sources:
+        os.utime(source, ns=(1, 1))
+
+    return ReferenceStore(settings, cache_io, sources, "dhash_8")
+
+
+def test_store_merges_caches_and_is_reused(store):
+    """The merged store is built once and loaded from disk while the sources are unchanged."""
+    built = store.load()
+
+    with patch.object(store, "build") as mock_build:
+        loaded = store.load()
+
+    mock_build.assert_not_called()
+    assert len(built) == len(loaded) == 30
+    assert loaded.key == "dhash_8"
+
+
+def test_query_finds_near_duplicates_of_reference(settings, store, bits):
+    """Incoming images within the threshold of any reference image are reported."""
+    incoming_bits = bits[[2, 25, 35]].copy()
+    incoming_bits[0, :3] ^= True
+    incoming = make_table("incoming", incoming_bits)
+
+    rows = store.query(incoming, store.load(), TiledIndex(settings), 6)
+
+    assert rows.tolist() == [0, 1]
+
+
+def test_query_skips_reference_images_themselves(settings, store):
+    """A reference image is not a duplicate of itself when the folders overlap."""
+    reference = store.load()
+
+    assert store.query(reference, reference, TiledIndex(settings), 0).tolist() == []
+
+
+def test_missing_column_is_reported(settings, store):
+    store.column = "phash_16"
+
+    with pytest.raises(ValueError, match="phash_16"):
+        store.build()
+
+
+def test_missing_source_is_reported_instead_of_reused(store):
+    """A built store is stale once a source cache is deleted, so loading it raises a clear error."""
+    store.load()
+    store.sources[1].unlink()
+
+    assert not store.is_fresh()
+
+    with pytest.raises(FileNotFoundError, match="val.parquet"):
+        store.load()
+
+def test_folder_reference_uses_default_cache_name(settings, tmp_path):
+    folder = tmp_path / "curated"
+
+    assert ReferenceStore.source_file(settings, folder).name == CacheIO.generate_cache_filename(folder, None)
+    assert ReferenceStore.source_file(settings, tmp_path / "x.parquet") == tmp_path / "x.parquet"
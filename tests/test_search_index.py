@@ -0,0 +1,226 @@
+import cv2
+import numpy as np
+import pytest
+
+from services.hamming import pack_bits
+from tools.comparer.img_comparer.hasher.dhash import DHash
+from tools.comparer.img_comparer.img_comparer import ImageComparer
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+from tools.comparer.img_comparer.index.cascade_index import CascadeIndex
+from tools.comparer.img_comparer.index.invariant_index import InvariantIndex
+from tools.comparer.img_comparer.index.linear_index import LinearIndex
+from tools.comparer.img_comparer.index.mih_index import MultiIndexHashing
+from tools.comparer.img_comparer.index.temporal_index import TemporalIndex
+from tools.comparer.img_comparer.index.tiled_index import TiledIndex
+
+
+def make_matrix(n_unique: int = 300, n_bits: int = 256, seed: int = 0) -> np.ndarray:
+    """Creates random hashes with planted near-duplicates (1-6 flipped bits)."""
+    rng = np.random.default_rng(seed)
+    bits = rng.random((n_unique, n_bits)) > 0.5
+    copies = bits[rng.integers(0, n_unique, n_unique // 2)].copy()
+
+    for row in copies:
+        flips = rng.choice(n_bits, rng.integers(1, 7), replace=False)
+        row[flips] = ~row[flips]
+
+    all_bits = np.vstack([bits, copies])
+    return pack_bits(all_bits[rng.permutation(len(all_bits))])
+
+
+def as_set(pairs: HashPairs) -> set:
+    return set(zip(pairs.first.tolist(), pairs.second.tolist(), pairs.distance.tolist()))
+
+
+@pytest.mark.parametrize("n_bits, threshold", [
+    (64, 6),
+    (256, 25),
+    (256, 40),
+])
+def test_mih_matches_linear_search(settings, n_bits, threshold):
+    """Multi-index hashing must return exactly the pairs of the exhaustive search."""
+    matrix = make_matrix(n_bits=n_bits)
+
+    linear_pairs = LinearIndex(settings).find_pairs(matrix, threshold)
+    mih_pairs = MultiIndexHashing(settings).find_pairs(matrix, threshold)
+
+    assert linear_pairs.size > 0
+    assert as_set(mih_pairs) == as_set(linear_pairs)
+    assert np.all(linear_pairs.first < linear_pairs.second)
+
+
+def test_mih_skips_padding_substrings(settings):
+    """Substrings with the zero padding of the last word are not indexed, so not every row is a candidate."""
+    matrix = make_matrix(n_bits=100)
+    index = MultiIndexHashing(settings)
+    n_bits = index.used_bits(matrix)
+    keys = index._build_keys(matrix, n_bits)
+
+    assert n_bits == 100
+    assert keys.shape[1] == index.chunk_count(100) == 6
+    assert index.chunk_radius(n_bits, 13) == index.chunk_radius(100, 13) == 2
+
+    first, _ = index._candidates(keys, np.arange(len(matrix)), *index._prepare(keys, n_bits, 13))
+    assert len(first) < len(matrix) ** 2 // 10
+    assert as_set(index.find_pairs(matrix, 13)) == as_set(LinearIndex(settings).find_pairs(matrix, 13))
+
+
+def test_tiled_matches_linear_search(settings):
+    """Tiles must cover the whole upper triangle exactly once, even with a partial last tile."""
+    matrix = make_matrix(n_bits=256)
+    index = TiledIndex(settings)
+    index.MIN_TILE = 7
+    index.TILE_BYTES = 7 * 7 * 4 * 8
+
+    tiled_pairs = index.find_pairs(matrix, 25)
+    linear_pairs = LinearIndex(settings).find_pairs(matrix, 25)
+
+    assert index.tile_size(matrix.shape[1]) == 7
+    assert as_set(tiled_pairs) == as_set(linear_pairs)
+
+
+def test_resolve_duplicates_keeps_first_seen():
+    """A duplicate row must not mark its own matches as duplicates."""
+    # 0~1, 1~2, 0 !~ 2: only 1 is a duplicate, 2 stays because its only match (1) is removed
+    pairs = HashPairs(np.array([0, 1]), np.array([1, 2]), np.array([1, 1]))
+
+    result = BaseIndex.resolve_duplicates(pairs, 3)
+
+    assert result.tolist() == [1]
+
+
+def test_mih_auto_selection_rules():
+    """The index is efficient only for large sets and small per-substring radius."""
+    assert MultiIndexHashing.is_efficient(MultiIndexHashing.MIN_ITEMS, 256, 25)
+    assert not MultiIndexHashing.is_efficient(100, 256, 25)
+    assert not MultiIndexHashing.is_efficient(MultiIndexHashing.MIN_ITEMS, 64, 30)
+
+
+def test_cascade_confirms_coarse_candidates(settings):
+    """Coarse candidates are verified with full hashes and the stage counts are reported."""
+    matrix = make_matrix(n_bits=256)
+    # a bit subset never exceeds the full distance, so this coarse hash keeps full recall
+    coarse = np.ascontiguousarray(matrix[:, :1])
+    index = CascadeIndex(settings, LinearIndex(settings), coarse, coarse_threshold=25)
+
+    cascade_pairs = index.find_pairs(matrix, 25)
+    linear_pairs = LinearIndex(settings).find_pairs(matrix, 25)
+
+    assert as_set(cascade_pairs) == as_set(linear_pairs)
+    assert index.survivors["all"] == len(matrix) * (len(matrix) - 1) // 2
+    assert index.survivors["all"] > index.survivors["coarse"] >= index.survivors["full"] == linear_pairs.size
+
+
+def test_cascade_streams_through_the_coarse_filter(settings):
+    """Streamed bands are confirmed coarse candidates, so they match the cascade search and not a full scan."""
+    matrix = make_matrix(n_bits=256)
+    coarse = np.ascontiguousarray(matrix[:, :1])
+    index = CascadeIndex(settings, TiledIndex(settings), coarse, coarse_threshold=2)
+
+    streamed = HashPairs.concat(pairs for _, _, pairs in index.iter_band_pairs(matrix, 25, 37))
+    cascade_pairs = index.find_pairs(matrix, 25)
+
+    assert as_set(streamed) == as_set(cascade_pairs)
+    assert 0 < cascade_pairs.size < LinearIndex(settings).find_pairs(matrix, 25).size
+
+
+def test_cascade_loose_threshold():
+    assert CascadeIndex.loose_threshold(102, 1024, 2.0) == 13
+    assert CascadeIndex.loose_threshold(1024, 1024, 2.0) == 64
+
+
+@pytest.mark.parametrize("index_class", [LinearIndex, TiledIndex, MultiIndexHashing])
+def test_cross_search_matches_brute_force(settings, index_class):
+    """Every index must find the same query-to-matrix pairs as the full distance table."""
+    matrix = make_matrix(n_bits=256)
+    queries, stored = matrix[:100], matrix[100:]
+    index = index_class(settings)
+    index.CROSS_TILE_BYTES = 9 * 9 * 4 * 8
+
+    pairs = index.find_cross_pairs(queries, stored, 25)
+    distances = np.unpackbits((queries[:, None, :] ^ stored[None, :, :]).view(np.uint8), axis=-1).sum(axis=-1)
+    first, second = np.nonzero(distances <= 25)
+
+    assert pairs.size > 0
+    assert as_set(pairs) == set(zip(first.tolist(), second.tolist(), distances[first, second].tolist()))
+
+
+@pytest.mark.parametrize("index_class", [LinearIndex, TiledIndex, MultiIndexHashing])
+def test_streamed_duplicates_match_full_resolution(settings, index_class):
+    """Bands resolved one by one give the same duplicates as the full first-seen rule."""
+    matrix = make_matrix(n_bits=256)
+    index = index_class(settings)
+
+    batches = list(index.iter_duplicates(matrix, 25, batch_rows=37))
+    expected = BaseIndex.resolve_duplicates(LinearIndex(settings).find_pairs(matrix, 25), len(matrix))
+
+    assert len(batches) == -(-len(matrix) // 37)
+    assert all(np.all((batch >= 37 * number) & (batch < 37 * (number + 1))) for number, batch in enumerate(batches))
+    assert np.concatenate(batches).tolist() == expected.tolist()
+
+
+def test_invariant_search_finds_flipped_and_rotated_copies(settings):
+    """Transformed copies match only through the dihedral hashes, ordinary pairs are kept."""
+    rng = np.random.default_rng(5)
+    images = [cv2.resize(rng.integers(0, 256, (12, 16), dtype=np.uint8), (160, 120)) for _ in range(20)]
+    images += [np.fliplr(images[0]), np.rot90(images[1]), np.flipud(images[2]), images[3] // 2 + 40]
+    hashes = np.vstack([DHash.hash_image(np.ascontiguousarray(image), 16) for image in images])
+    variants = np.vstack([DHash.hash_dihedral(image, 16) for image in images])
+
+    plain = LinearIndex(settings).find_pairs(hashes, 20)
+    index = InvariantIndex(settings, LinearIndex(settings), variants)
+    pairs = index.find_pairs(hashes, 20)
+    streamed = np.concatenate(list(index.iter_duplicates(hashes, 20, batch_rows=5)))
+
+    assert set(zip(plain.first.tolist(), plain.second.tolist())) == {(3, 23)}
+    assert set(zip(pairs.first.tolist(), pairs.second.tolist())) == {(0, 20), (1, 21), (2, 22), (3, 23)}
+    assert np.all(pairs.distance <= 20)
+    assert streamed.tolist() == BaseIndex.resolve_duplicates(pairs, len(hashes)).tolist() == [20, 21, 22, 23]
+
+
+def test_invariant_search_keeps_finding_identical_copies(settings, tmp_path, monkeypatch):
+    """Pixel-identical copies match at threshold 0 in the invariant mode, like in the plain search."""
+    monkeypatch.setattr(settings, "cache_file_path", tmp_path / "cache")
+    monkeypatch.setattr(settings, "n_jobs", 1)
+    monkeypatch.setattr(settings, "core_size", 16)
+    monkeypatch.setattr(settings, "hash_threshold", 0)
+    monkeypatch.setattr(settings, "exact_prefilter", False)
+    rng = np.random.default_rng(11)
+    folder = tmp_path / "images"
+    folder.mkdir()
+    paths = []
+
+    for row in range(20):
+        image = cv2.resize(rng.integers(0, 256, (9, 13), dtype=np.uint8), (157, 113), interpolation=cv2.INTER_LINEAR)
+
+        for copy in ("a", "b"):
+            paths.append(folder / f"{row:02d}_{copy}.png")
+            cv2.imwrite(str(paths[-1]), image)
+
+    plain = ImageComparer(settings).compare(tuple(paths))
+    monkeypatch.setattr(settings, "invariant", True)
+    invariant = ImageComparer(settings).compare(tuple(paths))
+
+    assert sorted(plain) == sorted(invariant) == paths[1::2]
+
+
+def test_temporal_frames_are_parsed_per_video():
+    videos, frames = TemporalIndex.parse_frames(["/a/cam_1_10.jpg", "/a/cam_1_2.jpg", "/b/cam_1_3.jpg", "/a/photo.png"])
+
+    assert frames.tolist() == [10, 2, 3, 0]
+    assert videos[0] == videos[1]
+    assert len({videos[0], videos[2], videos[3]}) == 3
+
+
+def test_temporal_search_compares_only_window_of_same_video(settings):
+    """Frames match only their previous 'window' frames of the same video, resolved in frame order."""
+    paths = ["/v/a_3.jpg", "/v/a_1.jpg", "/v/a_2.jpg", "/v/a_9.jpg", "/v/b_1.jpg"]
+    matrix = np.zeros((5, 1), dtype=np.uint64)
+    index = TemporalIndex(settings, paths, window=1)
+
+    pairs = index.find_pairs(matrix, 0)
+
+    # a_1~a_2, a_2~a_3, a_3~a_9 (neighbours in frame order); b_1 is another video
+    assert as_set(pairs) == {(1, 2, 0), (0, 2, 0), (0, 3, 0)}
+    # frame order: a_1 keeps, a_2 is a duplicate, a_3 stays (its only earlier match is removed), a_9 is a duplicate
+    assert index.resolve_duplicates(pairs, 5).tolist() == [2, 3]
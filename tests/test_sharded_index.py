@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pytest
+
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+from tools.comparer.img_comparer.index.linear_index import LinearIndex
+from tools.comparer.img_comparer.index.sharded_index import ShardedIndex
+
+
+@pytest.fixture
+def matrix():
+    """Random 64-bit hashes with near copies of the first rows (1-6 flipped bits)."""
+    rng = np.random.default_rng(7)
+    base = rng.integers(0, 2 ** 63, size=(300, 1), dtype=np.uint64)
+    flips = np.array([sum(1 << int(bit) for bit in rng.choice(64, row % 6 + 1, replace=False)) for row in range(60)])
+    return np.vstack([base, base[:60] ^ flips.astype(np.uint64)[:, None]])
+
+
+def as_set(pairs):
+    return set(zip(pairs.first.tolist(), pairs.second.tolist()))
+
+
+def test_shards_together_match_the_exhaustive_search(settings, tmp_path, matrix):
+    """Every pair is found by some shard and no shard finds pairs above the threshold."""
+    index = ShardedIndex(settings, tmp_path, shards=5)
+    expected = LinearIndex(settings).find_pairs(matrix, 6)
+    found = [as_set(index.find_shard_pairs(matrix, 6, shard)) for shard in range(5)]
+
+    assert set().union(*found) == as_set(expected)
+    assert sum(len(pairs) for pairs in found) >= len(expected.first)
+
+
+@pytest.mark.parametrize("shards", [3, 4, 11])
+def test_every_probe_is_made_by_one_shard(settings, tmp_path, matrix, shards):
+    """The units of all shards cover every (substring, row) once, with fewer or more shards than substrings."""
+    index = ShardedIndex(settings, tmp_path, shards=shards)
+    probed = []
+    candidates = index._candidates
+
+    def record(query_keys, batch_rows, *table):
+        probed.extend(zip(query_keys[batch_rows, 0].tolist(), batch_rows.tolist()))
+        return candidates(query_keys, batch_rows, *table)
+
+    index._candidates = record
+    found = [as_set(index.find_shard_pairs(matrix, 6, shard)) for shard in range(shards)]
+    keys = index._build_keys(matrix, index.used_bits(matrix))
+
+    assert sorted(probed) == sorted((int(key), row) for row, row_keys in enumerate(keys) for key in row_keys)
+    assert set().union(*found) == as_set(LinearIndex(settings).find_pairs(matrix, 6))
+
+
+def search_node(settings, shard_dir, hash_table, results):
+    """Runs the search of one node and reports its claims and merged pairs."""
+    index = ShardedIndex(settings, shard_dir, shards=8)
+    published = index.publish(hash_table)
+    processed = index.run(published.hashes, 6)
+    pairs = index.merge(len(published))
+    results.put((processed, None if pairs is None else sorted(as_set(pairs))))
+
+
+def test_processes_share_the_search_through_a_directory(settings, tmp_path, matrix, monkeypatch):
+    """Processes standing in for nodes split the shards and exactly one of them merges the pairs."""
+    monkeypatch.setattr(ShardedIndex, "POLL_INTERVAL", 0.05)
+    hash_table = HashTable([f"img_{row}.jpg" for row in range(len(matrix))], matrix)
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    nodes = [context.Process(target=search_node, args=(settings, tmp_path, hash_table, results)) for _ in range(3)]
+
+    for node in nodes:
+        node.start()
+
+    reports = [results.get(timeout=60) for _ in nodes]
+
+    for node in nodes:
+        node.join()
+
+    merged = [pairs for _, pairs in reports if pairs is not None]
+    assert sum(processed for processed, _ in reports) == 8
+    assert len(merged) == 1
+    assert merged[0] == sorted(as_set(LinearIndex(settings).find_pairs(matrix, 6)))
+
+
+def test_node_with_other_files_is_rejected(settings, tmp_path, matrix):
+    """A node with other files stops, even with as many; the same files in another order adopt the published rows."""
+    index = ShardedIndex(settings, tmp_path, shards=4)
+    index.publish(HashTable([f"img_{row}.jpg" for row in range(len(matrix))], matrix))
+
+    with pytest.raises(ValueError, match="same files"):
+        index.publish(HashTable([f"img_{row}.jpg" for row in range(10)], matrix[:10]))
+
+    with pytest.raises(ValueError, match="same files"):
+        index.publish(HashTable([f"other_{row}.jpg" for row in range(len(matrix))], matrix))
+
+    shuffled = np.random.default_rng(0).permutation(len(matrix))
+    published = index.publish(HashTable([f"img_{row}.jpg" for row in shuffled], matrix[shuffled]))
+
+    assert published.paths[:3].tolist() == ["img_0.jpg", "img_1.jpg", "img_2.jpg"]
+
+
+def test_stale_claims_are_taken_over_by_the_merging_node(settings, tmp_path, matrix, monkeypatch):
+    """A shard claimed by a dead node is processed once its claim is older than the timeout."""
+    monkeypatch.setattr(settings, "shard_timeout", 60.0)
+    monkeypatch.setattr(ShardedIndex, "POLL_INTERVAL", 0.01)
+    index = ShardedIndex(settings, tmp_path, shards=4)
+    claims = [tmp_path / ShardedIndex.CLAIMS_DIR / ShardedIndex.SHARD_NAME.format(shard) for shard in (0, 1)]
+
+    for claim in claims:
+        claim.write_text("dead-node:1")
+
+    os.utime(claims[0], (time.time() - 120, time.time() - 120))
+
+    assert index.run(matrix, 6) == 3
+    assert not index.pairs_file(1).exists()
+
+    os.utime(claims[1], (time.time() - 120, time.time() - 120))
+    pairs = index.merge(len(matrix), matrix, 6)
+
+    assert as_set(pairs) == as_set(LinearIndex(settings).find_pairs(matrix, 6))
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+
+from tools.comparer.img_comparer.hasher.dhash import DHash
+from tools.comparer.video_comparer.video_comparer import VideoComparer
+
+
+def write_video(path, scenes, fps=10, size=(64, 48), frames_per_scene=10):
+    """Writes a video of random scenes; the same seeds give the same content at any fps and size."""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+
+    for seed in scenes:
+        scene = np.random.default_rng(seed).integers(0, 256, (6, 8, 3), dtype=np.uint8)
+        frame = cv2.resize(scene, size, interpolation=cv2.INTER_LINEAR)
+
+        for _ in range(frames_per_scene * fps // 10):
+            writer.write(frame)
+
+    writer.release()
+    return path
+
+
+def test_fingerprint_samples_frames_and_duration(tmp_path):
+    """The fingerprint holds one hash per sampled frame, the duration and the fps."""
+    video = write_video(tmp_path / "a.avi", range(8), frames_per_scene=20)
+    fingerprint = VideoComparer.fingerprint(video, DHash, 8)
+
+    assert fingerprint.hashes.shape == (VideoComparer.FRAME_COUNT,)
+    assert fingerprint.duration == 16.0
+    assert fingerprint.fps == 10.0
+    assert VideoComparer.fingerprint(tmp_path / "missing.avi", DHash, 8) is None
+
+
+def test_transcoded_video_is_a_duplicate(settings, tmp_path, monkeypatch):
+    """A copy with another fps and resolution is found; other content and a longer cut of the same scenes are kept."""
+    monkeypatch.setattr(settings, "n_jobs", 1)
+    original = write_video(tmp_path / "original.avi", range(8))
+    transcode = write_video(tmp_path / "transcode.avi", range(8), fps=20, size=(96, 72))
+    other = write_video(tmp_path / "other.avi", range(100, 108))
+    longer = write_video(tmp_path / "longer.avi", range(8), frames_per_scene=20)
+    broken = tmp_path / "broken.avi"
+    broken.write_bytes(b"not a video")
+
+    duplicates = VideoComparer(settings).compare((original, other, transcode, longer, broken))
+
+    assert duplicates == [transcode]
@@ -1,8 +1,9 @@
 import hashlib
 from pathlib import Path
-from typing import Dict, Optional, Union, Any
-import numpy as np
+from typing import Optional, Union, Any
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from const_utils.default_values import AppSettings
 from logger.logger import LoggerConfigurator
@@ -13,9 +14,10 @@ class CacheIO:
     """
     Handles high-performance data persistence using Apache Parquet.
 
-    This class provides methods to save and load complex data structures like
-    image hash maps or pandas DataFrames. It optimizes I/O performance
-    and ensures data integrity across different operations.
+    This class provides methods to save and load pandas DataFrames and
+    Arrow tables. It optimizes I/O performance and ensures data integrity
+    across different operations. It does not know the layout of the stored
+    data: hash caches are converted by 'HashTable.to_arrow' before saving.
 
     Attributes:
         SUFFIX (str): The standard file extension for cache files (.parquet).
@@ -65,44 +67,66 @@ class CacheIO:
             return pd.DataFrame()
 
 
-    def save(self: LoggerProtocol, data_map: Union[Dict[Path, np.ndarray], pd.DataFrame], cache_file: Path) -> None:
+    def load_table(self: LoggerProtocol, cache_file: Path) -> Optional[pa.Table]:
         """
-        Saves a dictionary of hashes or a pandas DataFrame to a parquet file.
+        Loads a parquet cache file as an Arrow table without converting it to pandas.
+
+        This is the fast path for hash caches: fixed-size binary columns are
+        kept as contiguous buffers and can be viewed as NumPy matrices.
+
+        Args:
+            cache_file (Path): The path to the .parquet file.
+
+        Returns:
+            Optional[pa.Table]: The loaded data or None if the file is missing or corrupted.
+        """
+        if not cache_file.exists():
+            self.logger.warning(f"Cache file {cache_file} does not exist")
+            return None
+
+        try:
+            self.logger.info(f"Loading cache file {cache_file}")
+            return pq.read_table(cache_file)
+        except Exception as e:
+            self.logger.error(f"Cache file {cache_file.name} is corrupted: {e}. Deleting.")
+            cache_file.unlink(missing_ok=True)
+            return None
+
+
+    def save(self: LoggerProtocol, data_map: Union[pd.DataFrame, pa.Table], cache_file: Path) -> None:
+        """
+        Saves a pandas DataFrame or an Arrow table to a parquet file.
 
         Args:
-            data_map (Union[Dict[Path, np.ndarray], pd.DataFrame]): Data to store.
+            data_map (Union[pd.DataFrame, pa.Table]): Data to store.
             cache_file (Path): Target path for the cache file.
 
         Raises:
-            TypeError: If the data_map is not a dictionary or a DataFrame.
+            TypeError: If the data_map is not a DataFrame or an Arrow table.
         """
         empty_msg = "data_map is empty, skipping saving cache data"
 
-        if isinstance(data_map, dict):
-            if not data_map:
+        if isinstance(data_map, pd.DataFrame):
+            if data_map.empty:
                 self.logger.warning(empty_msg)
                 return
-            data = [
-                {'path': str(p), 'hash': h.tolist()}
-                for p, h in data_map.items()
-            ]
-            df = pd.DataFrame(data)
+            table = pa.Table.from_pandas(data_map, preserve_index=False)
 
-        elif isinstance(data_map, pd.DataFrame):
-            if data_map.empty:
+        elif isinstance(data_map, pa.Table):
+            if data_map.num_rows == 0:
                 self.logger.warning(empty_msg)
                 return
-            df = data_map
+            table = data_map
         else:
-            msg = f"data_map must be either a dictionary or a DataFrame, got {type(data_map)}"
+            msg = f"data_map must be either a DataFrame or an Arrow table, got {type(data_map)}"
             self.logger.warning(msg)
             raise TypeError(msg)
 
         cache_file.parent.mkdir(parents=True, exist_ok=True)
-        self.logger.info(f"Saving {len(data_map)} hashes to {cache_file.name}")
+        self.logger.info(f"Saving {table.num_rows} records to {cache_file.name}")
 
         try:
-            df.to_parquet(cache_file, engine="pyarrow", compression="snappy", index=False)
+            pq.write_table(table, cache_file, compression="snappy")
             self.logger.info(f"Cache saved successfully to {cache_file}.")
         except Exception as e:
             self.logger.error(f"Critical error saving cache: {e}")
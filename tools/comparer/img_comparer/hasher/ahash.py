@@ -0,0 +1,34 @@
+import cv2
+import numpy as np
+
+from const_utils.copmarer import Constants
+from services.hamming import pack_bits
+from tools.comparer.img_comparer.hasher.base_hasher import BaseHasher
+
+
+class AHash(BaseHasher):
+    """
+    Implementation of the aHash (Average Hashing) algorithm.
+
+    The image is shrunk to a core_size x core_size grid and every bit shows
+    whether a cell is brighter than the mean brightness. It is the cheapest
+    hash and is robust to scaling and compression, but more sensitive to
+    global brightness and contrast changes than dHash or pHash.
+    """
+    HASH_TYPE: str = Constants.ahash
+
+    @staticmethod
+    def hash_image(image: np.ndarray, core_size: int) -> np.ndarray:
+        """
+        Calculates the aHash of a decoded grayscale image.
+
+        Args:
+            image (np.ndarray): A 2D uint8 grayscale image.
+            core_size (int): The grid size. The hash length is core_size squared.
+
+        Returns:
+            np.ndarray: A 1D NumPy array of ceil(core_size^2 / 64) uint64
+                words representing the packed hash.
+        """
+        resized_image = cv2.resize(image, (core_size, core_size), interpolation=cv2.INTER_AREA)
+        return pack_bits((resized_image > resized_image.mean()).flatten())
@@ -1,16 +1,58 @@
 import multiprocessing
+import os
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Union, Tuple, Dict, List, Set, Optional
-from concurrent.futures import ProcessPoolExecutor
+from typing import Union, Tuple, Dict, List, Optional, NamedTuple, Type
 from functools import partial
 
+import cv2
 import numpy as np
 import pandas as pd
 
 from const_utils.default_values import AppSettings
+from services.hamming import WORD_DTYPE, popcount
 from logger.logger import LoggerConfigurator
 from tools.cache import CacheIO
+from tools.comparer.img_comparer.hasher.exact_duplicates import ExactDuplicateFinder
+from tools.comparer.img_comparer.hasher.exif_thumbnail import ExifThumbnail
+from tools.comparer.img_comparer.hasher.hash_checkpoint import HashCheckpoint
+from tools.comparer.img_comparer.hasher.hash_table import HashBatch, HashTable
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+from tools.comparer.img_comparer.index.linear_index import LinearIndex
+
+
+FileStat = Tuple[int, int]
+
+
+class HashSpec(NamedTuple):
+    """
+    One hash to compute from a decoded image.
+
+    Attributes:
+        column (str): The hash column name in the cache (e.g., 'dhash_16').
+        hasher (type): The 'BaseHasher' subclass that computes the hash.
+        core_size (int): The hash grid size.
+        dihedral (bool): If True, the hashes of the 8 flips and 90-degree
+            rotations of the image are stored in one row (see 'hash_dihedral').
+    """
+    column: str
+    hasher: type
+    core_size: int
+    dihedral: bool = False
+
+
+class DecodedImage(NamedTuple):
+    """
+    A grayscale image prepared for hashing.
+
+    Attributes:
+        image (Optional[np.ndarray]): A 2D uint8 image, or None if the file cannot be read.
+        scale (int): The reduction of the decode (1 for a full decode, 0 if unknown).
+        source (int): Where the pixels come from ('BaseHasher.SOURCE_DECODE' or 'SOURCE_THUMBNAIL').
+    """
+    image: Optional[np.ndarray]
+    scale: int
+    source: int
 
 
 class BaseHasher(ABC):
@@ -19,17 +61,72 @@ class BaseHasher(ABC):
 
     This class provides the core logic for generating image hashes in parallel,
     managing incremental caching, and performing fast duplicate detection using
-    vectorized NumPy operations.
+    vectorized NumPy operations. Hashes are stored bit-packed into uint64
+    words, so the Hamming distance is computed as XOR plus popcount. Results
+    are streamed from the worker pool and checkpointed to disk, so an
+    interrupted run resumes where it stopped.
+
+    Subclasses only implement 'hash_image'. Every image is decoded once and
+    all requested algorithms (this hasher and its 'companions') are computed
+    from the same grayscale image at every core size of the hash pyramid.
+    They are cached as separate columns of one Parquet file per folder, so
+    switching the algorithm or the core size needs no new decoding pass.
+    Byte-identical files are found before decoding (see 'hash_files'), so
+    only one file per group is decoded and the copies get its hashes. If
+    'measure_quality' is on, the sharpness and the original resolution of
+    every image are measured from the same decode and cached as metrics.
+    In the 'invariant' mode the hashes of all flips and 90-degree rotations
+    are added as one more column, derived from a single small resize.
+    In the 'exif_thumbnail' mode JPEG files are hashed from their embedded
+    EXIF thumbnail when it is large enough; the source of every row is
+    cached, so such rows are hashed again once the mode is off.
 
     Attributes:
+        HASH_TYPE (str): The name of the hashing algorithm implemented by a subclass.
+        JPEG_SUFFIXES (Tuple[str, ...]): Extensions decoded with DCT scaling in 'reduced_decode' mode.
+        REDUCED_MARGIN (int): How many times the decoded image must be larger
+            than the hash grid in the reduced decode mode.
+        THUMBNAIL_MARGIN (int): The same for EXIF thumbnails, which are small
+            but free to read, so a smaller margin is accepted.
+        QUALITY_SIZE (int): Side of the square the image is resized to before measuring sharpness.
+        DIHEDRAL_FACTOR (int): How many times the square used for the dihedral
+            hashes is larger than the hash grid.
+        DIHEDRAL_SUFFIX (str): Suffix of the column with the dihedral hashes.
+        SOURCE_DECODE (int): Source code of hashes computed from a (full or reduced) decode.
+        SOURCE_THUMBNAIL (int): Source code of hashes computed from the EXIF thumbnail.
         settings (AppSettings): Global configuration for paths and parameters.
         logger (logging.Logger): Logger instance for hashing operations.
         hash_type (str): The name of the hashing algorithm (e.g., 'dhash').
+        companions (Tuple[Type[BaseHasher], ...]): Other algorithms computed
+            from the same decode and stored in the same cache file.
+        hash_pyramid (Tuple[int, ...]): Extra core sizes computed from the same decode.
         core_size (int): The resolution used for image resizing.
         threshold (int): The distance threshold in bits for duplicate detection.
         cache_io (CacheIO): Tool for saving and loading hash data from disk.
         n_jobs (int): Number of parallel processes for hash computation.
+        chunksize (int): Number of images sent to a worker process at once.
+        reduced_decode (bool): If True, JPEG files are decoded at a reduced
+            resolution (see 'load_grayscale').
+        measure_quality (bool): If True, quality metrics are computed with the hashes.
+        invariant (bool): If True, the dihedral hashes of the searched column are computed too.
+        exif_thumbnail (bool): If True, JPEG files are hashed from their EXIF thumbnails when possible.
+        exif_confirm (bool): If True, matches involving thumbnail hashes are
+            confirmed with hashes of a regular decode (see 'confirm_pairs').
+        exact_finder (Optional[ExactDuplicateFinder]): Groups byte-identical
+            files before hashing. None if 'exact_prefilter' is off.
+        index (Optional[BaseIndex]): Search strategy used by 'find_duplicates'.
+            If None, the exhaustive 'LinearIndex' is used.
     """
+    HASH_TYPE: str = ""
+    JPEG_SUFFIXES: Tuple[str, ...] = (".jpg", ".jpeg", ".jpe", ".jfif")
+    REDUCED_MARGIN: int = 4
+    THUMBNAIL_MARGIN: int = 2
+    QUALITY_SIZE: int = 256
+    DIHEDRAL_FACTOR: int = 4
+    DIHEDRAL_SUFFIX: str = "_dihedral"
+    SOURCE_DECODE: int = 0
+    SOURCE_THUMBNAIL: int = 1
+
     def __init__(
         self,
         settings: AppSettings,
@@ -50,163 +147,696 @@ class BaseHasher(ABC):
             log_level=self.settings.log_level
         )
 
-        self.hash_type = self.settings.method
+        self.hash_type = self.HASH_TYPE
+        self.companions: Tuple[Type["BaseHasher"], ...] = ()
+        self.hash_pyramid = self.settings.hash_pyramid
         self.core_size = self.settings.core_size
         self.threshold = self.settings.hash_threshold
         self.cache_io = cache_io or CacheIO(self.settings)
         self.n_jobs = self.settings.n_jobs
+        self.chunksize = self.settings.hash_chunksize
+        self.reduced_decode = self.settings.reduced_decode
+        self.measure_quality = self.settings.keep_best
+        self.invariant = self.settings.invariant
+        self.exif_thumbnail = self.settings.exif_thumbnail
+        self.exif_confirm = self.settings.exif_confirm
+        self.exact_finder = ExactDuplicateFinder(self.settings) if self.settings.exact_prefilter else None
+        self.index: Optional[BaseIndex] = None
 
 
     @staticmethod
     @abstractmethod
-    def compute_hash(image_path: Path, core_size: int) -> np.ndarray:
+    def hash_image(image: np.ndarray, core_size: int) -> np.ndarray:
         """
-        Abstract method to calculate a hash for a single image.
+        Abstract method to calculate a hash of a decoded grayscale image.
 
         Args:
-            image_path (Path): Path to the image file.
+            image (np.ndarray): A 2D uint8 grayscale image.
             core_size (int): Resolution for resizing before hashing.
 
         Returns:
-            np.ndarray: A 1D boolean array representing the image hash.
+            np.ndarray: A 1D array of packed uint64 words representing the image hash.
         """
         pass
 
 
+    @classmethod
+    def compute_hash(cls, image_path: Path, core_size: int, reduced_decode: bool = False) -> Optional[np.ndarray]:
+        """
+        Calculates the hash for a single image file.
+
+        Args:
+            image_path (Path): Path to the image file.
+            core_size (int): Resolution for resizing before hashing.
+            reduced_decode (bool): If True, the image may be decoded at a reduced resolution.
+
+        Returns:
+            Optional[np.ndarray]: A 1D array of packed uint64 words, or None
+                if the image file is invalid or cannot be read.
+        """
+        image = cls.load_grayscale(image_path, core_size, reduced_decode)
+
+        if image is None:
+            return None
+
+        return cls.hash_image(image, core_size)
+
+
+    @classmethod
+    def compute_hashes(
+            cls,
+            image_path: Path,
+            specs: Tuple[HashSpec, ...],
+            reduced_decode: bool = False,
+            measure_quality: bool = False,
+            exif_thumbnail: bool = False
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Decodes an image once and calculates all requested hashes from it.
+
+        Args:
+            image_path (Path): Path to the image file.
+            specs (Tuple[HashSpec, ...]): Hashes to calculate.
+            reduced_decode (bool): If True, the image may be decoded at a reduced resolution.
+            measure_quality (bool): If True, quality metrics (see 'quality_metrics')
+                are added to the result.
+            exif_thumbnail (bool): If True, the EXIF thumbnail may be hashed instead
+                of the decoded image, and the source is added to the result. Not
+                used together with 'measure_quality', which needs the real pixels.
+
+        Returns:
+            Optional[Dict[str, np.ndarray]]: Packed hashes by column name, or
+                None if the image file is invalid or cannot be read.
+        """
+        core_size = max(spec.core_size for spec in specs)
+        image, scale, source = cls.decode(image_path, core_size, reduced_decode, exif_thumbnail and not measure_quality)
+
+        if image is None:
+            return None
+
+        hashes = {
+            spec.column: spec.hasher.hash_dihedral(image, spec.core_size)
+            if spec.dihedral else spec.hasher.hash_image(image, spec.core_size)
+            for spec in specs
+        }
+
+        if measure_quality:
+            hashes.update(cls.quality_metrics(image, scale))
+
+        if exif_thumbnail:
+            hashes[HashTable.SOURCE] = np.int8(source)
+
+        return hashes
+
+
+    @staticmethod
+    def dihedral_transforms(image: np.ndarray) -> List[np.ndarray]:
+        """
+        Returns the 8 flips and 90-degree rotations of an image as views.
+
+        Args:
+            image (np.ndarray): A 2D image.
+
+        Returns:
+            List[np.ndarray]: The identity, three rotations and the same four
+                of the horizontally flipped image.
+        """
+        mirrored = image[:, ::-1]
+        return [np.rot90(base, turns) for base in (image, mirrored) for turns in range(4)]
+
+
+    @classmethod
+    def hash_dihedral(cls, image: np.ndarray, core_size: int) -> np.ndarray:
+        """
+        Calculates the hashes of all 8 dihedral transforms of an image.
+
+        The image is resized once to a square 'DIHEDRAL_FACTOR' times larger
+        than the hash grid; the transforms are cheap views of that square,
+        so the extra cost is 8 hashes of a tiny image.
+
+        Args:
+            image (np.ndarray): A 2D uint8 grayscale image.
+            core_size (int): Resolution for resizing before hashing.
+
+        Returns:
+            np.ndarray: The 8 packed hashes concatenated into one row (8 * words uint64 words).
+        """
+        side = core_size * cls.DIHEDRAL_FACTOR
+        square = cv2.resize(image, (side, side), interpolation=cv2.INTER_AREA)
+        return np.concatenate([
+            cls.hash_image(np.ascontiguousarray(transform), core_size)
+            for transform in cls.dihedral_transforms(square)
+        ])
+
+
+    @property
+    def dihedral_column(self) -> str:
+        """str: The cache column with the dihedral hashes of 'hash_column'."""
+        return f"{self.hash_column}{self.DIHEDRAL_SUFFIX}"
+
+
+    @classmethod
+    def quality_metrics(cls, image: np.ndarray, scale: int = 1) -> Dict[str, float]:
+        """
+        Measures the quality of a decoded image.
+
+        The sharpness is the variance of the Laplacian of the image resized
+        to 'QUALITY_SIZE' x 'QUALITY_SIZE', so it does not depend on the
+        resolution. The resolution is the pixel count of the original file.
+
+        Args:
+            image (np.ndarray): A 2D uint8 grayscale image.
+            scale (int): The reduction the image was decoded with.
+
+        Returns:
+            Dict[str, float]: The sharpness and the pixel count by metric name.
+        """
+        height, width = image.shape[:2]
+        interpolation = cv2.INTER_AREA if min(height, width) >= cls.QUALITY_SIZE else cv2.INTER_LINEAR
+        resized = cv2.resize(image, (cls.QUALITY_SIZE, cls.QUALITY_SIZE), interpolation=interpolation)
+        return {
+            HashTable.SHARPNESS: float(cv2.Laplacian(resized, cv2.CV_64F).var()),
+            HashTable.PIXELS: float(height * width * scale * scale),
+        }
+
+
+    @property
+    def hash_column(self) -> str:
+        """str: The cache column with hashes used for duplicate search."""
+        return HashTable.column_name(self.hash_type, self.core_size)
+
+
+    @property
+    def hash_specs(self) -> Tuple[HashSpec, ...]:
+        """
+        Tuple[HashSpec, ...]: All hashes computed per image.
+
+        Every algorithm (this hasher, then companions) is computed at every
+        size of the hash pyramid and at 'core_size'. The hash used for the
+        duplicate search goes first. In the 'invariant' mode the dihedral
+        hashes of the searched column go last.
+        """
+        specs = {self.hash_column: HashSpec(self.hash_column, self.__class__, self.core_size)}
+        sizes = sorted(set(self.hash_pyramid) | {self.core_size})
+
+        for hasher in (self.__class__, *self.companions):
+            for size in sizes:
+                column = HashTable.column_name(hasher.HASH_TYPE, size)
+                specs.setdefault(column, HashSpec(column, hasher, size))
+
+        if self.invariant:
+            specs[self.dihedral_column] = HashSpec(self.dihedral_column, self.__class__, self.core_size, True)
+
+        return tuple(specs.values())
+
+
+    @classmethod
+    def load_grayscale(cls, image_path: Path, core_size: int, reduced_decode: bool = False) -> Optional[np.ndarray]:
+        """
+        Loads an image in grayscale for hashing (see 'decode').
+
+        Args:
+            image_path (Path): Path to the image file.
+            core_size (int): Resolution of the hash grid.
+            reduced_decode (bool): If True, use the reduced decode mode for JPEG files.
+
+        Returns:
+            Optional[np.ndarray]: A 2D uint8 image, or None if the file cannot be read.
+        """
+        return cls.decode(image_path, core_size, reduced_decode).image
+
+
+    @classmethod
+    def decode(
+            cls,
+            image_path: Path,
+            core_size: int,
+            reduced_decode: bool = False,
+            exif_thumbnail: bool = False
+    ) -> DecodedImage:
+        """
+        Decodes an image in grayscale and reports the reduction used.
+
+        In the EXIF thumbnail mode a JPEG file is not decoded at all if its
+        embedded thumbnail keeps the shorter side at least
+        'THUMBNAIL_MARGIN * (core_size + 1)' pixels (see 'ExifThumbnail').
+        Otherwise the file falls back to the reduced decode.
+
+        In the reduced decode mode JPEG files are decoded with libjpeg DCT
+        scaling ('cv2.IMREAD_REDUCED_GRAYSCALE_8/4/2'), which skips most of
+        the work for pixels that would be discarded by the resize anyway.
+        The largest reduction is used that keeps the shorter side at least
+        'REDUCED_MARGIN * (core_size + 1)' pixels. The image is first read at
+        1/8 scale; if it is too small, it is read once more with a smaller
+        reduction (or in full) chosen from the known size. Other formats
+        are always decoded in full.
+
+        Args:
+            image_path (Path): Path to the image file.
+            core_size (int): Resolution of the hash grid.
+            reduced_decode (bool): If True, use the reduced decode mode for JPEG files.
+            exif_thumbnail (bool): If True, try the EXIF thumbnail of JPEG files first.
+
+        Returns:
+            DecodedImage: The image (None if the file cannot be read), the
+                reduction factor and the source of the pixels.
+        """
+        is_jpeg = image_path.suffix.lower() in cls.JPEG_SUFFIXES
+
+        if exif_thumbnail and is_jpeg:
+            thumbnail = ExifThumbnail.read(image_path)
+
+            if thumbnail is not None and min(thumbnail.shape[:2]) >= cls.THUMBNAIL_MARGIN * (core_size + 1):
+                return DecodedImage(thumbnail, 0, cls.SOURCE_THUMBNAIL)
+
+            reduced_decode = True
+
+        if not reduced_decode or not is_jpeg:
+            return DecodedImage(cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE), 1, cls.SOURCE_DECODE)
+
+        min_side = cls.REDUCED_MARGIN * (core_size + 1)
+        image = cv2.imread(str(image_path), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+
+        if image is None or min(image.shape[:2]) >= min_side:
+            return DecodedImage(image, 8, cls.SOURCE_DECODE)
+
+        original_side = min(image.shape[:2]) * 8
+
+        for factor, flag in ((4, cv2.IMREAD_REDUCED_GRAYSCALE_4), (2, cv2.IMREAD_REDUCED_GRAYSCALE_2)):
+            if original_side // factor >= min_side:
+                return DecodedImage(cv2.imread(str(image_path), flag), factor, cls.SOURCE_DECODE)
+
+        return DecodedImage(cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE), 1, cls.SOURCE_DECODE)
+
+
+    def is_synced(
+            self,
+            image_paths: Tuple[Path],
+            hash_table: HashTable,
+            files_stats: Optional[Dict[Path, FileStat]] = None
+    ) -> bool:
+        """
+        Checks whether a table holds exactly the current images, unchanged.
+
+        Unlike 'validate_hash_map' only the rows are checked, not the hash
+        columns, so tables with a single (e.g. memory-mapped) column can be
+        used without loading the cache.
+
+        Args:
+            image_paths (Tuple[Path]): Current list of image paths from the folder.
+            hash_table (HashTable): The stored rows.
+            files_stats (Optional[Dict[Path, FileStat]]): Current (st_size, st_mtime_ns)
+                of the files on disk.
+
+        Returns:
+            bool: True if every image has one row with its current size and
+                modification time and no image has to be hashed again.
+        """
+        files_stats = files_stats or {}
+        stored_paths = pd.Index(hash_table.paths)
+
+        if len(hash_table) != len(image_paths) or not stored_paths.is_unique:
+            return False
+
+        positions = stored_paths.get_indexer(np.array([str(path) for path in image_paths], dtype=object))
+
+        if (positions < 0).any():
+            return False
+
+        if self.measure_quality and any(metric not in hash_table.metrics for metric in HashTable.QUALITY):
+            return False
+
+        sources = hash_table.metrics.get(HashTable.SOURCE)
+
+        if not self.exif_thumbnail and sources is not None and (sources == self.SOURCE_THUMBNAIL).any():
+            return False
+
+        current_stats = np.array([files_stats.get(path, (-1, -1)) for path in image_paths], dtype=np.int64)
+        current_stats = current_stats.reshape(len(image_paths), 2)
+        return bool(
+            (current_stats[:, 0] != -1).all()
+            and np.array_equal(hash_table.sizes[positions], current_stats[:, 0])
+            and np.array_equal(hash_table.mtimes[positions], current_stats[:, 1])
+        )
+
+
     def validate_hash_map(
             self,
             image_paths: Tuple[Path],
-            hash_map: Dict[Path, np.ndarray]
-    ) -> Tuple[bool, Dict[Path, np.ndarray]]:
+            hash_table: HashTable,
+            files_stats: Optional[Dict[Path, FileStat]] = None,
+            checkpoint: Optional[HashCheckpoint] = None
+    ) -> Tuple[bool, HashTable]:
         """
         Synchronizes the loaded cache with the current files in the directory.
 
         It removes hashes for files that no longer exist and triggers
-        re-calculation for new files found on the disk.
+        re-calculation for new files found on the disk. If file stats are
+        provided, files whose size or modification time differ from the
+        cached values (e.g. overwritten in place) are re-calculated as well.
+        Cached entries without stats (old cache format) are trusted once and
+        get the current stats on the next save. If a path is stored more than
+        once (e.g. restored from a checkpoint), the latest entry wins. If the
+        cache lacks a column of 'hash_specs' (or the quality metrics while
+        'measure_quality' is on), all images are hashed again. Rows hashed
+        from EXIF thumbnails are hashed again once 'exif_thumbnail' is off.
+        Paths are matched with a hash-based pandas index, so no per-row
+        comparison is done in Python.
 
         Args:
             image_paths (Tuple[Path]): Current list of image paths from the folder.
-            hash_map (Dict[Path, np.ndarray]): The hash map loaded from cache.
+            hash_table (HashTable): The hashes loaded from cache.
+            files_stats (Optional[Dict[Path, FileStat]]): Current (st_size, st_mtime_ns)
+                of the files on disk.
+            checkpoint (Optional[HashCheckpoint]): Checkpoint for newly computed hashes.
 
         Returns:
-            Tuple[bool, Dict[Path, np.ndarray]]: A tuple containing a sync
-                status (True if matches 1:1) and the updated hash map.
+            Tuple[bool, HashTable]: A tuple containing a sync status
+                (True if matches 1:1) and the updated hash table.
         """
-        paths_set = set(image_paths)
-        cached_set = set(hash_map.keys())
-        missing_paths = tuple(paths_set - cached_set)
-        obsolete_paths = cached_set - paths_set
+        files_stats = files_stats or {}
+        columns = [spec.column for spec in self.hash_specs]
+        missing_columns = [column for column in columns if column not in hash_table.columns]
+
+        if self.measure_quality and len(hash_table):
+            missing_columns += [metric for metric in HashTable.QUALITY if metric not in hash_table.metrics]
+
+        if missing_columns:
+            self.logger.info(f"Cache has no {missing_columns} hashes, all images will be hashed")
+            hash_table = HashTable.empty()
+        else:
+            hash_table = hash_table.select(columns, self.hash_column)
+
+        if self.exif_thumbnail and HashTable.SOURCE not in hash_table.metrics:
+            hash_table.metrics[HashTable.SOURCE] = np.full(len(hash_table), self.SOURCE_DECODE, dtype=np.int8)
+
+        unique_rows = ~pd.Index(hash_table.paths).duplicated(keep="last")
+
+        if not unique_rows.all():
+            hash_table = hash_table.take(unique_rows)
+
+        current_paths = np.array([str(path) for path in image_paths], dtype=object)
+        current_stats = np.array([files_stats.get(path, (-1, -1)) for path in image_paths], dtype=np.int64)
+        current_stats = current_stats.reshape(len(image_paths), 2)
+        sizes, mtimes = current_stats[:, 0], current_stats[:, 1]
+
+        positions = pd.Index(hash_table.paths).get_indexer(current_paths)
+        is_cached = positions >= 0
+        cached_sizes = np.full(len(image_paths), -1, dtype=np.int64)
+        cached_mtimes = np.full(len(image_paths), -1, dtype=np.int64)
+        cached_sizes[is_cached] = hash_table.sizes[positions[is_cached]]
+        cached_mtimes[is_cached] = hash_table.mtimes[positions[is_cached]]
+        is_known = is_cached & (cached_sizes != -1) & (sizes != -1)
+        is_changed = is_known & ((cached_sizes != sizes) | (cached_mtimes != mtimes))
+
+        if not self.exif_thumbnail and HashTable.SOURCE in hash_table.metrics:
+            cached_sources = hash_table.metrics[HashTable.SOURCE][positions[is_cached]]
+            is_thumbnail = np.zeros(len(image_paths), dtype=bool)
+            is_thumbnail[is_cached] = cached_sources == self.SOURCE_THUMBNAIL
+
+            if is_thumbnail.any():
+                self.logger.info(f"Syncing cache: {int(is_thumbnail.sum())} thumbnail hashes will be replaced")
+
+            is_changed |= is_thumbnail
+
+        has_unknown_stats = is_cached & (cached_sizes == -1) & (sizes != -1)
+        is_reused = is_cached & ~is_changed
+        obsolete_count = len(hash_table) - int(is_reused.sum())
+
+        if is_reused.all() and not obsolete_count and not has_unknown_stats.any():
+            self.logger.info(f"Cache matches disk 1:1 ({len(hash_table)} items).")
+            return True, hash_table
+
+        valid_table = hash_table.take(positions[is_reused])
+        valid_table.sizes = sizes[is_reused]
+        valid_table.mtimes = mtimes[is_reused]
 
-        if not missing_paths and not obsolete_paths:
-            self.logger.info(f"Cache matches disk 1:1 ({len(hash_map)} items).")
-            return True, hash_map
+        if is_changed.any():
+            self.logger.info(f"Syncing cache: {int(is_changed.sum())} images were changed on disk")
 
-        valid_cache = {path: hash_data for path, hash_data in hash_map.items() if path in paths_set}
+        missing_rows = np.flatnonzero(~is_reused)
 
-        if missing_paths:
+        if missing_rows.size:
+            missing_paths = tuple(image_paths[row] for row in missing_rows)
             self.logger.info(f"Syncing cache: calculating {len(missing_paths)} new images...")
-            new_hashes = self.update_hashes(missing_paths)
+            new_hashes = self.hash_files(missing_paths, sizes[missing_rows], checkpoint)
+            new_table = self._build_table(missing_paths, new_hashes, sizes[missing_rows], mtimes[missing_rows])
+            valid_table = HashTable.concat([valid_table, new_table])
 
-            for path, hash_data in zip(missing_paths, new_hashes):
-                if hash_data is not None:
-                    valid_cache[path] = hash_data
+        return False, valid_table
 
-        return False, valid_cache
 
+    @classmethod
+    def _hash_worker(
+            cls,
+            task: Tuple[int, Path],
+            specs: Tuple[HashSpec, ...],
+            reduced_decode: bool,
+            measure_quality: bool = False,
+            exif_thumbnail: bool = False
+    ) -> Tuple[int, Optional[Dict[str, np.ndarray]]]:
+        """Internal helper: Hashes one image in a worker process and returns it with its row number."""
+        row, image_path = task
+        return row, cls.compute_hashes(image_path, specs, reduced_decode, measure_quality, exif_thumbnail)
 
-    def update_hashes(self, image_paths: Tuple[Path, ...]) -> list:
+
+    def update_hashes(
+            self,
+            image_paths: Tuple[Path, ...],
+            checkpoint: Optional[HashCheckpoint] = None,
+            specs: Optional[Tuple[HashSpec, ...]] = None,
+            exif_thumbnail: Optional[bool] = None
+    ) -> HashBatch:
         """
         Computes hashes for a list of images using multiple CPU cores.
 
+        Every image is decoded once and all 'hash_specs' are calculated from
+        it. Results are streamed with 'imap_unordered' in chunks of
+        'chunksize' images, so finished hashes are handled as soon as they
+        arrive. Every result is written into the preallocated columns of the
+        batch and passed to the checkpoint (if given), which periodically
+        writes them to disk. The pending buffer is flushed even if the run is
+        interrupted by an error or Ctrl+C.
+
         Args:
             image_paths (Tuple[Path, ...]): List of images that need new hashes.
+            checkpoint (Optional[HashCheckpoint]): Checkpoint for computed hashes.
+            specs (Optional[Tuple[HashSpec, ...]]): Hashes to compute. Defaults to 'hash_specs'.
+            exif_thumbnail (Optional[bool]): Overrides the 'exif_thumbnail' mode if set.
 
         Returns:
-            list: A list of generated NumPy arrays (hashes).
+            HashBatch: Hashes by column name in the order of 'image_paths'.
         """
-        hash_func = partial(self.__class__.compute_hash, core_size=self.core_size)
+        hashes = HashBatch(len(image_paths))
+        hash_func = partial(
+            self.__class__._hash_worker,
+            specs=specs or self.hash_specs,
+            reduced_decode=self.reduced_decode,
+            measure_quality=self.measure_quality,
+            exif_thumbnail=self.exif_thumbnail if exif_thumbnail is None else exif_thumbnail
+        )
+        report_step = max(1, len(image_paths) // 10)
+        done = 0
+
+        try:
+            with multiprocessing.Pool(processes=self.n_jobs) as pool:
+                for row, hash_data in pool.imap_unordered(hash_func, enumerate(image_paths), self.chunksize):
+                    done += 1
+
+                    if hash_data is not None:
+                        hashes.set(row, hash_data)
+
+                        if checkpoint is not None:
+                            checkpoint.add(image_paths[row], hash_data)
 
-        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
-            hashes = list(executor.map(hash_func, image_paths))
+                    if done % report_step == 0:
+                        self.logger.info(f"Hashed {done} / {len(image_paths)} images")
+        finally:
+            if checkpoint is not None:
+                checkpoint.flush()
 
         return hashes
 
 
+    def hash_files(
+            self,
+            image_paths: Tuple[Path, ...],
+            sizes: np.ndarray,
+            checkpoint: Optional[HashCheckpoint] = None
+    ) -> HashBatch:
+        """
+        Computes hashes for images, decoding byte-identical files only once.
+
+        If 'exact_finder' is set, the files are grouped by size and content
+        digest first. Only the first file of every group is passed to
+        'update_hashes'; the other files of the group share its hashes, so
+        they are found as duplicates with distance 0.
+
+        Args:
+            image_paths (Tuple[Path, ...]): List of images that need new hashes.
+            sizes (np.ndarray): File sizes in bytes (-1 if unknown).
+            checkpoint (Optional[HashCheckpoint]): Checkpoint for computed hashes.
+
+        Returns:
+            HashBatch: Hashes by column name in the order of 'image_paths'.
+        """
+        if self.exact_finder is None:
+            return self.update_hashes(image_paths, checkpoint)
+
+        owners = self.exact_finder.representatives(image_paths, sizes)
+        unique_rows = np.flatnonzero(owners == np.arange(len(image_paths)))
+
+        if len(unique_rows) == len(image_paths):
+            return self.update_hashes(image_paths, checkpoint)
+
+        self.logger.info(f"Skipping {len(image_paths) - len(unique_rows)} byte-identical copies")
+        unique_hashes = self.update_hashes(tuple(image_paths[row] for row in unique_rows), checkpoint)
+        return unique_hashes.take(np.searchsorted(unique_rows, owners))
+
+
+    def _build_table(
+            self,
+            image_paths: Tuple[Path, ...],
+            hashes: HashBatch,
+            sizes: np.ndarray,
+            mtimes: np.ndarray
+    ) -> HashTable:
+        """Internal helper: Builds a HashTable from computed hashes, skipping unreadable images."""
+        return hashes.to_table([str(path) for path in image_paths], sizes, mtimes, self.hash_column)
+
+
     @staticmethod
-    def _df_to_hash_map(df: pd.DataFrame) -> Dict[Path, np.ndarray]:
-        """Internal helper: Converts Parquet DataFrame back to Hashing format."""
-        if df.empty:
-            return {}
-        data = {
-            Path(row['path']): np.array(row['hash'], dtype=bool)
-            for _, row in df.iterrows()
-        }
-        return data
+    def collect_stats(
+            image_paths: Tuple[Path, ...],
+            files_stats: Optional[Dict[Path, os.stat_result]] = None
+    ) -> Dict[Path, FileStat]:
+        """
+        Collects (st_size, st_mtime_ns) for every image.
+
+        Stats gathered during the directory scan are reused. Only files that
+        are absent from 'files_stats' are queried with an extra 'stat' call.
 
+        Args:
+            image_paths (Tuple[Path, ...]): All image paths to be processed.
+            files_stats (Optional[Dict[Path, os.stat_result]]): Stats from the directory scan.
 
-    def get_hashmap(self, image_paths: Tuple[Path]) -> Dict[Path, np.ndarray]:
+        Returns:
+            Dict[Path, FileStat]: File size and modification time in nanoseconds per path.
+        """
+        files_stats = files_stats or {}
+        stats = {}
+
+        for path in image_paths:
+            stat = files_stats.get(path)
+
+            if stat is None:
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+
+            stats[path] = (stat.st_size, stat.st_mtime_ns)
+
+        return stats
+
+
+    def get_cache_file(self, folder: Path) -> Path:
+        """
+        Builds the path of the Parquet hash cache for a folder.
+
+        Args:
+            folder (Path): The folder with images.
+
+        Returns:
+            Path: The cache file in 'cache_file_path'.
+        """
+        filename = self.cache_io.generate_cache_filename(folder.resolve(), cache_name=self.settings.cache_name)
+        return self.settings.cache_file_path / filename
+
+
+    def get_hashmap(
+            self,
+            image_paths: Tuple[Path],
+            files_stats: Optional[Dict[Path, os.stat_result]] = None
+    ) -> HashTable:
         """
         Orchestrates the process of obtaining hashes for the entire directory.
 
-        It attempts to load data from cache, validates it against the current
-        files, and computes any missing hashes in parallel.
+        It loads the Parquet cache straight into a 'HashTable' (one file per
+        folder, with a column per algorithm and core size), adds hashes
+        restored from checkpoints of an interrupted run, validates them
+        against the current files (including their size and modification
+        time), and computes any missing or changed hashes in parallel. New
+        hashes are checkpointed while they are computed; the checkpoints are
+        removed once the full cache is saved.
 
         Args:
             image_paths (Tuple[Path]): All image paths to be processed.
+            files_stats (Optional[Dict[Path, os.stat_result]]): Stats gathered
+                during the directory scan. Missing entries are stat-ed on demand.
 
         Returns:
-            Dict[Path, np.ndarray]: A complete dictionary of paths and their hashes.
+            HashTable: Paths, packed hash matrices and stats of all readable
+                images, with 'hash_column' as the active column.
         """
         if not image_paths:
-            return {}
+            return HashTable.empty()
 
         image_count = len(image_paths)
-        filename = self.cache_io.generate_cache_filename(
-            image_paths[0].parent.resolve(),
-            cache_name=self.settings.cache_name,
-            hash_type=self.hash_type,
-            core_size=self.core_size,
-
+        cache_file_name = self.get_cache_file(image_paths[0].parent)
+        cache_file_name.parent.mkdir(parents=True, exist_ok=True)
+        current_stats = self.collect_stats(image_paths, files_stats)
+        checkpoint = HashCheckpoint(
+            cache_io=self.cache_io,
+            cache_file=cache_file_name,
+            every=self.settings.checkpoint_every,
+            interval=self.settings.checkpoint_interval,
+            stats=current_stats
         )
 
-        cache_file_name = self.settings.cache_file_path / filename
-        cache_file_name.parent.mkdir(parents=True, exist_ok=True)
-        df = self.cache_io.load(cache_file_name)
+        hash_table = HashTable.from_arrow(self.cache_io.load_table(cache_file_name))
+        restored_table = checkpoint.load()
 
-        hash_map  = self._df_to_hash_map(df)
+        if len(restored_table):
+            self.logger.info(f"Resuming from checkpoint: {len(restored_table)} hashes restored")
+            hash_table = HashTable.concat([hash_table, restored_table])
 
-        if hash_map:
-            is_valid, valid_hash_map = self.validate_hash_map(image_paths, hash_map)
-            if is_valid:
-                return hash_map
+        if len(hash_table):
+            is_valid, valid_table = self.validate_hash_map(image_paths, hash_table, current_stats, checkpoint)
+            if is_valid and not len(restored_table):
+                return valid_table
             else:
-                self.cache_io.save(valid_hash_map, cache_file_name)
-                self.logger.info(f"Hash map updated: {len(valid_hash_map)} total valid hashes.")
-                return valid_hash_map
+                self.cache_io.save(valid_table.to_arrow(), cache_file_name)
+                checkpoint.clear()
+                self.logger.info(f"Hash map updated: {len(valid_table)} total valid hashes.")
+                return valid_table
 
         self.logger.info(f"Building hashmap in parallel using {self.n_jobs} workers for {image_count} images...")
 
-        hashes = self.update_hashes(image_paths)
-        hash_map = {
-            path: h for path, h in zip(image_paths, hashes)
-            if h is not None
-        }
+        file_stats = np.array([current_stats.get(path, (-1, -1)) for path in image_paths], dtype=np.int64)
+        file_stats = file_stats.reshape(image_count, 2)
+        hashes = self.hash_files(image_paths, file_stats[:, 0], checkpoint)
+        hash_table = self._build_table(image_paths, hashes, file_stats[:, 0], file_stats[:, 1])
 
-        self.logger.info(f"Successfully hashed {len(hash_map)} out of {image_count} images")
-        self.cache_io.save(hash_map, cache_file_name)
-        return hash_map
+        self.logger.info(f"Successfully hashed {len(hash_table)} out of {image_count} images")
+        self.cache_io.save(hash_table.to_arrow(), cache_file_name)
+        checkpoint.clear()
+        return hash_table
 
 
-    def find_duplicates(self, hashmap: Dict[Path, np.ndarray]) -> List[Path]:
+    def find_duplicates(self, hashmap: Union[HashTable, Dict[Path, np.ndarray]]) -> List[Path]:
         """
         Finds similar images using vectorized Hamming distance comparison.
 
-        This method converts the hash map into a matrix and compares all
-        images against each other. It optimizes the search by skipping
-        already identified duplicates.
+        This method takes the packed uint64 hash matrix and delegates the pair
+        search to the configured 'index' (the exhaustive 'LinearIndex' if none
+        is set). Dictionaries (including unpacked boolean hashes) are converted
+        into a 'HashTable' first. From every group of similar images the
+        first-seen one is kept. With 'exif_confirm' the pairs are confirmed
+        with regular decodes before the duplicates are selected.
 
         Args:
-            hashmap (Dict[Path, np.ndarray]): Dictionary of paths and hashes.
+            hashmap (Union[HashTable, Dict[Path, np.ndarray]]): Paths and hashes.
 
         Returns:
             List[Path]: A list of file paths identified as duplicates.
@@ -214,38 +844,113 @@ class BaseHasher(ABC):
         Raises:
             ValueError: If hashes in the map have different lengths.
         """
-        if not hashmap:
+        if not len(hashmap):
             return []
 
         self.logger.info(f"Vectorizing comparison for {len(hashmap)} images...")
-        paths: List[Path] = list(hashmap.keys())
 
         try:
-            matrix = np.array(list(hashmap.values()), dtype=bool)
+            hash_table = hashmap if isinstance(hashmap, HashTable) else HashTable.from_dict(hashmap)
         except ValueError as e:
             msg = "Failed to create matrix. Some hashes have different lengths!"
             self.logger.error(msg)
             raise ValueError(msg)
 
-        duplicates_indices: Set[int] = set()
+        matrix = hash_table.hashes
 
-        for index in range(len(paths)):
-            if index in duplicates_indices:
-                continue
+        index = self.index or LinearIndex(self.settings)
+        self.logger.info(f"Searching pairs with {index.__class__.__name__} (threshold {self.threshold} bits)")
+        pairs = index.find_pairs(matrix, self.threshold)
 
-            current_hash = matrix[index]
-            hamming_distances = np.count_nonzero(matrix != current_hash, axis=1)
-            matches = np.where(hamming_distances <= self.threshold)[0]
+        if self.exif_confirm:
+            pairs = self.confirm_pairs(hash_table, pairs)
 
-            for match_idx in matches:
-                if match_idx > index:
-                    duplicates_indices.add(int(match_idx))
+        duplicates_indices = index.resolve_duplicates(pairs, len(hash_table))
 
-        result = [paths[idx] for idx in duplicates_indices]
+        result = hash_table.path_list(duplicates_indices)
         self.logger.info(f"Vectorized search finished. Found {len(result)} duplicates.")
         return result
 
 
+    def confirm_pairs(self, hash_table: HashTable, pairs: HashPairs) -> HashPairs:
+        """
+        Re-checks matches found with EXIF thumbnail hashes at full quality.
+
+        Only the images of matched pairs whose hashes come from a thumbnail
+        are decoded again (without thumbnails); the distances of their pairs
+        are recomputed and pairs above the threshold are dropped. The cache
+        is not changed.
+
+        Args:
+            hash_table (HashTable): The searched hashes with the 'source' column.
+            pairs (HashPairs): Matched pairs of rows of 'hash_table'.
+
+        Returns:
+            HashPairs: The pairs that are still within the threshold.
+        """
+        sources = hash_table.metrics.get(HashTable.SOURCE)
+
+        if sources is None or not pairs.size:
+            return pairs
+
+        rows = np.unique(np.concatenate([pairs.first, pairs.second]))
+        rows = rows[sources[rows] == self.SOURCE_THUMBNAIL]
+
+        if not rows.size:
+            return pairs
+
+        self.logger.info(f"Confirming {pairs.size} pairs: decoding {len(rows)} thumbnail-hashed images")
+        spec = self.hash_specs[0]
+        new_hashes = self.update_hashes(tuple(hash_table.path_list(rows)), specs=(spec,), exif_thumbnail=False)
+        is_read = new_hashes.is_read
+        positions = np.full(len(hash_table), -1, dtype=np.int64)
+        positions[rows[is_read]] = np.arange(int(is_read.sum()))
+        confirmed = new_hashes.columns[spec.column][is_read] if is_read.any() else \
+            np.empty((0, hash_table.words), dtype=WORD_DTYPE)
+
+        def full_hashes(indices: np.ndarray) -> np.ndarray:
+            matrix = np.array(hash_table.hashes[indices])
+            is_new = positions[indices] >= 0
+            matrix[is_new] = confirmed[positions[indices[is_new]]]
+            return matrix
+
+        distances = popcount(np.bitwise_xor(full_hashes(pairs.first), full_hashes(pairs.second)))
+        is_match = distances <= self.threshold
+        self.logger.info(f"Confirmation pass kept {int(is_match.sum())} of {pairs.size} pairs")
+        return HashPairs(pairs.first[is_match], pairs.second[is_match], distances[is_match])
+
+
+    def confirm_cross_pairs(self, queries: HashTable, reference: HashTable, pairs: HashPairs) -> HashPairs:
+        """
+        Re-checks matches between two tables like 'confirm_pairs'.
+
+        The matched rows of both tables are joined into one small table, so
+        thumbnail-hashed images on either side are decoded again. Rows
+        without a 'source' column count as decoded.
+
+        Args:
+            queries (HashTable): The searched hashes.
+            reference (HashTable): The hashes they were matched with.
+            pairs (HashPairs): Pairs of a row of 'queries' and a row of 'reference'.
+
+        Returns:
+            HashPairs: The pairs that are still within the threshold.
+        """
+        if not pairs.size:
+            return pairs
+
+        first_rows, first = np.unique(pairs.first, return_inverse=True)
+        second_rows, second = np.unique(pairs.second, return_inverse=True)
+        tables = [queries.take(first_rows).select([queries.key]), reference.take(second_rows).select([reference.key])]
+
+        for table in tables:
+            table.metrics.setdefault(HashTable.SOURCE, np.full(len(table), self.SOURCE_DECODE, dtype=np.int8))
+
+        offset = len(first_rows)
+        confirmed = self.confirm_pairs(HashTable.concat(tables), HashPairs(first, second + offset, pairs.distance))
+        return HashPairs(first_rows[confirmed.first], second_rows[confirmed.second - offset], confirmed.distance)
+
+
     @property
     def core_size(self) -> int:
         """int: The resolution used for resizing images before hashing."""
@@ -309,6 +1014,19 @@ class BaseHasher(ABC):
         self._threshold_pct = pct_value
         self._recalculate_threshold_bits(pct_value)
 
+    def threshold_bits(self, percentage: float) -> int:
+        """
+        Converts a percentage threshold into bits for the current core size.
+
+        Args:
+            percentage (float): The threshold percentage (0-100).
+
+        Returns:
+            int: The threshold in bits.
+        """
+        hash_sqr = self.core_size * self.core_size
+        return int(hash_sqr * (percentage / self.settings.max_percentage))
+
     def _recalculate_threshold_bits(self, percentage: float) -> None:
         """
         Internal helper to convert a percentage threshold into absolute bits.
@@ -317,7 +1035,7 @@ class BaseHasher(ABC):
             percentage (float): The threshold percentage (0-100).
         """
         hash_sqr = self.core_size * self.core_size
-        self._threshold = int(hash_sqr * (percentage / self.settings.max_percentage))
+        self._threshold = self.threshold_bits(percentage)
         self.logger.debug(f"Threshold recalculated: {percentage}% of {hash_sqr} bits = {self._threshold} bits")
 
     @property
@@ -1,9 +1,8 @@
-from pathlib import Path
-from typing import Union
-
 import cv2
 import numpy as np
 
+from const_utils.copmarer import Constants
+from services.hamming import pack_bits
 from tools.comparer.img_comparer.hasher.base_hasher import BaseHasher
 
 class DHash(BaseHasher):
@@ -16,34 +15,30 @@ class DHash(BaseHasher):
     at identifying visual similarities while ignoring minor changes in
     color or compression.
     """
+    HASH_TYPE: str = Constants.dhash
+
     @staticmethod
-    def compute_hash(image_path: Path, core_size: int) -> Union[np.ndarray, None]:
+    def hash_image(image: np.ndarray, core_size: int) -> np.ndarray:
         """
-        Calculates the dHash for a single image.
+        Calculates the dHash of a decoded grayscale image.
 
         The process includes:
-        1. Loading the image in grayscale.
-        2. Resizing it to (core_size + 1, core_size) to allow horizontal
+        1. Resizing the image to (core_size + 1, core_size) to allow horizontal
            pixel comparison.
-        3. Generating a boolean mask where each bit represents whether the
+        2. Generating a boolean mask where each bit represents whether the
            left pixel is brighter than the right pixel.
+        3. Packing the mask into uint64 words (8x less memory than booleans).
 
         Args:
-            image_path (Path): The file path to the image.
+            image (np.ndarray): A 2D uint8 grayscale image.
             core_size (int): The resolution used for resizing. The resulting
                 hash length will be core_size squared (e.g., 8x8 = 64 bits).
 
         Returns:
-            Union[np.ndarray, None]: A 1D NumPy array of boolean values
-                representing the hash, or None if the image file is
-                invalid or cannot be read.
+            np.ndarray: A 1D NumPy array of ceil(core_size^2 / 64) uint64
+                words representing the packed hash.
         """
-        image = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
-
-        if image is None:
-            return None
-
         resized_image = cv2.resize(image, (core_size + 1, core_size), interpolation=cv2.INTER_AREA)
         gradient_difference = resized_image[:, 1:] > resized_image[:, :-1]
 
-        return gradient_difference.flatten()
+        return pack_bits(gradient_difference.flatten())
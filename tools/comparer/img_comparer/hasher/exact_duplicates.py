@@ -0,0 +1,165 @@
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from const_utils.default_values import AppSettings
+from logger.logger import LoggerConfigurator
+
+
+class ExactDuplicateFinder:
+    """
+    Finds byte-identical files without decoding them.
+
+    Files are grouped by size first, so only files sharing a size are read
+    at all. Within a size group a BLAKE2b digest of the first 'HEAD_BYTES'
+    splits most groups cheaply, and only files whose heads match are read
+    to the end with a streamed BLAKE2b digest. Files are read in parallel by
+    'n_jobs' threads, since the work is I/O bound.
+
+    Attributes:
+        HEAD_BYTES (int): Size of the file head digested in the first pass.
+        BLOCK_BYTES (int): Read block size for streamed digests.
+        DIGEST_SIZE (int): BLAKE2b digest length in bytes.
+        settings (AppSettings): Global configuration for paths and parameters.
+        logger (logging.Logger): Logger instance for exact matching.
+        n_jobs (int): Number of reader threads.
+    """
+    HEAD_BYTES: int = 64 * 1024
+    BLOCK_BYTES: int = 1024 * 1024
+    DIGEST_SIZE: int = 16
+
+    def __init__(self, settings: AppSettings):
+        """
+        Initializes the finder with project settings.
+
+        Args:
+            settings (AppSettings): Configuration containing 'n_jobs'.
+        """
+        self.settings = settings
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+        self.n_jobs = max(1, int(self.settings.n_jobs))
+
+
+    @classmethod
+    def file_digest(cls, path: Path, limit: Optional[int] = None) -> Optional[bytes]:
+        """
+        Calculates a streamed BLAKE2b digest of the file content.
+
+        Args:
+            path (Path): The file to read.
+            limit (Optional[int]): Read at most this many bytes. The whole file if None.
+
+        Returns:
+            Optional[bytes]: The digest, or None if the file cannot be read.
+        """
+        digest = hashlib.blake2b(digest_size=cls.DIGEST_SIZE)
+        remaining = limit if limit is not None else -1
+
+        try:
+            with open(path, "rb") as file:
+                while remaining:
+                    block = file.read(cls.BLOCK_BYTES if remaining < 0 else min(cls.BLOCK_BYTES, remaining))
+
+                    if not block:
+                        break
+
+                    digest.update(block)
+                    remaining = remaining - len(block) if remaining > 0 else remaining
+        except OSError:
+            return None
+
+        return digest.digest()
+
+
+    def _split_by_digest(
+            self,
+            paths: Sequence[Path],
+            groups: List[np.ndarray],
+            limit: Optional[int]
+    ) -> List[np.ndarray]:
+        """Internal helper: Splits candidate groups by content digest, dropping unique and unreadable files."""
+        rows = np.concatenate(groups) if groups else np.empty(0, dtype=np.int64)
+
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+            digests = dict(zip(rows.tolist(), executor.map(lambda row: self.file_digest(paths[row], limit), rows)))
+
+        result = []
+
+        for group in groups:
+            buckets = defaultdict(list)
+
+            for row in group.tolist():
+                if digests[row] is not None:
+                    buckets[digests[row]].append(row)
+
+            result.extend(np.array(bucket, dtype=np.int64) for bucket in buckets.values() if len(bucket) > 1)
+
+        return result
+
+
+    def find_groups(self, paths: Sequence[Path], sizes: np.ndarray) -> List[np.ndarray]:
+        """
+        Groups byte-identical files.
+
+        Args:
+            paths (Sequence[Path]): Files to check.
+            sizes (np.ndarray): File sizes in bytes; files with unknown (-1)
+                or zero size are never grouped.
+
+        Returns:
+            List[np.ndarray]: Row indices of every group of identical files
+                (at least two, in ascending order; the first one is the representative).
+        """
+        sizes = np.asarray(sizes, dtype=np.int64)
+        order = np.argsort(sizes, kind="stable")
+        sorted_sizes = sizes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_sizes[1:] != sorted_sizes[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        groups = [
+            order[start:end] for start, end in zip(starts, ends)
+            if end - start > 1 and sorted_sizes[start] > 0
+        ]
+
+        if not groups:
+            return []
+
+        candidates = sum(len(group) for group in groups)
+        groups = self._split_by_digest(paths, groups, self.HEAD_BYTES)
+        is_large = [sizes[group[0]] > self.HEAD_BYTES for group in groups]
+        small_groups = [group for group, large in zip(groups, is_large) if not large]
+        large_groups = [group for group, large in zip(groups, is_large) if large]
+        groups = small_groups + self._split_by_digest(paths, large_groups, None)
+        groups = sorted((np.sort(group) for group in groups), key=lambda group: group[0])
+
+        copies = sum(len(group) - 1 for group in groups)
+        self.logger.info(
+            f"Exact duplicates: {candidates} files share a size, {len(groups)} groups with {copies} byte-identical copies"
+        )
+        return groups
+
+
+    def representatives(self, paths: Sequence[Path], sizes: np.ndarray) -> np.ndarray:
+        """
+        Maps every file to the representative of its exact-duplicate group.
+
+        Args:
+            paths (Sequence[Path]): Files to check.
+            sizes (np.ndarray): File sizes in bytes (-1 if unknown).
+
+        Returns:
+            np.ndarray: For every row, the row of its representative (itself for unique files).
+        """
+        owners = np.arange(len(paths), dtype=np.int64)
+
+        for group in self.find_groups(paths, sizes):
+            owners[group] = group[0]
+
+        return owners
@@ -0,0 +1,174 @@
+import struct
+from pathlib import Path
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class ExifThumbnail:
+    """
+    Reads the small preview image embedded in the EXIF block of a JPEG file.
+
+    Most camera JPEGs carry a ~160x120 JPEG thumbnail in the APP1 segment,
+    next to the file start. Only the APP segments are read (a few KB), the
+    TIFF structure of the EXIF block is walked to IFD1, where the offset
+    and the length of the thumbnail are stored, and the thumbnail is
+    decoded instead of the full frame. The EXIF orientation of IFD0 is
+    applied, so the thumbnail is oriented like a regular 'cv2.imread'.
+
+    Attributes:
+        APP1 (int): The JPEG marker of the EXIF segment.
+        SOS (int): The JPEG marker of the compressed image data (no APP segments after it).
+        EXIF_HEADER (bytes): The signature at the start of the EXIF segment.
+        ORIENTATION (int): The IFD0 tag with the EXIF orientation.
+        THUMBNAIL_OFFSET (int): The IFD1 tag with the thumbnail offset.
+        THUMBNAIL_LENGTH (int): The IFD1 tag with the thumbnail length.
+        MAX_SEGMENTS (int): How many segments are inspected before giving up.
+    """
+    APP1: int = 0xE1
+    SOS: int = 0xDA
+    EXIF_HEADER: bytes = b"Exif\x00\x00"
+    ORIENTATION: int = 0x0112
+    THUMBNAIL_OFFSET: int = 0x0201
+    THUMBNAIL_LENGTH: int = 0x0202
+    MAX_SEGMENTS: int = 16
+
+    @classmethod
+    def read(cls, image_path: Path) -> Optional[np.ndarray]:
+        """
+        Decodes the EXIF thumbnail of a JPEG file in grayscale.
+
+        Args:
+            image_path (Path): Path to the JPEG file.
+
+        Returns:
+            Optional[np.ndarray]: A 2D uint8 image, or None if the file has no readable thumbnail.
+        """
+        segment = cls.read_exif_segment(image_path)
+
+        if segment is None:
+            return None
+
+        thumbnail, orientation = cls.parse(segment)
+
+        if thumbnail is None:
+            return None
+
+        image = cv2.imdecode(np.frombuffer(thumbnail, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+
+        if image is None:
+            return None
+
+        return np.ascontiguousarray(cls.orient(image, orientation))
+
+
+    @classmethod
+    def read_exif_segment(cls, image_path: Path) -> Optional[bytes]:
+        """
+        Reads the EXIF segment without touching the compressed image data.
+
+        Args:
+            image_path (Path): Path to the JPEG file.
+
+        Returns:
+            Optional[bytes]: The segment payload starting with the TIFF header,
+                or None if the file has no EXIF segment.
+        """
+        try:
+            with open(image_path, "rb") as file:
+                if file.read(2) != b"\xff\xd8":
+                    return None
+
+                for _ in range(cls.MAX_SEGMENTS):
+                    header = file.read(4)
+
+                    if len(header) < 4 or header[0] != 0xFF or header[1] == cls.SOS:
+                        return None
+
+                    length = struct.unpack(">H", header[2:])[0] - 2
+
+                    if header[1] != cls.APP1:
+                        file.seek(length, 1)
+                        continue
+
+                    payload = file.read(length)
+
+                    if payload.startswith(cls.EXIF_HEADER):
+                        return payload[len(cls.EXIF_HEADER):]
+        except OSError:
+            return None
+
+        return None
+
+
+    @classmethod
+    def parse(cls, tiff: bytes) -> Tuple[Optional[bytes], int]:
+        """
+        Finds the thumbnail and the orientation in a TIFF-structured EXIF block.
+
+        Args:
+            tiff (bytes): The EXIF payload starting with the TIFF header.
+
+        Returns:
+            Tuple[Optional[bytes], int]: The JPEG bytes of the thumbnail (None
+                if missing or damaged) and the EXIF orientation (1 if missing).
+        """
+        try:
+            byte_order = {b"II": "<", b"MM": ">"}[tiff[:2]]
+            ifd0_offset = struct.unpack_from(f"{byte_order}I", tiff, 4)[0]
+            ifd0, ifd1_offset = cls._read_ifd(tiff, ifd0_offset, byte_order)
+            orientation = ifd0.get(cls.ORIENTATION, 1)
+
+            if not ifd1_offset:
+                return None, orientation
+
+            ifd1, _ = cls._read_ifd(tiff, ifd1_offset, byte_order)
+        except (KeyError, struct.error):
+            return None, 1
+
+        offset, length = ifd1.get(cls.THUMBNAIL_OFFSET), ifd1.get(cls.THUMBNAIL_LENGTH)
+
+        if not offset or not length or offset + length > len(tiff):
+            return None, orientation
+
+        return tiff[offset:offset + length], orientation
+
+
+    @staticmethod
+    def _read_ifd(tiff: bytes, offset: int, byte_order: str) -> Tuple[dict, int]:
+        """Internal helper: Reads the short and long values of an IFD and the offset of the next IFD."""
+        count = struct.unpack_from(f"{byte_order}H", tiff, offset)[0]
+        values = {}
+
+        for entry in range(count):
+            start = offset + 2 + entry * 12
+            tag, value_type = struct.unpack_from(f"{byte_order}HH", tiff, start)
+            value_format = f"{byte_order}H" if value_type == 3 else f"{byte_order}I"
+            values[tag] = struct.unpack_from(value_format, tiff, start + 8)[0]
+
+        return values, struct.unpack_from(f"{byte_order}I", tiff, offset + 2 + count * 12)[0]
+
+
+    @staticmethod
+    def orient(image: np.ndarray, orientation: int) -> np.ndarray:
+        """
+        Applies an EXIF orientation to an image.
+
+        Args:
+            image (np.ndarray): The image as stored in the file.
+            orientation (int): The EXIF orientation (1-8).
+
+        Returns:
+            np.ndarray: The image as it should be displayed (a view).
+        """
+        transforms = {
+            2: lambda img: img[:, ::-1],
+            3: lambda img: img[::-1, ::-1],
+            4: lambda img: img[::-1],
+            5: lambda img: img.T,
+            6: lambda img: np.rot90(img, -1),
+            7: lambda img: img[::-1, ::-1].T,
+            8: lambda img: np.rot90(img, 1),
+        }
+        return transforms.get(orientation, lambda img: img)(image)
@@ -0,0 +1,117 @@
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tools.cache import CacheIO
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+
+
+class HashCheckpoint:
+    """
+    Periodically persists partial hashing results and restores them after a crash.
+
+    Newly computed hashes are buffered and written as small Parquet part
+    files into a folder next to the main cache file every 'every' images or
+    'interval' seconds, whichever comes first. Only the buffer is kept in
+    memory, so a crash, OOM or Ctrl+C loses at most one checkpoint of work.
+    On the next run the parts are loaded back and merged with the main cache.
+
+    Attributes:
+        PART_PATTERN (str): Glob pattern of part files.
+        cache_io (CacheIO): Tool for saving and loading part files.
+        directory (Path): Folder with part files for one cache file.
+        every (int): Number of new hashes that triggers a flush.
+        interval (float): Seconds since the last flush that trigger a flush.
+        stats (Dict[Path, Tuple[int, int]]): (st_size, st_mtime_ns) per image,
+            stored together with the hashes.
+    """
+    PART_PATTERN: str = "part_*.parquet"
+
+    def __init__(
+            self,
+            cache_io: CacheIO,
+            cache_file: Path,
+            every: int,
+            interval: float,
+            stats: Optional[Dict[Path, Tuple[int, int]]] = None
+    ):
+        """
+        Initializes the checkpoint for a cache file.
+
+        Args:
+            cache_io (CacheIO): Tool for saving and loading part files.
+            cache_file (Path): The main cache file the parts belong to.
+            every (int): Flush after this many new hashes.
+            interval (float): Flush after this many seconds.
+            stats (Optional[Dict[Path, Tuple[int, int]]]): File stats to store next to hashes.
+        """
+        self.cache_io = cache_io
+        self.directory = cache_file.parent / f"{cache_file.stem}_checkpoint"
+        self.every = every
+        self.interval = interval
+        self.stats = stats or {}
+        self._paths: List[Path] = []
+        self._hashes: List[Dict[str, np.ndarray]] = []
+        self._last_flush = time.monotonic()
+        self._part_number = len(self._part_files())
+
+
+    def _part_files(self) -> List[Path]:
+        """Internal helper: Returns existing part files in write order."""
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob(self.PART_PATTERN))
+
+
+    def add(self, path: Path, hash_data: Dict[str, np.ndarray]) -> None:
+        """
+        Buffers the hashes of one image and flushes the buffer if a checkpoint is due.
+
+        Args:
+            path (Path): The image path.
+            hash_data (Dict[str, np.ndarray]): Packed hashes of the image by column name.
+        """
+        self._paths.append(path)
+        self._hashes.append(hash_data)
+
+        if len(self._paths) >= self.every or time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+
+    def flush(self) -> None:
+        """Writes buffered hashes into a new part file and clears the buffer."""
+        self._last_flush = time.monotonic()
+
+        if not self._paths:
+            return
+
+        file_stats = np.array([self.stats.get(path, (-1, -1)) for path in self._paths], dtype=np.int64)
+        table = HashTable.from_rows([str(path) for path in self._paths], self._hashes, file_stats[:, 0], file_stats[:, 1])
+        self._part_number += 1
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.cache_io.save(table.to_arrow(), self.directory / f"part_{self._part_number:06d}.parquet")
+        self._paths, self._hashes = [], []
+
+
+    def load(self) -> HashTable:
+        """
+        Loads hashes from all part files left by an interrupted run.
+
+        Returns:
+            HashTable: Restored hashes in write order (empty if there are no parts).
+        """
+        tables = [HashTable.from_arrow(self.cache_io.load_table(part)) for part in self._part_files()]
+        return HashTable.concat(tables)
+
+
+    def clear(self) -> None:
+        """Removes all part files once their hashes are stored in the main cache."""
+        for part in self._part_files():
+            part.unlink(missing_ok=True)
+
+        self._part_number = 0
+
+        if self.directory.exists() and not any(self.directory.iterdir()):
+            self.directory.rmdir()
@@ -0,0 +1,205 @@
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from const_utils.default_values import AppSettings
+from logger.logger import LoggerConfigurator
+from services.hamming import WORD_DTYPE
+from tools.cache import CacheIO
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+
+
+class HashStore:
+    """
+    Out-of-core storage of one hash column for very large datasets.
+
+    The packed hash matrix is written as a raw file of little-endian uint64
+    words next to the Parquet cache and opened as a read-only 'np.memmap',
+    so searches read blocks of rows from disk instead of keeping the whole
+    matrix in memory. The paths, stats and metrics of the rows and the
+    small columns kept in memory are stored in a separate Parquet row
+    table in the same order, so a fresh store is opened without reading
+    the hash cache (see 'read'). Both files are rewritten only when the
+    hash cache is newer than the store.
+
+    Attributes:
+        BLOCK_ROWS (int): Number of rows written at once.
+        settings (AppSettings): Global configuration for paths and parameters.
+        logger (logging.Logger): Logger instance for the hash store.
+        cache_io (CacheIO): Tool for saving the row table.
+        cache_file (Path): The Parquet hash cache the store belongs to.
+        column (str): The stored hash column (e.g., 'dhash_16').
+    """
+    BLOCK_ROWS: int = 1_000_000
+
+    def __init__(self, settings: AppSettings, cache_io: CacheIO, cache_file: Path, column: str):
+        """
+        Initializes the store for one cache file and hash column.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+            cache_io (CacheIO): Tool for saving the row table.
+            cache_file (Path): The Parquet hash cache the store belongs to.
+            column (str): The stored hash column.
+        """
+        self.settings = settings
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+        self.cache_io = cache_io
+        self.cache_file = cache_file
+        self.column = column
+
+
+    @property
+    def matrix_file(self) -> Path:
+        """Path: The raw file with the packed hash matrix."""
+        return self.cache_file.with_name(f"{self.cache_file.stem}_{self.column}.u64")
+
+
+    @property
+    def paths_file(self) -> Path:
+        """Path: The Parquet row table (paths, stats, metrics and kept columns) of the matrix file."""
+        return self.cache_file.with_name(f"{self.cache_file.stem}_{self.column}_paths{self.cache_file.suffix}")
+
+
+    def is_fresh(self, rows: int, words: int, keep: Sequence[str] = ()) -> bool:
+        """
+        Checks whether the stored files can be reused.
+
+        Args:
+            rows (int): The expected number of hashes.
+            words (int): The expected number of uint64 words per hash.
+            keep (Sequence[str]): Columns the row table must hold.
+
+        Returns:
+            bool: True if both files exist, are not older than the cache, have the
+                expected size and the row table has the stats and 'keep' columns.
+        """
+        if not self.matrix_file.exists() or not self.paths_file.exists():
+            return False
+
+        required = {HashTable.DIR, HashTable.NAME, HashTable.SIZE, HashTable.MTIME, *keep}
+
+        if not required.issubset(pq.read_schema(self.paths_file).names):
+            return False
+
+        cache_mtime = self.cache_file.stat().st_mtime_ns if self.cache_file.exists() else 0
+        expected_bytes = rows * words * WORD_DTYPE.itemsize
+        return (
+            self.matrix_file.stat().st_mtime_ns >= cache_mtime
+            and self.matrix_file.stat().st_size == expected_bytes
+        )
+
+
+    def write(self, hash_table: HashTable, keep: Sequence[str] = ()) -> None:
+        """
+        Writes the active hash column and the row table to disk.
+
+        Args:
+            hash_table (HashTable): Hashes in the order they will be searched.
+            keep (Sequence[str]): Small columns stored in the row table.
+        """
+        matrix = hash_table.hashes
+        self.matrix_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(self.matrix_file, "wb") as file:
+            for start in range(0, len(matrix), self.BLOCK_ROWS):
+                file.write(np.ascontiguousarray(matrix[start:start + self.BLOCK_ROWS], dtype=WORD_DTYPE).tobytes())
+
+        kept = [name for name in keep if name in hash_table.columns and name != self.column]
+        row_table = hash_table.select([self.column, *kept], self.column).to_arrow().drop_columns([self.column])
+        self.cache_io.save(row_table, self.paths_file)
+        self.logger.info(f"Stored {len(matrix)} hashes out of core in {self.matrix_file.name}")
+
+
+    def open(self, rows: int, words: int) -> Optional[np.memmap]:
+        """
+        Opens the stored matrix for reading.
+
+        Args:
+            rows (int): The number of hashes.
+            words (int): The number of uint64 words per hash.
+
+        Returns:
+            Optional[np.memmap]: A read-only (rows x words) matrix, or None if the store is empty.
+        """
+        if not rows or not words:
+            return None
+
+        return np.memmap(self.matrix_file, dtype=WORD_DTYPE, mode="r", shape=(rows, words))
+
+
+    def load(self, hash_table: HashTable, keep: Sequence[str] = ()) -> HashTable:
+        """
+        Moves the active hash column of a table out of core.
+
+        The store is rewritten if it is missing, older than the cache or
+        lacks a 'keep' column.
+        The returned table shares paths and stats with 'hash_table' and has
+        the active column backed by the memory-mapped file plus the 'keep'
+        columns, so all other in-memory hashes can be released.
+
+        Args:
+            hash_table (HashTable): Hashes loaded from the cache.
+            keep (Sequence[str]): Small columns kept in memory (e.g. coarse cascade hashes).
+
+        Returns:
+            HashTable: The same rows with a memory-mapped active column.
+        """
+        rows, words = hash_table.hashes.shape
+        keep = [name for name in keep if name in hash_table.columns]
+
+        if not self.is_fresh(rows, words, keep):
+            self.write(hash_table, keep)
+
+        matrix = self.open(rows, words)
+
+        if matrix is None:
+            return hash_table
+
+        columns = {self.column: matrix}
+        columns.update({name: hash_table.columns[name] for name in keep if name in hash_table.columns})
+        return HashTable(
+            hash_table.paths, columns, hash_table.sizes, hash_table.mtimes, self.column, hash_table.metrics
+        )
+
+
+    def read(self, words: int, keep: Sequence[str] = ()) -> Optional[HashTable]:
+        """
+        Opens a fresh store without loading the hash cache.
+
+        The rows come from the row table and the active column from the
+        memory-mapped matrix file, so none of the other cached hash columns
+        are read. The caller still has to check that the rows match the
+        files on disk.
+
+        Args:
+            words (int): The expected number of uint64 words per hash.
+            keep (Sequence[str]): Small columns that must be in the row table.
+
+        Returns:
+            Optional[HashTable]: The rows with a memory-mapped active column,
+                or None if the store is missing, stale or empty.
+        """
+        if not self.paths_file.exists():
+            return None
+
+        rows = pq.read_metadata(self.paths_file).num_rows
+
+        if not self.is_fresh(rows, words, keep):
+            return None
+
+        matrix = self.open(rows, words)
+
+        if matrix is None:
+            return None
+
+        hash_table = HashTable.from_arrow(pq.read_table(self.paths_file), {self.column: matrix}, self.column)
+        self.logger.info(f"Opened {rows} hashes out of core from {self.matrix_file.name}")
+        return hash_table
+
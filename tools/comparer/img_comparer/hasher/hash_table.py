@@ -0,0 +1,538 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from services.hamming import WORD_DTYPE, pack_bits
+
+
+class HashTable:
+    """
+    Columnar storage of image hashes used by hashers, caches and indexes.
+
+    Instead of a dictionary of Path objects and small arrays, the hashes are
+    kept as contiguous matrices of packed uint64 words with parallel arrays
+    of paths and file stats. A table may hold several hash columns (e.g.
+    different algorithms computed from one decode); one of them is active
+    and exposed as 'hashes'. Optional per-image values (quality metrics
+    such as sharpness, the source the hashes were computed from) are kept
+    next to the hashes as numeric columns. In Parquet
+    every hash column is stored as a fixed-size binary column and the
+    directory part of the paths is dictionary-encoded, so loading and
+    saving need no per-row Python work.
+
+    Attributes:
+        DIR (str): Parquet column with the dictionary-encoded parent directory
+            (including the trailing separator).
+        NAME (str): Parquet column with the file name.
+        SIZE (str): Parquet column with the file size in bytes.
+        MTIME (str): Parquet column with the modification time in nanoseconds.
+        HASH (str): Default name of the hash column.
+        SHARPNESS (str): Metric column with the variance of the Laplacian.
+        PIXELS (str): Metric column with the original image resolution in pixels.
+        SOURCE (str): Metric column with the image source code of the hashes (see 'BaseHasher.decode').
+        QUALITY (Tuple[str, ...]): Metric columns describing the image quality.
+        METRICS (Tuple[str, ...]): All known metric columns.
+        paths (np.ndarray): Absolute image paths as strings (object array).
+        columns (Dict[str, np.ndarray]): Packed hash matrices (N x words) of uint64 by column name.
+        key (str): Name of the active hash column.
+        sizes (np.ndarray): File sizes in bytes, -1 if unknown.
+        mtimes (np.ndarray): File modification times in nanoseconds, -1 if unknown.
+        metrics (Dict[str, np.ndarray]): Per-image values by column name.
+    """
+    DIR: str = "dir"
+    NAME: str = "name"
+    SIZE: str = "size"
+    MTIME: str = "mtime_ns"
+    HASH: str = "hash"
+    SHARPNESS: str = "sharpness"
+    PIXELS: str = "pixels"
+    SOURCE: str = "source"
+    QUALITY: Tuple[str, ...] = (SHARPNESS, PIXELS)
+    METRICS: Tuple[str, ...] = (*QUALITY, SOURCE)
+
+    def __init__(
+            self,
+            paths: Union[Sequence[str], np.ndarray],
+            hashes: Union[np.ndarray, Dict[str, np.ndarray]],
+            sizes: Optional[np.ndarray] = None,
+            mtimes: Optional[np.ndarray] = None,
+            key: Optional[str] = None,
+            metrics: Optional[Dict[str, np.ndarray]] = None
+    ):
+        """
+        Initializes the table from parallel arrays.
+
+        Args:
+            paths (Union[Sequence[str], np.ndarray]): Image paths.
+            hashes (Union[np.ndarray, Dict[str, np.ndarray]]): Packed hash matrix
+                with one row per path, or several matrices by column name.
+            sizes (Optional[np.ndarray]): File sizes. Unknown if None.
+            mtimes (Optional[np.ndarray]): File modification times in ns. Unknown if None.
+            key (Optional[str]): The active hash column. Defaults to 'hash' for
+                a single matrix and to the first column for a dictionary.
+            metrics (Optional[Dict[str, np.ndarray]]): Per-image values with one value per path.
+
+        Raises:
+            ValueError: If the arrays have different lengths or the key is not a column.
+        """
+        self.paths = np.asarray(paths, dtype=object)
+        size = len(self.paths)
+        columns = hashes if isinstance(hashes, dict) else {key or self.HASH: hashes}
+        self.columns = {name: self._as_matrix(matrix, size) for name, matrix in columns.items()}
+        self.key = key or next(iter(self.columns), self.HASH)
+        self.sizes = np.full(size, -1, dtype=np.int64) if sizes is None else np.asarray(sizes, dtype=np.int64)
+        self.mtimes = np.full(size, -1, dtype=np.int64) if mtimes is None else np.asarray(mtimes, dtype=np.int64)
+        self.metrics = {name: np.asarray(values) for name, values in (metrics or {}).items()}
+
+        if self.key not in self.columns:
+            raise ValueError(f"Hash column '{self.key}' is not in the table columns {list(self.columns)}")
+
+        lengths = {len(matrix) for matrix in self.columns.values()} | {len(self.sizes), len(self.mtimes), size}
+        lengths |= {len(values) for values in self.metrics.values()}
+
+        if len(lengths) != 1:
+            raise ValueError("paths, hashes, sizes and mtimes must have the same length")
+
+
+    @classmethod
+    def from_rows(
+            cls,
+            paths: Sequence[str],
+            rows: Sequence[Dict[str, np.ndarray]],
+            sizes: Optional[np.ndarray] = None,
+            mtimes: Optional[np.ndarray] = None,
+            key: Optional[str] = None
+    ) -> "HashTable":
+        """
+        Builds a table from per-image results of the hashing workers.
+
+        Args:
+            paths (Sequence[str]): Image paths.
+            rows (Sequence[Dict[str, np.ndarray]]): Hashes (and metrics) of every image by column name.
+            sizes (Optional[np.ndarray]): File sizes. Unknown if None.
+            mtimes (Optional[np.ndarray]): File modification times in ns. Unknown if None.
+            key (Optional[str]): The active hash column. Defaults to the first one.
+
+        Returns:
+            HashTable: The table with one row per image.
+        """
+        names = list(rows[0]) if rows else []
+        return cls(
+            paths,
+            {name: np.vstack([row[name] for row in rows]) for name in names if name not in cls.METRICS},
+            sizes,
+            mtimes,
+            key,
+            {name: np.array([row[name] for row in rows]) for name in names if name in cls.METRICS}
+        )
+
+
+    @staticmethod
+    def _as_matrix(hashes: np.ndarray, size: int) -> np.ndarray:
+        """Internal helper: Converts hashes into a 2D matrix of uint64 words."""
+        hashes = np.asarray(hashes, dtype=WORD_DTYPE)
+
+        if hashes.ndim != 2:
+            hashes = hashes.reshape(size, -1) if size else hashes.reshape(0, 0)
+
+        return hashes
+
+
+    @staticmethod
+    def column_name(hash_type: str, core_size: int) -> str:
+        """
+        Builds the name of a hash column.
+
+        Args:
+            hash_type (str): The hashing algorithm (e.g., 'dhash').
+            core_size (int): The hash grid size.
+
+        Returns:
+            str: The column name, e.g. 'dhash_16'.
+        """
+        return f"{hash_type}_{core_size}"
+
+
+    @property
+    def hashes(self) -> np.ndarray:
+        """np.ndarray: The active packed hash matrix (N x words)."""
+        return self.columns[self.key]
+
+
+    def select(self, columns: Sequence[str], key: Optional[str] = None) -> "HashTable":
+        """
+        Returns a table with a subset of hash columns without copying data.
+
+        Args:
+            columns (Sequence[str]): Names of the hash columns to keep.
+            key (Optional[str]): The active column. Defaults to the first one.
+
+        Returns:
+            HashTable: A table sharing paths, stats and hash matrices with this one.
+
+        Raises:
+            KeyError: If a column is not in the table.
+        """
+        missing = [name for name in columns if name not in self.columns]
+
+        if missing:
+            raise KeyError(f"Hash columns {missing} are not in the table")
+
+        return HashTable(
+            self.paths,
+            {name: self.columns[name] for name in columns},
+            self.sizes,
+            self.mtimes,
+            key or columns[0],
+            self.metrics
+        )
+
+
+    def __len__(self) -> int:
+        """Returns the number of stored hashes."""
+        return len(self.paths)
+
+
+    @property
+    def words(self) -> int:
+        """int: Number of uint64 words per hash in the active column."""
+        return self.hashes.shape[1]
+
+
+    @classmethod
+    def empty(cls, words: int = 0) -> "HashTable":
+        """Creates a table without rows."""
+        return cls([], np.empty((0, words), dtype=WORD_DTYPE))
+
+
+    @classmethod
+    def from_dict(
+            cls,
+            hash_map: Dict[Path, np.ndarray],
+            stats: Optional[Dict[Path, Tuple[int, int]]] = None,
+            key: Optional[str] = None
+    ) -> "HashTable":
+        """
+        Builds a single-column table from a dictionary of paths and hashes.
+
+        Boolean (unpacked) hashes are packed into uint64 words.
+
+        Args:
+            hash_map (Dict[Path, np.ndarray]): Paths and their hashes.
+            stats (Optional[Dict[Path, Tuple[int, int]]]): (st_size, st_mtime_ns) per path.
+            key (Optional[str]): The hash column name. Defaults to 'hash'.
+
+        Returns:
+            HashTable: The table with rows in dictionary order.
+
+        Raises:
+            ValueError: If hashes have different lengths.
+        """
+        if not hash_map:
+            return cls.empty()
+
+        stats = stats or {}
+        matrix = np.array(list(hash_map.values()))
+        matrix = pack_bits(matrix) if matrix.dtype == bool else matrix
+        file_stats = np.array([stats.get(path, (-1, -1)) for path in hash_map], dtype=np.int64)
+        return cls([str(path) for path in hash_map], matrix, file_stats[:, 0], file_stats[:, 1], key)
+
+
+    def to_dict(self) -> Dict[Path, np.ndarray]:
+        """Converts the table into a dictionary of Path objects and hashes."""
+        return {Path(path): hash_data for path, hash_data in zip(self.paths, self.hashes)}
+
+
+    def path_list(self, indices: Optional[Iterable[int]] = None) -> List[Path]:
+        """
+        Returns Path objects for selected rows.
+
+        Args:
+            indices (Optional[Iterable[int]]): Row indices. All rows if None.
+
+        Returns:
+            List[Path]: Paths of the selected rows.
+        """
+        paths = self.paths if indices is None else self.paths[np.asarray(indices, dtype=np.int64)]
+        return [Path(path) for path in paths]
+
+
+    def take(self, indices: Union[np.ndarray, Sequence[int]]) -> "HashTable":
+        """
+        Selects rows by index or boolean mask.
+
+        Args:
+            indices (Union[np.ndarray, Sequence[int]]): Row indices or a boolean mask.
+
+        Returns:
+            HashTable: A new table with the selected rows.
+        """
+        indices = np.asarray(indices)
+        return HashTable(
+            self.paths[indices],
+            {name: matrix[indices] for name, matrix in self.columns.items()},
+            self.sizes[indices],
+            self.mtimes[indices],
+            self.key,
+            {name: values[indices] for name, values in self.metrics.items()}
+        )
+
+
+    @classmethod
+    def concat(cls, tables: Iterable["HashTable"]) -> "HashTable":
+        """
+        Joins several tables into one.
+
+        Only hash columns and metrics present in all tables are kept.
+
+        Args:
+            tables (Iterable[HashTable]): Tables to join.
+
+        Returns:
+            HashTable: All rows in input order.
+
+        Raises:
+            ValueError: If the tables have no hash column in common.
+        """
+        tables = [table for table in tables if len(table)]
+
+        if not tables:
+            return cls.empty()
+
+        columns = [name for name in tables[0].columns if all(name in table.columns for table in tables)]
+        key = tables[0].key if tables[0].key in columns else next(iter(columns), None)
+        metrics = [name for name in tables[0].metrics if all(name in table.metrics for table in tables)]
+        return cls(
+            np.concatenate([table.paths for table in tables]),
+            {name: np.vstack([table.columns[name] for table in tables]) for name in columns},
+            np.concatenate([table.sizes for table in tables]),
+            np.concatenate([table.mtimes for table in tables]),
+            key,
+            {name: np.concatenate([table.metrics[name] for table in tables]) for name in metrics}
+        )
+
+
+    def to_arrow(self) -> pa.Table:
+        """
+        Converts the table into an Arrow table for Parquet storage.
+
+        Returns:
+            pa.Table: Columns 'dir' (dictionary), 'name', 'size', 'mtime_ns'
+                one fixed-size binary column (words * 8 bytes) per hash column
+                and one numeric column per metric.
+        """
+        sep = re.escape(os.sep)
+        paths = pa.array(self.paths, type=pa.string())
+        parts = pc.extract_regex(paths, rf"^(?P<{self.DIR}>(?:.*{sep})?)(?P<{self.NAME}>[^{sep}]*)$")
+        data = {
+            self.DIR: parts.field(self.DIR).dictionary_encode(),
+            self.NAME: parts.field(self.NAME),
+            self.SIZE: pa.array(self.sizes, type=pa.int64()),
+            self.MTIME: pa.array(self.mtimes, type=pa.int64()),
+        }
+
+        for name, matrix in self.columns.items():
+            data[name] = pa.FixedSizeBinaryArray.from_buffers(
+                pa.binary(matrix.shape[1] * WORD_DTYPE.itemsize),
+                len(self),
+                [None, pa.py_buffer(np.ascontiguousarray(matrix))]
+            )
+
+        for name, values in self.metrics.items():
+            data[name] = pa.array(values)
+
+        return pa.table(data)
+
+
+    @classmethod
+    def from_arrow(
+            cls,
+            table: Optional[pa.Table],
+            columns: Optional[Dict[str, np.ndarray]] = None,
+            key: Optional[str] = None
+    ) -> "HashTable":
+        """
+        Restores a table from Arrow data loaded from Parquet.
+
+        Every fixed-size binary column becomes a hash column and known
+        metric columns become metrics. Caches written by older versions
+        (a 'path' column and a list 'hash' column) have no hash columns and
+        load as an empty table, so their images are hashed again.
+
+        Args:
+            table (Optional[pa.Table]): Loaded Arrow table or None.
+            columns (Optional[Dict[str, np.ndarray]]): Hash matrices kept outside
+                the Arrow table (e.g. memory-mapped), added to its hash columns.
+            key (Optional[str]): The active hash column. Defaults to the first one.
+
+        Returns:
+            HashTable: The restored hashes, or an empty table.
+        """
+        if table is None or table.num_rows == 0:
+            return cls.empty()
+
+        hash_columns = [field.name for field in table.schema if pa.types.is_fixed_size_binary(field.type)]
+
+        if not hash_columns and not columns:
+            return cls.empty()
+
+        matrices = {name: cls._fixed_binary_to_matrix(table.column(name)) for name in hash_columns}
+        matrices.update(columns or {})
+        return cls(
+            cls.paths_from_arrow(table),
+            matrices,
+            table.column(cls.SIZE).to_numpy(),
+            table.column(cls.MTIME).to_numpy(),
+            key,
+            {name: table.column(name).to_numpy() for name in cls.METRICS if name in table.column_names}
+        )
+
+
+    @classmethod
+    def paths_from_arrow(cls, table: pa.Table) -> np.ndarray:
+        """
+        Joins the 'dir' and 'name' columns of an Arrow table into paths.
+
+        Args:
+            table (pa.Table): A table in the 'to_arrow' layout.
+
+        Returns:
+            np.ndarray: Paths as strings (object array).
+        """
+        dirs = pc.cast(table.column(cls.DIR), pa.string())
+        return pc.binary_join_element_wise(dirs, table.column(cls.NAME), "").to_numpy(zero_copy_only=False)
+
+
+    @staticmethod
+    def _fixed_binary_to_matrix(column: pa.ChunkedArray) -> np.ndarray:
+        """Internal helper: Reinterprets a fixed-size binary column as a uint64 matrix without copying rows."""
+        array = column.combine_chunks()
+        width = array.type.byte_width
+        raw_bytes = np.frombuffer(array.buffers()[1], dtype=np.uint8)
+        start = array.offset * width
+        raw_bytes = raw_bytes[start:start + len(array) * width]
+        return raw_bytes.view(WORD_DTYPE).reshape(len(array), width // WORD_DTYPE.itemsize)
+
+
+class HashBatch:
+    """
+    Results of the hashing workers for a list of images.
+
+    The hashes and metrics are written straight into contiguous columns
+    with one row per image, allocated when the first result arrives, so a
+    run keeps a few matrices instead of a dictionary of small arrays per
+    image. Rows of unreadable images stay unset and are marked in 'is_read'.
+
+    Attributes:
+        is_read (np.ndarray): True for the rows that were hashed (bool).
+        columns (Dict[str, np.ndarray]): Hash matrices and metric arrays by column name.
+    """
+
+    def __init__(self, size: int):
+        """
+        Initializes a batch without results.
+
+        Args:
+            size (int): The number of images.
+        """
+        self.is_read = np.zeros(size, dtype=bool)
+        self.columns = {}
+
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Optional[Dict[str, np.ndarray]]]) -> "HashBatch":
+        """
+        Builds a batch from per-image results.
+
+        Args:
+            rows (Sequence[Optional[Dict[str, np.ndarray]]]): Hashes by column name
+                of every image (None for unreadable images).
+
+        Returns:
+            HashBatch: The batch with one row per result.
+        """
+        batch = cls(len(rows))
+
+        for row, hash_data in enumerate(rows):
+            if hash_data is not None:
+                batch.set(row, hash_data)
+
+        return batch
+
+
+    def __len__(self) -> int:
+        """Returns the number of images in the batch."""
+        return len(self.is_read)
+
+
+    def set(self, row: int, hash_data: Dict[str, np.ndarray]) -> None:
+        """
+        Stores the result of one image.
+
+        Args:
+            row (int): The image row.
+            hash_data (Dict[str, np.ndarray]): Hashes (and metrics) of the image by column name.
+        """
+        for name, value in hash_data.items():
+            if name not in self.columns:
+                value = np.asarray(value)
+                self.columns[name] = np.zeros((len(self), *value.shape), dtype=value.dtype)
+
+            self.columns[name][row] = value
+
+        self.is_read[row] = True
+
+
+    def take(self, indices: Union[np.ndarray, Sequence[int]]) -> "HashBatch":
+        """
+        Selects rows by index or boolean mask.
+
+        Args:
+            indices (Union[np.ndarray, Sequence[int]]): Row indices or a boolean mask.
+
+        Returns:
+            HashBatch: A new batch with the selected rows.
+        """
+        batch = HashBatch(0)
+        batch.is_read = self.is_read[indices]
+        batch.columns = {name: values[indices] for name, values in self.columns.items()}
+        return batch
+
+
+    def to_table(
+            self,
+            paths: Sequence[str],
+            sizes: Optional[np.ndarray] = None,
+            mtimes: Optional[np.ndarray] = None,
+            key: Optional[str] = None
+    ) -> HashTable:
+        """
+        Converts the hashed rows into a table.
+
+        Args:
+            paths (Sequence[str]): Image paths with one path per row of the batch.
+            sizes (Optional[np.ndarray]): File sizes per row. Unknown if None.
+            mtimes (Optional[np.ndarray]): File modification times in ns per row. Unknown if None.
+            key (Optional[str]): The active hash column. Defaults to the first one.
+
+        Returns:
+            HashTable: The table without the rows of unreadable images.
+        """
+        rows = np.flatnonzero(self.is_read)
+
+        if not rows.size:
+            return HashTable.empty()
+
+        return HashTable(
+            np.asarray(paths, dtype=object)[rows],
+            {name: values[rows] for name, values in self.columns.items() if name not in HashTable.METRICS},
+            None if sizes is None else np.asarray(sizes)[rows],
+            None if mtimes is None else np.asarray(mtimes)[rows],
+            key,
+            {name: values[rows] for name, values in self.columns.items() if name in HashTable.METRICS}
+        )
@@ -0,0 +1,302 @@
+import json
+import multiprocessing
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from const_utils.default_values import AppSettings
+from const_utils.xml_names import XMLNames
+from logger.logger import LoggerConfigurator
+from services.hamming import WORD_DTYPE, words_count
+from tools.annotation_converter.reader.voc import XMLReader
+from tools.annotation_converter.reader.yolo import TXTReader
+from tools.comparer.img_comparer.hasher.base_hasher import BaseHasher
+from tools.comparer.img_comparer.index.base_index import HashPairs
+
+
+class ObjectCrops(NamedTuple):
+    """
+    Hashes of annotated object crops.
+
+    Attributes:
+        image_rows (np.ndarray): The row of the image of every crop in the hashed image list (int64).
+        labels (np.ndarray): The class name (VOC) or class id (YOLO) of every crop.
+        boxes (np.ndarray): Crop boxes as (xmin, ymin, xmax, ymax) in pixels (N x 4, int32).
+        hashes (np.ndarray): Packed hashes of the crops (N x words).
+    """
+    image_rows: np.ndarray
+    labels: np.ndarray
+    boxes: np.ndarray
+    hashes: np.ndarray
+
+
+class ObjectHasher:
+    """
+    Hashes the annotated objects of images, so pasted object crops can be matched.
+
+    The boxes are read from Pascal VOC (.xml) or YOLO (.txt) annotations
+    with the same stem as the image, in 'a_source' or next to the image.
+    Every image is decoded once in a worker process and all its crops are
+    hashed from that decode with the 'hash_image' of the configured
+    hasher, so the cost stays close to hashing the whole images. Crops
+    with a side below 'MIN_SIDE' pixels are skipped, since their hashes
+    match almost anything. The crop hashes are searched like image hashes
+    and the matches are reported as pairs of (image, box).
+
+    Attributes:
+        READERS (Dict[str, type]): Annotation readers by file suffix, in lookup order.
+        MIN_SIDE (int): The smallest hashed crop side in pixels.
+        IMAGE (str): Report column with the image path.
+        LABEL (str): Report column with the object class.
+        BOX (Tuple[str, ...]): Report columns with the box coordinates.
+        DUPLICATE (str): Prefix of the report columns of the matched object.
+        DISTANCE (str): Report column with the distance in bits.
+        settings (AppSettings): Global configuration for paths and parameters.
+        logger (logging.Logger): Logger instance for object hashing.
+        hasher (BaseHasher): The hasher whose algorithm and core size are used.
+        annotation_dir (Optional[Path]): The annotation folder; None means next to the images.
+    """
+    READERS: Dict[str, type] = {".xml": XMLReader, ".txt": TXTReader}
+    MIN_SIDE: int = 16
+    IMAGE: str = "image"
+    LABEL: str = "label"
+    BOX: Tuple[str, ...] = (XMLNames.xmin, XMLNames.ymin, XMLNames.xmax, XMLNames.ymax)
+    DUPLICATE: str = "duplicate_"
+    DISTANCE: str = "distance"
+
+    def __init__(self, settings: AppSettings, hasher: BaseHasher):
+        """
+        Initializes the object hasher.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+            hasher (BaseHasher): The hasher whose algorithm and core size are used.
+        """
+        self.settings = settings
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+        self.hasher = hasher
+        self.annotation_dir = Path(self.settings.a_source) if self.settings.a_source else None
+
+
+    @classmethod
+    def annotation_file(cls, image_path: Path, annotation_dir: Optional[Path] = None) -> Optional[Path]:
+        """
+        Finds the annotation file of an image.
+
+        Args:
+            image_path (Path): Path to the image file.
+            annotation_dir (Optional[Path]): The annotation folder; None means next to the image.
+
+        Returns:
+            Optional[Path]: The first existing '.xml' or '.txt' file with the image stem, or None.
+        """
+        folder = image_path.parent if annotation_dir is None else annotation_dir
+
+        for suffix in cls.READERS:
+            annotation_path = folder / f"{image_path.stem}{suffix}"
+
+            if annotation_path.is_file():
+                return annotation_path
+
+        return None
+
+
+    @classmethod
+    def read_boxes(cls, annotation_path: Path, width: int, height: int) -> Tuple[List[str], np.ndarray]:
+        """
+        Reads the object boxes of an annotation file in pixels of the image.
+
+        VOC boxes are absolute, YOLO boxes are normalized and scaled by the
+        image size. The boxes are clipped to the image.
+
+        Args:
+            annotation_path (Path): A VOC or YOLO annotation file.
+            width (int): The image width in pixels.
+            height (int): The image height in pixels.
+
+        Returns:
+            Tuple[List[str], np.ndarray]: The labels and the boxes (N x 4, int32).
+        """
+        data = cls.READERS[annotation_path.suffix]().read(annotation_path)
+        labels, boxes = [], []
+
+        if annotation_path.suffix == ".xml":
+            objects = (data.get(XMLNames.annotation) or {}).get(XMLNames.object, [])
+
+            # xmltodict returns a dict if there is just one object
+            for obj in objects if isinstance(objects, list) else [objects]:
+                bbox = obj[XMLNames.bndbox]
+                labels.append(str(obj[XMLNames.name]))
+                boxes.append([float(bbox[name]) for name in cls.BOX])
+        else:
+            for line in data:
+                class_id, x_center, y_center, box_width, box_height = line.split()[:5]
+                x_center, box_width = float(x_center) * width, float(box_width) * width
+                y_center, box_height = float(y_center) * height, float(box_height) * height
+                labels.append(class_id)
+                boxes.append([
+                    x_center - box_width / 2, y_center - box_height / 2,
+                    x_center + box_width / 2, y_center + box_height / 2
+                ])
+
+        boxes = np.round(np.array(boxes, dtype=np.float64).reshape(-1, 4))
+        boxes = np.clip(boxes, 0, [width, height, width, height]).astype(np.int32)
+        return labels, boxes
+
+
+    @classmethod
+    def hash_crops(
+            cls,
+            image_path: Path,
+            annotation_path: Path,
+            hasher: type,
+            core_size: int
+    ) -> Optional[Tuple[List[str], np.ndarray, np.ndarray]]:
+        """
+        Decodes an image once and hashes all its annotated objects.
+
+        Args:
+            image_path (Path): Path to the image file.
+            annotation_path (Path): Its VOC or YOLO annotation file.
+            hasher (type): The 'BaseHasher' subclass that computes the hashes.
+            core_size (int): The hash grid size.
+
+        Returns:
+            Optional[Tuple[List[str], np.ndarray, np.ndarray]]: The labels, boxes
+                and packed hashes of the hashed crops, or None if the image or
+                the annotation cannot be read.
+        """
+        image = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+
+        if image is None:
+            return None
+
+        try:
+            labels, boxes = cls.read_boxes(annotation_path, image.shape[1], image.shape[0])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        is_large = np.minimum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]) >= cls.MIN_SIDE
+        rows = np.flatnonzero(is_large)
+        hashes = [
+            hasher.hash_image(np.ascontiguousarray(image[ymin:ymax, xmin:xmax]), core_size)
+            for xmin, ymin, xmax, ymax in boxes[rows]
+        ]
+        matrix = np.vstack(hashes) if hashes else np.empty((0, words_count(core_size ** 2)), dtype=WORD_DTYPE)
+        return [labels[row] for row in rows], boxes[rows], matrix
+
+
+    @classmethod
+    def _crop_worker(
+            cls,
+            task: Tuple[int, Path],
+            hasher: type,
+            core_size: int,
+            annotation_dir: Optional[Path]
+    ) -> Tuple[int, Optional[Tuple[List[str], np.ndarray, np.ndarray]]]:
+        """Internal helper: Hashes the crops of one image in a worker process and returns them with its row number."""
+        row, image_path = task
+        annotation_path = cls.annotation_file(image_path, annotation_dir)
+
+        if annotation_path is None:
+            return row, None
+
+        return row, cls.hash_crops(image_path, annotation_path, hasher, core_size)
+
+
+    def hash_objects(self, image_paths: Tuple[Path, ...]) -> ObjectCrops:
+        """
+        Hashes the annotated objects of all images on 'n_jobs' processes.
+
+        Images without an annotation file, unreadable images and their
+        annotations are skipped.
+
+        Args:
+            image_paths (Tuple[Path, ...]): The images to hash.
+
+        Returns:
+            ObjectCrops: The crops of all images in the order of 'image_paths'.
+        """
+        results = [None] * len(image_paths)
+        crop_func = partial(
+            self.__class__._crop_worker,
+            hasher=self.hasher.__class__,
+            core_size=self.hasher.core_size,
+            annotation_dir=self.annotation_dir
+        )
+
+        with multiprocessing.Pool(processes=self.hasher.n_jobs) as pool:
+            for row, result in pool.imap_unordered(crop_func, enumerate(image_paths), self.hasher.chunksize):
+                results[row] = result
+
+        rows = [row for row, result in enumerate(results) if result is not None]
+        words = words_count(self.hasher.core_size ** 2)
+        crops = ObjectCrops(
+            np.concatenate([np.full(len(results[row][0]), row, dtype=np.int64) for row in rows] or
+                           [np.empty(0, dtype=np.int64)]),
+            np.array([label for row in rows for label in results[row][0]], dtype=object),
+            np.vstack([results[row][1] for row in rows] or [np.empty((0, 4), dtype=np.int32)]),
+            np.vstack([results[row][2] for row in rows] or [np.empty((0, words), dtype=WORD_DTYPE)])
+        )
+        self.logger.info(f"Hashed {len(crops.hashes)} objects in {len(rows)} of {len(image_paths)} annotated images")
+        return crops
+
+
+    def build_report(self, image_paths: Tuple[Path, ...], crops: ObjectCrops, pairs: HashPairs) -> pa.Table:
+        """
+        Describes every matched pair of objects, nearest pairs first.
+
+        Args:
+            image_paths (Tuple[Path, ...]): The hashed images.
+            crops (ObjectCrops): The hashed crops.
+            pairs (HashPairs): Matched pairs of crop rows.
+
+        Returns:
+            pa.Table: The image, label and box of both objects and their distance.
+        """
+        order = np.lexsort((pairs.second, pairs.first, pairs.distance))
+        paths = np.array([str(path) for path in image_paths], dtype=object)
+        columns = {}
+
+        for prefix, crop_rows in (("", pairs.first[order]), (self.DUPLICATE, pairs.second[order])):
+            columns[f"{prefix}{self.IMAGE}"] = pa.array(paths[crops.image_rows[crop_rows]].tolist(), pa.string())
+            columns[f"{prefix}{self.LABEL}"] = pa.array(crops.labels[crop_rows].tolist(), pa.string())
+
+            for position, name in enumerate(self.BOX):
+                columns[f"{prefix}{name}"] = pa.array(crops.boxes[crop_rows, position], pa.int32())
+
+        columns[self.DISTANCE] = pa.array(pairs.distance[order], pa.int32())
+        return pa.table(columns)
+
+
+    def save(self, report: pa.Table, name: str) -> Tuple[Path, Path]:
+        """
+        Writes the matched objects to 'report_path' as Parquet and JSON.
+
+        Args:
+            report (pa.Table): The pairs from 'build_report'.
+            name (str): The base name of the report files.
+
+        Returns:
+            Tuple[Path, Path]: Paths of the Parquet and the JSON file.
+        """
+        report_dir = Path(self.settings.report_path)
+        report_dir.mkdir(parents=True, exist_ok=True)
+        parquet_file = report_dir / f"{name}_objects.parquet"
+        json_file = report_dir / f"{name}_objects.json"
+        pq.write_table(report, parquet_file, compression="snappy")
+
+        with open(json_file, "w", encoding="utf-8") as file:
+            json.dump(report.to_pylist(), file, indent=2)
+
+        self.logger.info(f"Saved {report.num_rows} object pairs to {parquet_file} and {json_file.name}")
+        return parquet_file, json_file
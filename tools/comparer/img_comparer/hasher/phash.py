@@ -0,0 +1,42 @@
+import cv2
+import numpy as np
+
+from const_utils.copmarer import Constants
+from services.hamming import pack_bits
+from tools.comparer.img_comparer.hasher.base_hasher import BaseHasher
+
+
+class PHash(BaseHasher):
+    """
+    Implementation of the pHash (Perceptual Hashing) algorithm.
+
+    The image is shrunk to a grid 'HIGHFREQ_FACTOR' times larger than the
+    hash, transformed with a 2D DCT, and only the lowest core_size x
+    core_size frequencies are kept. Every bit shows whether a coefficient is
+    above their median. Being based on the image structure rather than on
+    pixel values, it tolerates gamma, contrast and compression changes well.
+
+    Attributes:
+        HIGHFREQ_FACTOR (int): How many times the DCT input is larger than the hash grid.
+    """
+    HASH_TYPE: str = Constants.phash
+    HIGHFREQ_FACTOR: int = 4
+
+    @staticmethod
+    def hash_image(image: np.ndarray, core_size: int) -> np.ndarray:
+        """
+        Calculates the pHash of a decoded grayscale image.
+
+        Args:
+            image (np.ndarray): A 2D uint8 grayscale image.
+            core_size (int): The size of the kept low-frequency block. The
+                hash length is core_size squared.
+
+        Returns:
+            np.ndarray: A 1D NumPy array of ceil(core_size^2 / 64) uint64
+                words representing the packed hash.
+        """
+        side = core_size * PHash.HIGHFREQ_FACTOR
+        resized_image = cv2.resize(image, (side, side), interpolation=cv2.INTER_AREA).astype(np.float32)
+        low_frequencies = cv2.dct(resized_image)[:core_size, :core_size]
+        return pack_bits((low_frequencies > np.median(low_frequencies)).flatten())
@@ -0,0 +1,195 @@
+import hashlib
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from const_utils.default_values import AppSettings
+from logger.logger import LoggerConfigurator
+from tools.cache import CacheIO
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+
+
+class ReferenceStore:
+    """
+    A persistent hash store of reference folders (e.g. a curated training set).
+
+    The store is built from the Parquet caches that 'dedup' already keeps
+    for every folder, so reference images are never hashed again. The
+    requested hash column of all sources is merged into one Parquet file
+    in 'cache_file_path'; it is rebuilt only when a source cache is newer.
+    Incoming images are matched against the store with a cross search,
+    which costs O(new x reference) instead of a search over the combined set.
+
+    Attributes:
+        settings (AppSettings): Global configuration for paths and parameters.
+        logger (logging.Logger): Logger instance for reference queries.
+        cache_io (CacheIO): Tool for saving and loading Parquet files.
+        sources (List[Path]): Parquet cache files of the reference folders.
+        column (str): The stored hash column (e.g., 'dhash_16').
+    """
+    def __init__(self, settings: AppSettings, cache_io: CacheIO, sources: Sequence[Path], column: str):
+        """
+        Initializes the store for a set of reference caches.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+            cache_io (CacheIO): Tool for saving and loading Parquet files.
+            sources (Sequence[Path]): Parquet cache files of the reference folders.
+            column (str): The hash column used for matching.
+        """
+        self.settings = settings
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+        self.cache_io = cache_io
+        self.sources = sorted({Path(source).resolve() for source in sources})
+        self.column = column
+
+
+    @property
+    def store_file(self) -> Path:
+        """Path: The merged Parquet store, named after its sources and column."""
+        sources_key = "\n".join(str(source) for source in self.sources)
+        sources_hash = hashlib.md5(sources_key.encode("utf-8")).hexdigest()
+        return self.settings.cache_file_path / f"reference_{sources_hash}_{self.column}{CacheIO.SUFFIX}"
+
+
+    def is_fresh(self) -> bool:
+        """
+        Checks whether the merged store is newer than all source caches.
+
+        A missing source makes the store stale, so 'build' reports it
+        instead of a stale store being reused.
+
+        Returns:
+            bool: True if the store and all sources exist and no source was updated after it.
+        """
+        if not self.store_file.exists():
+            return False
+
+        missing = [source for source in self.sources if not source.exists()]
+
+        if missing:
+            self.logger.warning(f"Reference store {self.store_file.name} is stale: missing sources {missing}")
+            return False
+
+        store_mtime = self.store_file.stat().st_mtime_ns
+        return all(source.stat().st_mtime_ns <= store_mtime for source in self.sources)
+
+
+    def build(self) -> HashTable:
+        """
+        Merges the hash column of all source caches and saves the store.
+
+        Returns:
+            HashTable: Reference paths and hashes.
+
+        Raises:
+            FileNotFoundError: If a source cache does not exist.
+            ValueError: If a source cache has no hashes in the requested column.
+        """
+        tables = []
+
+        for source in self.sources:
+            if not source.exists():
+                msg = f"Reference cache {source} does not exist. Run 'dedup' on the reference folder first"
+                self.logger.error(msg)
+                raise FileNotFoundError(msg)
+
+            table = HashTable.from_arrow(self.cache_io.load_table(source))
+
+            if len(table) and self.column not in table.columns:
+                msg = (f"Reference cache {source.name} has no '{self.column}' hashes (only {list(table.columns)}). "
+                       f"Run 'dedup' on the reference folder with this method and core size first")
+                self.logger.error(msg)
+                raise ValueError(msg)
+
+            if len(table):
+                tables.append(table.select([self.column]))
+
+        store = HashTable.concat(tables)
+        self.cache_io.save(store.to_arrow(), self.store_file)
+        self.logger.info(f"Built reference store of {len(store)} images from {len(self.sources)} caches")
+        return store
+
+
+    def load(self) -> HashTable:
+        """
+        Returns the reference hashes, rebuilding the store if it is outdated.
+
+        Returns:
+            HashTable: Reference paths and hashes.
+        """
+        if not self.is_fresh():
+            return self.build()
+
+        store = HashTable.from_arrow(self.cache_io.load_table(self.store_file))
+        self.logger.info(f"Loaded reference store of {len(store)} images from {self.store_file.name}")
+        return store
+
+
+    def query(
+            self,
+            hash_table: HashTable,
+            reference: HashTable,
+            search_index: BaseIndex,
+            threshold: int,
+            confirm: Optional[Callable[[HashPairs], HashPairs]] = None
+    ) -> np.ndarray:
+        """
+        Finds images that near-duplicate any reference image.
+
+        Images that are themselves part of the reference (the same path) are
+        never reported.
+
+        Args:
+            hash_table (HashTable): Hashes of the incoming images.
+            reference (HashTable): Reference hashes from 'load'.
+            search_index (BaseIndex): Search strategy for the cross search.
+            threshold (int): The maximal distance in bits for a match.
+            confirm (Optional[Callable[[HashPairs], HashPairs]]): Filters the pairs of an
+                image row and a reference row (e.g. 'BaseHasher.confirm_cross_pairs').
+
+        Returns:
+            np.ndarray: Sorted row indices of matching images in 'hash_table'.
+        """
+        if not len(hash_table) or not len(reference):
+            return np.empty(0, dtype=np.int64)
+
+        pairs = search_index.find_cross_pairs(hash_table.hashes, reference.hashes, threshold)
+        is_other = hash_table.paths[pairs.first] != reference.paths[pairs.second]
+        pairs = HashPairs(pairs.first[is_other], pairs.second[is_other], pairs.distance[is_other])
+
+        if confirm is not None:
+            pairs = confirm(pairs)
+
+        rows = np.unique(pairs.first)
+        self.logger.info(
+            f"Reference search: {len(rows)} of {len(hash_table)} images match {len(reference)} reference images"
+        )
+        return rows
+
+
+    @staticmethod
+    def source_file(settings: AppSettings, reference: Path) -> Path:
+        """
+        Finds the Parquet cache of a '--reference' entry.
+
+        Args:
+            settings (AppSettings): Configuration containing 'cache_file_path'.
+            reference (Path): A reference folder or a Parquet cache file.
+
+        Returns:
+            Path: The entry itself for a Parquet file, otherwise the default
+                cache file of the folder in 'cache_file_path'.
+        """
+        reference = Path(reference)
+
+        if reference.suffix == CacheIO.SUFFIX:
+            return reference
+
+        return settings.cache_file_path / CacheIO.generate_cache_filename(reference.resolve(), cache_name=None)
@@ -0,0 +1,45 @@
+import cv2
+import numpy as np
+
+from const_utils.copmarer import Constants
+from services.hamming import pack_bits
+from tools.comparer.img_comparer.hasher.base_hasher import BaseHasher
+
+
+class WHash(BaseHasher):
+    """
+    Implementation of the wHash (Wavelet Hashing) algorithm with the Haar wavelet.
+
+    The image is shrunk to a square grid of core_size * 2^HAAR_LEVELS pixels.
+    The coarsest approximation (the global mean) is removed, and the Haar
+    approximation (LL) band after 'HAAR_LEVELS' decomposition steps gives a
+    core_size x core_size grid. Every bit shows whether a coefficient is
+    above their median, which makes the hash insensitive to global
+    brightness shifts.
+
+    Attributes:
+        HAAR_LEVELS (int): Number of Haar decomposition steps down to the hash grid.
+    """
+    HASH_TYPE: str = Constants.whash
+    HAAR_LEVELS: int = 2
+
+    @staticmethod
+    def hash_image(image: np.ndarray, core_size: int) -> np.ndarray:
+        """
+        Calculates the wHash of a decoded grayscale image.
+
+        Args:
+            image (np.ndarray): A 2D uint8 grayscale image.
+            core_size (int): The size of the LL band. The hash length is core_size squared.
+
+        Returns:
+            np.ndarray: A 1D NumPy array of ceil(core_size^2 / 64) uint64
+                words representing the packed hash.
+        """
+        block = 2 ** WHash.HAAR_LEVELS
+        side = core_size * block
+        resized_image = cv2.resize(image, (side, side), interpolation=cv2.INTER_AREA).astype(np.float32) / 255
+        resized_image -= resized_image.mean()
+        # the Haar LL band after N steps is the (scaled) mean of 2^N x 2^N blocks
+        approximation = resized_image.reshape(core_size, block, core_size, block).mean(axis=(1, 3))
+        return pack_bits((approximation > np.median(approximation)).flatten())
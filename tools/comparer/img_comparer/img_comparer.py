@@ -1,10 +1,35 @@
+import os
+from functools import partial
 from pathlib import Path
-from typing import Tuple, List
+from typing import Callable, Tuple, List, Optional, Dict, Iterator, Type
+
+import numpy as np
+import pyarrow as pa
 
 from const_utils.copmarer import Constants
 from const_utils.default_values import AppSettings
 from logger.logger import LoggerConfigurator
+from services.hamming import words_count
+from tools.comparer.img_comparer.hasher.base_hasher import BaseHasher
+from tools.comparer.img_comparer.hasher.ahash import AHash
 from tools.comparer.img_comparer.hasher.dhash import DHash
+from tools.comparer.img_comparer.hasher.hash_store import HashStore
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+from tools.comparer.img_comparer.hasher.object_hasher import ObjectHasher
+from tools.comparer.img_comparer.hasher.phash import PHash
+from tools.comparer.img_comparer.hasher.reference_store import ReferenceStore
+from tools.comparer.img_comparer.hasher.whash import WHash
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+from tools.comparer.img_comparer.index.cascade_index import CascadeIndex
+from tools.comparer.img_comparer.index.dedup_index import DedupIndex
+from tools.comparer.img_comparer.index.duplicate_clusters import DuplicateClusters
+from tools.comparer.img_comparer.index.invariant_index import InvariantIndex
+from tools.comparer.img_comparer.index.linear_index import LinearIndex
+from tools.comparer.img_comparer.index.mih_index import MultiIndexHashing
+from tools.comparer.img_comparer.index.neighbour_graph import NeighbourGraph
+from tools.comparer.img_comparer.index.sharded_index import ShardedIndex
+from tools.comparer.img_comparer.index.temporal_index import TemporalIndex
+from tools.comparer.img_comparer.index.tiled_index import TiledIndex
 
 
 class ImageComparer:
@@ -12,7 +37,9 @@ class ImageComparer:
     An orchestrator for comparing images using different hashing algorithms.
 
     This class acts as a manager that selects a specific hashing strategy
-    (like dHash) based on the project settings. It coordinates the process
+    (like dHash) based on the project settings. Additional algorithms from
+    'hash_methods' are attached to it as companions, so they are computed
+    from the same decode and cached together. It coordinates the process
     of generating hashes and identifying duplicate files.
 
     Attributes:
@@ -21,6 +48,10 @@ class ImageComparer:
         method_mapping (Dict): A map that links algorithm names to their
             corresponding classes.
         method (BaseHasher): An instance of the selected hashing algorithm.
+        index_mapping (Dict): A map that links search strategy names to their
+            corresponding index classes.
+        dedup_index (Optional[DedupIndex]): Duplicate-free hashes of the previous
+            cycle, used in the incremental repeat mode.
         logger (logging.Logger): Logger instance for tracking comparison tasks.
     """
     def __init__(self, settings: AppSettings):
@@ -34,37 +65,715 @@ class ImageComparer:
         super().__init__()
         self.settings = settings
 
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+
         self.method_mapping = {
             Constants.dhash: DHash,
+            Constants.phash: PHash,
+            Constants.ahash: AHash,
+            Constants.whash: WHash,
         }
 
-        self.method = self.method_mapping[self.settings.method](
+        self.method = self.get_hasher_class(self.settings.method)(
             settings=self.settings,
         )
+        self.method.companions = tuple(self.get_hasher_class(name) for name in self.settings.hash_methods)
 
-        self.logger = LoggerConfigurator.setup(
-            name=self.__class__.__name__,
-            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
-            log_level=self.settings.log_level
-        )
+        if self.settings.cascade:
+            self.method.hash_pyramid = tuple(sorted({*self.method.hash_pyramid, CascadeIndex.COARSE_SIZE}))
+
+        self.index_mapping = {
+            Constants.linear: LinearIndex,
+            Constants.mih: MultiIndexHashing,
+            Constants.tiled: TiledIndex,
+        }
+        self.dedup_index: Optional[DedupIndex] = None
 
 
-    def compare(self, file_paths: Tuple[Path]) -> List[Path]:
+    def get_hasher_class(self, name: str) -> Type[BaseHasher]:
+        """
+        Finds the hashing algorithm by its name.
+
+        Args:
+            name (str): The algorithm name (e.g., 'dhash').
+
+        Returns:
+            Type[BaseHasher]: The hasher class.
+
+        Raises:
+            ValueError: If the algorithm is unknown.
+        """
+        if name not in self.method_mapping:
+            msg = f"Unknown hashing method '{name}'. Use one of: {list(self.method_mapping)}"
+            self.logger.error(msg)
+            raise ValueError(msg)
+
+        return self.method_mapping[name]
+
+
+    def compare(
+            self,
+            file_paths: Tuple[Path],
+            files_stats: Optional[Dict[Path, os.stat_result]] = None
+    ) -> List[Path]:
         """
         Compares files using the each-with-each principle to find duplicates.
 
-        The process consists of two steps:
+        The process consists of three steps:
         1. Building a hash map for all provided files.
-        2. Analyzing the hash map to find matches that satisfy the
+        2. Selecting a search index for the number of hashes and threshold
+           (wrapped into a coarse-to-fine cascade if enabled).
+        3. Analyzing the hash map to find matches that satisfy the
            Hamming distance threshold.
 
+        In repeat mode with 'incremental' on, steps 2 and 3 search only the
+        images that are new since the previous cycle (see 'find_new_duplicates'
+        and 'is_incremental').
+        In the 'out_of_core' mode the searched hashes are served from a
+        memory-mapped file (see 'load_hashes').
+        If 'reference' folders are set, the images are matched against them
+        instead of each other (see 'find_reference_duplicates'). With a
+        'temporal_window' video frames are compared only with their
+        neighbours (see 'find_temporal_duplicates'). With a 'graph_threshold'
+        the pairs are read from (or saved to) a neighbour graph (see 'get_graph_pairs').
+        With 'keep_best' the matches are grouped into clusters and the best
+        image of every cluster is kept (see 'find_clustered_duplicates').
+        With a 'shard_dir' the search is shared with other processes (see
+        'find_sharded_duplicates').
+
         Args:
             file_paths (Tuple[Path]): A collection of paths to the image files
                 to be compared.
+            files_stats (Optional[Dict[Path, os.stat_result]]): Stats gathered
+                during the directory scan, used to detect changed files in cache.
 
         Returns:
             List[Path]: A list of file paths that are identified as duplicates.
         """
-        hash_map = self.method.get_hashmap(file_paths)
+        hash_map = self.load_hashes(file_paths, files_stats)
+
+        if self.settings.reference:
+            return self.find_reference_duplicates(hash_map)
+
+        if self.settings.temporal_window:
+            return self.find_temporal_duplicates(hash_map)
+
+        if self.is_incremental():
+            return self.find_new_duplicates(file_paths, hash_map)
+
+        if self.settings.shard_dir is not None:
+            return self.find_sharded_duplicates(hash_map)
+
+        if self.settings.graph_threshold is not None:
+            pairs = self.get_graph_pairs(file_paths, hash_map)
+
+            if pairs is not None:
+                pairs = self.confirm(hash_map, pairs)
+
+            if pairs is not None and self.settings.keep_best:
+                return self.find_clustered_duplicates(file_paths, hash_map, pairs)
+
+            if pairs is not None:
+                duplicates = hash_map.path_list(BaseIndex.resolve_duplicates(pairs, len(hash_map)))
+                self.logger.info(f"Graph search finished. Found {len(duplicates)} duplicates.")
+                return duplicates
+
+        if self.settings.keep_best:
+            return self.find_clustered_duplicates(file_paths, hash_map)
+
+        self.method.index = self.select_index(len(hash_map), hash_map)
         matches = self.method.find_duplicates(hash_map)
         return matches
+
+
+    def is_incremental(self) -> bool:
+        """
+        Checks if the incremental repeat mode is used for the next search.
+
+        The dedup index only keeps the first-seen result of a plain search,
+        so the full search is run instead (with a warning) when clusters,
+        the neighbour graph or the sharded search are requested.
+
+        Returns:
+            bool: True if only new images are searched (see 'find_new_duplicates').
+        """
+        if not (self.settings.repeat and self.settings.incremental):
+            return False
+
+        conflicts = [
+            name for name, is_set in (
+                ("--keep_best", self.settings.keep_best),
+                ("--graph_threshold", self.settings.graph_threshold is not None),
+                ("--shard_dir", self.settings.shard_dir is not None),
+            ) if is_set
+        ]
+
+        if conflicts:
+            self.logger.warning(f"--incremental is not used with {', '.join(conflicts)}, searching all images")
+            return False
+
+        return True
+
+
+    def confirmation(self, hash_table: HashTable) -> Optional[Callable[[HashPairs], HashPairs]]:
+        """
+        Returns the 'exif_confirm' pass for pairs of rows of a table.
+
+        Every search mode filters its pairs with it before the duplicates
+        are selected, so thumbnail matches are confirmed the same way as in
+        'BaseHasher.find_duplicates'.
+
+        Args:
+            hash_table (HashTable): The searched hashes.
+
+        Returns:
+            Optional[Callable[[HashPairs], HashPairs]]: 'BaseHasher.confirm_pairs'
+                bound to the table, or None if 'exif_confirm' is off.
+        """
+        return partial(self.method.confirm_pairs, hash_table) if self.method.exif_confirm else None
+
+
+    def confirm(self, hash_table: HashTable, pairs: HashPairs) -> HashPairs:
+        """
+        Applies the 'exif_confirm' pass to pairs of rows of a table.
+
+        Args:
+            hash_table (HashTable): The searched hashes.
+            pairs (HashPairs): Matched pairs of rows of 'hash_table'.
+
+        Returns:
+            HashPairs: The confirmed pairs, or 'pairs' if 'exif_confirm' is off.
+        """
+        confirmation = self.confirmation(hash_table)
+        return pairs if confirmation is None else confirmation(pairs)
+
+
+    def warn_not_invariant(self, mode: str) -> None:
+        """
+        Warns that flipped and rotated copies are not matched in a search mode.
+
+        The reference, temporal and sharded searches compare only the
+        ordinary hashes ('--temporal_global' still uses the dihedral hashes
+        in its pass over the kept frames).
+
+        Args:
+            mode (str): The option of the search mode, e.g. '--reference'.
+        """
+        if self.settings.invariant:
+            self.logger.warning(f"--invariant is not used with {mode}, flipped and rotated copies are not matched")
+
+
+    def iter_duplicates(
+            self,
+            file_paths: Tuple[Path],
+            files_stats: Optional[Dict[Path, os.stat_result]] = None
+    ) -> Iterator[List[Path]]:
+        """
+        Yields duplicates in batches as soon as they are final.
+
+        The standard search is streamed band by band (see
+        'BaseIndex.iter_duplicates'), so the caller can remove the first
+        duplicates while later bands are still compared. The result is the
+        same as of 'compare'. Modes that need all matches before deciding
+        (reference, temporal, incremental, sharded, graph and cluster search) are
+        run by 'compare' and yielded as one batch.
+
+        Args:
+            file_paths (Tuple[Path]): A collection of paths to the image files.
+            files_stats (Optional[Dict[Path, os.stat_result]]): Stats gathered during the directory scan.
+
+        Yields:
+            List[Path]: The next batch of duplicates.
+        """
+        is_streamable = not (
+            self.settings.reference
+            or self.settings.temporal_window
+            or self.settings.graph_threshold is not None
+            or self.settings.keep_best
+            or self.settings.shard_dir is not None
+            or self.is_incremental()
+        )
+
+        if not is_streamable:
+            self.logger.warning("The selected search mode is not streamed, duplicates are reported in one batch")
+            yield self.compare(file_paths, files_stats)
+            return
+
+        hash_map = self.load_hashes(file_paths, files_stats)
+
+        index = self.select_index(len(hash_map), hash_map)
+        found = 0
+
+        for rows in index.iter_duplicates(hash_map.hashes, self.method.threshold, confirm=self.confirmation(hash_map)):
+            found += len(rows)
+
+            if len(rows):
+                yield hash_map.path_list(rows)
+
+        self.logger.info(f"Streamed search finished. Found {found} duplicates.")
+
+
+    def find_clustered_duplicates(
+            self,
+            file_paths: Tuple[Path],
+            hash_table: HashTable,
+            pairs: Optional[HashPairs] = None
+    ) -> List[Path]:
+        """
+        Groups matches into clusters and reports all but the best image of each.
+
+        The clusters are connected components of the match graph, so chains
+        of near-duplicates end up in one cluster. The kept image is chosen
+        by resolution and sharpness measured in the hashing pass. The
+        clusters are saved to 'report_path' as Parquet and JSON.
+
+        Args:
+            file_paths (Tuple[Path]): All image paths of the folder.
+            hash_table (HashTable): Hashes and quality metrics of all current images.
+            pairs (Optional[HashPairs]): Matched pairs, e.g. from the neighbour graph.
+                If None, they are searched with the configured index.
+
+        Returns:
+            List[Path]: Clustered images except the kept one of every cluster.
+        """
+        if not len(hash_table):
+            return []
+
+        if pairs is None:
+            index = self.select_index(len(hash_table), hash_table)
+            pairs = self.confirm(hash_table, index.find_pairs(hash_table.hashes, self.method.threshold))
+
+        clusters = DuplicateClusters(self.settings)
+        duplicate_rows, cluster_table = clusters.build(pairs, hash_table)
+        clusters.save(cluster_table, file_paths[0].parent.name)
+        duplicates = hash_table.path_list(duplicate_rows)
+        self.logger.info(f"Cluster search finished. Found {len(duplicates)} duplicates.")
+        return duplicates
+
+
+    def find_sharded_duplicates(self, hash_table: HashTable) -> List[Path]:
+        """
+        Searches duplicates together with other processes sharing 'shard_dir'.
+
+        Every process publishes (or loads) the hash table, processes the
+        shards it manages to claim and tries to merge the pairs. Only the
+        merging process reports duplicates, so files are removed once;
+        the others return an empty list.
+
+        Args:
+            hash_table (HashTable): Hashes of all current images.
+
+        Returns:
+            List[Path]: Duplicates of the global search, or an empty list on
+                processes that did not merge.
+        """
+        self.warn_not_invariant("--shard_dir")
+        index = ShardedIndex(self.settings, Path(self.settings.shard_dir), int(self.settings.shards))
+        published = index.publish(hash_table)
+        index.run(published.hashes, self.method.threshold)
+        pairs = index.merge(len(published), published.hashes, self.method.threshold)
+
+        if pairs is None:
+            return []
+
+        pairs = self.confirm(published, pairs)
+
+        duplicates = published.path_list(BaseIndex.resolve_duplicates(pairs, len(published)))
+        self.logger.info(f"Sharded search finished. Found {len(duplicates)} duplicates.")
+        return duplicates
+
+
+    def find_object_duplicates(self, file_paths: Tuple[Path]) -> pa.Table:
+        """
+        Finds annotated objects that near-duplicate each other across images.
+
+        The object crops are hashed by an 'ObjectHasher' (one decode per
+        image) and searched with the index selected for the number of
+        crops, at the same threshold as whole images. Pairs of crops of the
+        same image (e.g. repeated similar objects in one frame) are dropped,
+        and the matched pairs are saved to 'report_path'.
+
+        Args:
+            file_paths (Tuple[Path]): All image paths of the folder.
+
+        Returns:
+            pa.Table: The matched pairs of (image, box), nearest first.
+        """
+        object_hasher = ObjectHasher(self.settings, self.method)
+        crops = object_hasher.hash_objects(file_paths)
+        pairs = HashPairs.empty()
+
+        if len(crops.hashes) > 1:
+            n_bits = self.method.core_size * self.method.core_size
+            index = self.create_index(len(crops.hashes), n_bits, self.method.threshold)
+            pairs = index.find_pairs(crops.hashes, self.method.threshold)
+            is_across = crops.image_rows[pairs.first] != crops.image_rows[pairs.second]
+            pairs = HashPairs(pairs.first[is_across], pairs.second[is_across], pairs.distance[is_across])
+
+        report = object_hasher.build_report(file_paths, crops, pairs)
+
+        if file_paths:
+            object_hasher.save(report, file_paths[0].parent.name)
+
+        self.logger.info(f"Object search finished. Found {report.num_rows} pairs among {len(crops.hashes)} objects.")
+        return report
+
+
+    def get_graph_pairs(
+            self,
+            file_paths: Tuple[Path],
+            hash_table: HashTable,
+            threshold: Optional[int] = None,
+            max_distance: Optional[int] = None
+    ) -> Optional[HashPairs]:
+        """
+        Returns pairs within a threshold from the persisted neighbour graph.
+
+        The graph is computed once at 'graph_threshold' with the configured
+        index and saved next to the cache. Later calls with any threshold up
+        to it only filter the saved edges, as long as the search mode
+        (cascade, invariant or exact) is the same.
+
+        Args:
+            file_paths (Tuple[Path]): All image paths of the folder.
+            hash_table (HashTable): Hashes of all current images.
+            threshold (Optional[int]): The threshold in bits. Defaults to the hasher threshold.
+            max_distance (Optional[int]): The graph distance in bits. Defaults to 'graph_threshold'.
+
+        Returns:
+            Optional[HashPairs]: Pairs within the threshold, or None if the
+                threshold is above the graph distance.
+        """
+        threshold = self.method.threshold if threshold is None else threshold
+
+        if max_distance is None:
+            max_distance = self.method.threshold_bits(self.settings.graph_threshold)
+
+        if threshold > max_distance:
+            self.logger.warning(
+                f"Threshold {threshold} bits is above the graph threshold {max_distance} bits, searching without graph"
+            )
+            return None
+
+        if not len(hash_table):
+            return HashPairs.empty()
+
+        cache_file = self.method.get_cache_file(file_paths[0].parent)
+        index = self.select_index(len(hash_table), hash_table, max_distance)
+        mode = NeighbourGraph.mode_of(index)
+        graph = NeighbourGraph(self.settings, self.method.cache_io, cache_file, hash_table.key, mode)
+        pairs = graph.load(len(hash_table), max_distance)
+
+        if pairs is None:
+            pairs = graph.build(hash_table.hashes, index, max_distance)
+
+        is_within = pairs.distance <= threshold
+        return HashPairs(pairs.first[is_within], pairs.second[is_within], pairs.distance[is_within])
+
+
+    def sweep(
+            self,
+            file_paths: Tuple[Path],
+            files_stats: Optional[Dict[Path, os.stat_result]] = None
+    ) -> Dict[int, int]:
+        """
+        Counts duplicates for every threshold from one neighbour graph.
+
+        Thresholds go from 0 to 'graph_threshold' (or the hash threshold if
+        it is not set) in steps of 1%.
+
+        Args:
+            file_paths (Tuple[Path]): A collection of paths to the image files.
+            files_stats (Optional[Dict[Path, os.stat_result]]): Stats gathered during the directory scan.
+
+        Returns:
+            Dict[int, int]: The number of duplicates per threshold percentage.
+        """
+        graph_threshold = self.settings.graph_threshold
+        graph_threshold = self.settings.hash_threshold if graph_threshold is None else graph_threshold
+        hash_map = self.method.get_hashmap(file_paths, files_stats)
+        max_distance = self.method.threshold_bits(graph_threshold)
+        pairs = self.get_graph_pairs(file_paths, hash_map, max_distance, max_distance)
+        percentages = range(graph_threshold + 1)
+        counts = NeighbourGraph.sweep(pairs, len(hash_map), {self.method.threshold_bits(pct) for pct in percentages})
+        return {pct: counts[self.method.threshold_bits(pct)] for pct in percentages}
+
+
+    def load_hashes(
+            self,
+            file_paths: Tuple[Path],
+            files_stats: Optional[Dict[Path, os.stat_result]] = None
+    ) -> HashTable:
+        """
+        Gets the searched hashes, from the out-of-core store if possible.
+
+        In the 'out_of_core' mode a fresh 'HashStore' whose rows match the
+        files on disk is opened directly, so the Parquet cache with all its
+        hash columns is not loaded. Otherwise the hashes come from
+        'get_hashmap' and are moved out of core if enabled.
+
+        Args:
+            file_paths (Tuple[Path]): All image paths of the folder.
+            files_stats (Optional[Dict[Path, os.stat_result]]): Stats gathered during the directory scan.
+
+        Returns:
+            HashTable: Paths and hashes of all readable images.
+        """
+        if not self.settings.out_of_core or not file_paths:
+            return self.method.get_hashmap(file_paths, files_stats)
+
+        store = self.get_hash_store(file_paths)
+        hash_table = store.read(words_count(self.method.core_size ** 2), self.out_of_core_columns())
+
+        if hash_table is not None:
+            if self.method.is_synced(file_paths, hash_table, self.method.collect_stats(file_paths, files_stats)):
+                return hash_table
+
+            self.logger.info("Hash store does not match the files on disk, loading the cache")
+
+        return self.move_out_of_core(file_paths, self.method.get_hashmap(file_paths, files_stats))
+
+
+    def get_hash_store(self, file_paths: Tuple[Path]) -> HashStore:
+        """
+        Creates the out-of-core store of the searched hash column of a folder.
+
+        Args:
+            file_paths (Tuple[Path]): All image paths of the folder.
+
+        Returns:
+            HashStore: The store next to the hash cache of the folder.
+        """
+        cache_file = self.method.get_cache_file(file_paths[0].parent)
+        return HashStore(self.settings, self.method.cache_io, cache_file, self.method.hash_column)
+
+
+    def out_of_core_columns(self) -> List[str]:
+        """
+        Lists the hash columns kept in memory in the 'out_of_core' mode.
+
+        Returns:
+            List[str]: The coarse cascade hashes (8 bytes per image) and the
+                dihedral hashes of the 'invariant' mode, if enabled.
+        """
+        keep = [HashTable.column_name(self.method.hash_type, CascadeIndex.COARSE_SIZE)] if self.settings.cascade else []
+        keep += [self.method.dihedral_column] if self.settings.invariant else []
+        return keep
+
+
+    def move_out_of_core(self, file_paths: Tuple[Path], hash_table: HashTable) -> HashTable:
+        """
+        Replaces the searched hash column with a memory-mapped 'HashStore'.
+
+        All other hash columns are dropped, except the coarse cascade
+        hashes, which are 8 bytes per image, and the dihedral hashes of
+        the 'invariant' mode. The search then reads the full
+        hashes from disk block by block instead of holding them in memory.
+
+        Args:
+            file_paths (Tuple[Path]): All image paths of the folder.
+            hash_table (HashTable): Hashes loaded from the cache.
+
+        Returns:
+            HashTable: The same rows with the active column backed by a file.
+        """
+        if not len(hash_table):
+            return hash_table
+
+        return self.get_hash_store(file_paths).load(hash_table, self.out_of_core_columns())
+
+
+    def find_reference_duplicates(self, hash_table: HashTable) -> List[Path]:
+        """
+        Finds images that near-duplicate any image of the reference folders.
+
+        The reference hashes come from a 'ReferenceStore' merged from the
+        existing caches of the reference folders, so they are not hashed
+        again. Only the source images are searched against them, block by
+        block; the search strategy is chosen for the reference size.
+
+        Args:
+            hash_table (HashTable): Hashes of the source images.
+
+        Returns:
+            List[Path]: Source images that match a reference image.
+        """
+        self.warn_not_invariant("--reference")
+        sources = [ReferenceStore.source_file(self.settings, reference) for reference in self.settings.reference]
+        store = ReferenceStore(self.settings, self.method.cache_io, sources, self.method.hash_column)
+        reference = store.load()
+
+        if self.settings.out_of_core:
+            reference = HashStore(self.settings, self.method.cache_io, store.store_file, store.column).load(reference)
+
+        n_bits = self.method.core_size * self.method.core_size
+        search_index = self.create_index(len(reference), n_bits, self.method.threshold)
+        confirm = partial(self.method.confirm_cross_pairs, hash_table, reference) if self.method.exif_confirm else None
+        rows = store.query(hash_table, reference, search_index, self.method.threshold, confirm)
+        return hash_table.path_list(rows)
+
+
+    def find_temporal_duplicates(self, hash_table: HashTable) -> List[Path]:
+        """
+        Finds duplicates among neighbouring frames of the same video.
+
+        Every frame is compared with the previous 'temporal_window' frames
+        of its video by a 'TemporalIndex'. If 'temporal_global' is on, the
+        frames that are left are searched once more across videos with the
+        configured index, which is much smaller than the full search.
+
+        Args:
+            hash_table (HashTable): Hashes of all current images.
+
+        Returns:
+            List[Path]: A list of file paths that are identified as duplicates.
+        """
+        self.warn_not_invariant("--temporal_window")
+        threshold = self.method.threshold
+        index = TemporalIndex(self.settings, hash_table.paths, self.settings.temporal_window)
+        pairs = self.confirm(hash_table, index.find_pairs(hash_table.hashes, threshold))
+        duplicate_rows = index.resolve_duplicates(pairs, len(hash_table))
+
+        if self.settings.temporal_global:
+            kept_rows = np.setdiff1d(np.arange(len(hash_table)), duplicate_rows)
+            kept_table = hash_table.take(kept_rows)
+            global_index = self.select_index(len(kept_table), kept_table)
+            global_pairs = self.confirm(kept_table, global_index.find_pairs(kept_table.hashes, threshold))
+            global_rows = kept_rows[global_index.resolve_duplicates(global_pairs, len(kept_table))]
+            self.logger.info(f"Global pass over {len(kept_rows)} kept frames found {len(global_rows)} duplicates")
+            duplicate_rows = np.union1d(duplicate_rows, global_rows)
+
+        duplicates = hash_table.path_list(duplicate_rows)
+        self.logger.info(f"Temporal search finished. Found {len(duplicates)} duplicates.")
+        return duplicates
+
+
+    def find_new_duplicates(self, file_paths: Tuple[Path], hash_table: HashTable) -> List[Path]:
+        """
+        Searches only images that are not in the dedup index of the previous cycle.
+
+        The index is kept in memory between cycles and saved next to the
+        hash cache, so a restarted watcher continues from it. The search
+        strategy is chosen for the whole folder size, since new hashes are
+        looked up in all indexed ones. The index is chosen like for the full
+        search, so the cascade and the invariant mode apply as well. Each
+        search mode (with 'exif_confirm' as a mode of its own) keeps its own
+        dedup index.
+
+        Args:
+            file_paths (Tuple[Path]): All image paths of the folder.
+            hash_table (HashTable): Hashes of all current images.
+
+        Returns:
+            List[Path]: New images that are duplicates of indexed or other new images.
+        """
+        if not len(hash_table):
+            return []
+
+        search_index = self.select_index(len(hash_table), hash_table)
+        mode = NeighbourGraph.mode_of(search_index)
+
+        if self.method.exif_confirm:
+            mode = f"{mode}_confirmed"
+
+        cache_file = self.method.get_cache_file(file_paths[0].parent)
+        index_file = DedupIndex.index_file_for(cache_file, self.method.hash_column, self.method.threshold, mode)
+
+        if self.dedup_index is None or self.dedup_index.index_file != index_file:
+            self.dedup_index = DedupIndex(self.settings, self.method.cache_io, index_file)
+
+        rows = self.dedup_index.update(hash_table, search_index, self.method.threshold, self.confirmation(hash_table))
+        duplicates = hash_table.path_list(rows)
+        self.logger.info(f"Incremental search finished. Found {len(duplicates)} duplicates.")
+        return duplicates
+
+
+    def select_index(
+            self,
+            size: int,
+            hash_table: Optional[HashTable] = None,
+            threshold: Optional[int] = None
+    ) -> BaseIndex:
+        """
+        Creates the search index configured in settings.
+
+        If the 'cascade' mode is on and the table has the 64-bit level of the
+        hash pyramid, the index searches the coarse hashes at a loose
+        threshold and a 'CascadeIndex' confirms the candidates with the full
+        hashes. Otherwise the configured index searches the full hashes.
+        In the 'invariant' mode the index is wrapped into an 'InvariantIndex'
+        that matches the hashes with the dihedral hashes of the table (the
+        cascade is not used then).
+
+        Args:
+            size (int): The number of hashes to search.
+            hash_table (Optional[HashTable]): The hashes to search, used to get coarse hashes.
+            threshold (Optional[int]): The search threshold in bits. Defaults to the hasher threshold.
+
+        Returns:
+            BaseIndex: An instance of the selected search strategy.
+        """
+        threshold = self.method.threshold if threshold is None else threshold
+        n_bits = self.method.core_size * self.method.core_size
+
+        if self.settings.invariant and hash_table is not None and self.method.dihedral_column in hash_table.columns:
+            variants = hash_table.columns[self.method.dihedral_column]
+            index = self.create_index(size * InvariantIndex.VARIANTS, n_bits, threshold)
+            return InvariantIndex(self.settings, index, variants)
+
+        coarse_size = CascadeIndex.COARSE_SIZE
+        coarse_column = HashTable.column_name(self.method.hash_type, coarse_size)
+        use_cascade = (
+            self.settings.cascade
+            and hash_table is not None
+            and self.method.core_size > coarse_size
+            and coarse_column in hash_table.columns
+        )
+
+        if not use_cascade:
+            return self.create_index(size, n_bits, threshold)
+
+        coarse_threshold = CascadeIndex.loose_threshold(threshold, n_bits, self.settings.cascade_factor)
+        coarse_index = self.create_index(size, coarse_size * coarse_size, coarse_threshold)
+        self.logger.info(f"Using cascade search with {coarse_column} hashes at {coarse_threshold} bits")
+        return CascadeIndex(self.settings, coarse_index, hash_table.columns[coarse_column], coarse_threshold)
+
+
+    def create_index(self, size: int, n_bits: int, threshold: int) -> BaseIndex:
+        """
+        Creates the search index configured in 'search_index'.
+
+        In 'auto' mode multi-index hashing is used when the dataset is large
+        and the threshold is small enough for substring probing to pay off.
+        Otherwise the exhaustive tiled search on 'n_jobs' threads is used.
+        In the 'out_of_core' mode 'auto' always picks the tiled search, since
+        multi-index hashing builds in-memory tables larger than the hashes.
+
+        Args:
+            size (int): The number of hashes to search.
+            n_bits (int): The length of the searched hashes in bits.
+            threshold (int): The search threshold in bits.
+
+        Returns:
+            BaseIndex: An instance of the selected search strategy.
+
+        Raises:
+            ValueError: If the configured index is unknown.
+        """
+        index_name = self.settings.search_index
+
+        if index_name == Constants.auto:
+            is_efficient = MultiIndexHashing.is_efficient(size, n_bits, threshold) and not self.settings.out_of_core
+            index_name = Constants.mih if is_efficient else Constants.tiled
+
+        if index_name not in self.index_mapping:
+            msg = f"Unknown search index '{index_name}'. Use one of: {list(self.index_mapping)} or '{Constants.auto}'"
+            self.logger.error(msg)
+            raise ValueError(msg)
+
+        self.logger.info(f"Using '{index_name}' search index for {size} hashes")
+        return self.index_mapping[index_name](self.settings)
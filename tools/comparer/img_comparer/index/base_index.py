@@ -0,0 +1,318 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, NamedTuple, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from const_utils.default_values import AppSettings
+from logger.logger import LoggerConfigurator
+from services.hamming import WORD_DTYPE, popcount
+
+
+class HashPairs(NamedTuple):
+    """
+    A sparse list of matched hash pairs stored as parallel NumPy arrays.
+
+    For a search inside one matrix every pair satisfies 'first < second'.
+
+    Attributes:
+        first (np.ndarray): Row indices of the first hash in each pair.
+        second (np.ndarray): Row indices of the second hash in each pair.
+        distance (np.ndarray): Hamming distances in bits for each pair.
+    """
+    first: np.ndarray
+    second: np.ndarray
+    distance: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "HashPairs":
+        """Creates a pair list without any pairs."""
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32))
+
+    @classmethod
+    def concat(cls, parts: Iterable["HashPairs"]) -> "HashPairs":
+        """
+        Merges several pair lists into one.
+
+        Args:
+            parts (Iterable[HashPairs]): Pair lists produced by separate searches.
+
+        Returns:
+            HashPairs: A single pair list containing all input pairs.
+        """
+        parts = [part for part in parts if part.size]
+
+        if not parts:
+            return cls.empty()
+
+        return cls(
+            np.concatenate([part.first for part in parts]),
+            np.concatenate([part.second for part in parts]),
+            np.concatenate([part.distance for part in parts])
+        )
+
+    @property
+    def size(self) -> int:
+        """int: The number of pairs."""
+        return len(self.first)
+
+
+class BaseIndex(ABC):
+    """
+    Abstract base class for near-duplicate search strategies.
+
+    An index receives a matrix of packed uint64 hashes and returns every
+    pair of rows whose Hamming distance does not exceed the threshold.
+    Different strategies trade memory and preparation time for fewer
+    comparisons, but all of them must return the same pairs. An index can
+    also match a block of query hashes against another matrix (e.g. new
+    images against already deduplicated ones). The search can be streamed
+    band by band, yielding duplicates as soon as they are final (see
+    'iter_duplicates').
+
+    Attributes:
+        CROSS_TILE_BYTES (int): Memory budget for one tile of XOR results in a cross search.
+        STREAM_BATCH_ROWS (int): Default number of rows resolved per streamed band.
+        settings (AppSettings): Global configuration for paths and parameters.
+        logger (logging.Logger): Logger instance for search operations.
+    """
+    CROSS_TILE_BYTES: int = 32 * 1024 * 1024
+    STREAM_BATCH_ROWS: int = 50_000
+
+    def __init__(self, settings: AppSettings):
+        """
+        Initializes the index with project settings.
+
+        Args:
+            settings (AppSettings): Configuration containing defaults and CLI arguments.
+        """
+        self.settings = settings
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+
+
+    @abstractmethod
+    def find_pairs(self, matrix: np.ndarray, threshold: int) -> HashPairs:
+        """
+        Finds all pairs of rows within the Hamming distance threshold.
+
+        Args:
+            matrix (np.ndarray): A 2D array of packed hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            HashPairs: Matched pairs with 'first < second'.
+        """
+        pass
+
+
+    @classmethod
+    def cross_tile_size(cls, words: int) -> int:
+        """
+        Calculates the tile side so that one tile of cross XOR results fits the budget.
+
+        Args:
+            words (int): Number of uint64 words per hash.
+
+        Returns:
+            int: The number of query rows (and matrix rows) in one tile.
+        """
+        return max(1, int(np.sqrt(cls.CROSS_TILE_BYTES / (max(1, words) * WORD_DTYPE.itemsize))))
+
+
+    @staticmethod
+    def _compare_cross_tile(
+            queries: np.ndarray,
+            matrix: np.ndarray,
+            threshold: int,
+            row_start: int,
+            col_start: int,
+            tile: int
+    ) -> HashPairs:
+        """Internal helper: Compares a tile of queries with a tile of the matrix in global indices."""
+        rows = queries[row_start:row_start + tile]
+        cols = matrix[col_start:col_start + tile]
+        distances = popcount(np.bitwise_xor(rows[:, None, :], cols[None, :, :]))
+        first, second = np.nonzero(distances <= threshold)
+        return HashPairs(
+            first.astype(np.int64) + row_start,
+            second.astype(np.int64) + col_start,
+            distances[first, second]
+        )
+
+
+    def find_cross_pairs(self, queries: np.ndarray, matrix: np.ndarray, threshold: int) -> HashPairs:
+        """
+        Finds all pairs of a query row and a matrix row within the threshold.
+
+        The default implementation compares the two matrices tile by tile,
+        so memory stays bounded for any sizes. Indexes with a faster
+        lookup override it.
+
+        Args:
+            queries (np.ndarray): A 2D array of packed query hashes (Q x words).
+            matrix (np.ndarray): A 2D array of packed hashes to search in (N x words).
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            HashPairs: Matched pairs with query rows in 'first' and matrix rows in 'second'.
+        """
+        if not len(queries) or not len(matrix):
+            return HashPairs.empty()
+
+        queries = np.ascontiguousarray(queries)
+        matrix = np.ascontiguousarray(matrix)
+        tile = self.cross_tile_size(matrix.shape[1])
+        pairs = HashPairs.concat(
+            self._compare_cross_tile(queries, matrix, threshold, row_start, col_start, tile)
+            for row_start in range(0, len(queries), tile)
+            for col_start in range(0, len(matrix), tile)
+        )
+        self.logger.debug(f"Cross search of {len(queries)} against {len(matrix)} hashes found {pairs.size} pairs")
+        return pairs
+
+
+    def subset(self, rows: np.ndarray) -> "BaseIndex":
+        """
+        Returns an index for some rows of the matrix this index was built for.
+
+        Plain indexes keep no data per row and return themselves. Indexes
+        with auxiliary hashes per row (see 'CascadeIndex', 'InvariantIndex')
+        return a copy restricted to the rows.
+
+        Args:
+            rows (np.ndarray): Row indices of the full matrix.
+
+        Returns:
+            BaseIndex: An index that searches 'matrix[rows]'.
+        """
+        return self
+
+
+    def find_cross_rows(
+            self,
+            matrix: np.ndarray,
+            query_rows: np.ndarray,
+            rows: np.ndarray,
+            threshold: int
+    ) -> HashPairs:
+        """
+        Finds pairs between two sets of rows of the matrix this index was built for.
+
+        Args:
+            matrix (np.ndarray): The full 2D array of packed hashes (N x words).
+            query_rows (np.ndarray): Row indices of the queries.
+            rows (np.ndarray): Row indices to search in.
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            HashPairs: Matched pairs with positions in 'query_rows' in 'first'
+                and positions in 'rows' in 'second'.
+        """
+        return self.find_cross_pairs(matrix[query_rows], matrix[rows], threshold)
+
+
+    def iter_band_pairs(
+            self,
+            matrix: np.ndarray,
+            threshold: int,
+            batch_rows: int
+    ) -> Iterator[Tuple[int, int, HashPairs]]:
+        """
+        Finds pairs band by band, each band matched with all earlier rows.
+
+        The default implementation runs a cross search of the band against
+        the rows up to its end. Indexes with a prepared lookup override it.
+
+        Args:
+            matrix (np.ndarray): A 2D array of packed hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+            batch_rows (int): Number of rows in one band.
+
+        Yields:
+            Tuple[int, int, HashPairs]: The band start and stop and all pairs
+                with 'first < second' whose 'second' row is in the band.
+        """
+        for start in range(0, len(matrix), batch_rows):
+            stop = min(len(matrix), start + batch_rows)
+            pairs = self.find_cross_pairs(matrix[start:stop], matrix[:stop], threshold)
+            second = pairs.first + start
+            is_earlier = pairs.second < second
+            yield start, stop, HashPairs(pairs.second[is_earlier], second[is_earlier], pairs.distance[is_earlier])
+
+
+    def iter_duplicates(
+            self,
+            matrix: np.ndarray,
+            threshold: int,
+            batch_rows: Optional[int] = None,
+            confirm: Optional[Callable[["HashPairs"], "HashPairs"]] = None
+    ) -> Iterator[np.ndarray]:
+        """
+        Streams duplicate rows band by band with the first-seen rule.
+
+        A row's status depends only on earlier rows, so once a band has been
+        matched with all rows before it, its duplicates are final and can be
+        handed over (e.g. for removal) while later bands are still searched.
+        The union of all yielded rows equals 'resolve_duplicates' over
+        'find_pairs'.
+
+        Args:
+            matrix (np.ndarray): A 2D array of packed hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+            batch_rows (Optional[int]): Rows per band. Defaults to 'STREAM_BATCH_ROWS'.
+            confirm (Optional[Callable[[HashPairs], HashPairs]]): Filters the pairs of
+                every band before they are resolved (e.g. 'BaseHasher.confirm_pairs').
+
+        Yields:
+            np.ndarray: Sorted duplicate rows of the next band (may be empty).
+        """
+        is_duplicate = np.zeros(len(matrix), dtype=bool)
+
+        for start, stop, pairs in self.iter_band_pairs(matrix, threshold, batch_rows or self.STREAM_BATCH_ROWS):
+            if confirm is not None:
+                pairs = confirm(pairs)
+
+            from_prefix = (pairs.first < start) & ~is_duplicate[pairs.first]
+            is_duplicate[pairs.second[from_prefix]] = True
+            in_band = (pairs.first >= start) & ~is_duplicate[pairs.first]
+            band_pairs = HashPairs(pairs.first[in_band] - start, pairs.second[in_band] - start, pairs.distance[in_band])
+            is_duplicate[BaseIndex.resolve_duplicates(band_pairs, stop - start) + start] = True
+            yield np.flatnonzero(is_duplicate[start:stop]) + start
+
+
+    @staticmethod
+    def resolve_duplicates(pairs: HashPairs, size: int) -> np.ndarray:
+        """
+        Selects duplicate rows from matched pairs using the first-seen rule.
+
+        Rows are visited in ascending order. A row that is not a duplicate
+        itself marks all its later matches as duplicates, which reproduces
+        the classic each-with-each search with skipping of found duplicates.
+
+        Args:
+            pairs (HashPairs): Matched pairs with 'first < second'.
+            size (int): The total number of rows in the searched matrix.
+
+        Returns:
+            np.ndarray: Sorted indices of rows that are duplicates.
+        """
+        is_duplicate = np.zeros(size, dtype=bool)
+
+        if not pairs.size:
+            return np.flatnonzero(is_duplicate)
+
+        order = np.lexsort((pairs.second, pairs.first))
+        first = pairs.first[order]
+        second = pairs.second[order]
+        starts = np.flatnonzero(np.r_[True, first[1:] != first[:-1]])
+        ends = np.r_[starts[1:], len(first)]
+
+        for start, end in zip(starts, ends):
+            if not is_duplicate[first[start]]:
+                is_duplicate[second[start:end]] = True
+
+        return np.flatnonzero(is_duplicate)
@@ -0,0 +1,210 @@
+import math
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from const_utils.default_values import AppSettings
+from services.hamming import popcount
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+
+
+class CascadeIndex(BaseIndex):
+    """
+    Coarse-to-fine search that filters pairs with short hashes first.
+
+    The first stage searches a matrix of cheap 64-bit hashes (the 8x8 level
+    of the hash pyramid) at a loose threshold with another index. Only the
+    surviving candidate pairs are compared with the full-resolution hashes
+    at the configured threshold. The coarse threshold is the relative full
+    threshold scaled by 'cascade_factor', so pairs within the full threshold
+    almost always survive the first stage, while most clearly different
+    pairs are dropped after touching a single word. The recall of the
+    coarse filter is heuristic: a pair near the full threshold whose coarse
+    distance exceeds the coarse threshold is missed, so the result can
+    contain slightly fewer pairs than the exhaustive search (a larger
+    'cascade_factor' lowers the chance). Every search, including the
+    streamed bands, runs through the same coarse filter.
+
+    Attributes:
+        COARSE_SIZE (int): Core size of the coarse hash (8x8 = 64 bits).
+        BATCH_SIZE (int): Number of candidate pairs verified at once.
+        coarse_index (BaseIndex): Index used for the first stage.
+        coarse_matrix (np.ndarray): Coarse hashes (N x 1) in the row order of the full matrix.
+        coarse_threshold (int): The first stage threshold in bits.
+        survivors (Dict[str, int]): Number of pairs after each stage of the last search.
+    """
+    COARSE_SIZE: int = 8
+    BATCH_SIZE: int = 1_000_000
+
+    def __init__(
+            self,
+            settings: AppSettings,
+            coarse_index: BaseIndex,
+            coarse_matrix: np.ndarray,
+            coarse_threshold: int
+    ):
+        """
+        Initializes the cascade with the first stage index and coarse hashes.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+            coarse_index (BaseIndex): Index used to search the coarse hashes.
+            coarse_matrix (np.ndarray): Coarse hashes (N x 1) in the row order of the full matrix.
+            coarse_threshold (int): The first stage threshold in bits.
+        """
+        super().__init__(settings)
+        self.coarse_index = coarse_index
+        self.coarse_matrix = coarse_matrix
+        self.coarse_threshold = coarse_threshold
+        self.survivors: Dict[str, int] = {}
+
+
+    @classmethod
+    def loose_threshold(cls, threshold: int, n_bits: int, factor: float) -> int:
+        """
+        Converts the full threshold into the coarse threshold.
+
+        Args:
+            threshold (int): The full-resolution threshold in bits.
+            n_bits (int): The full hash length in bits.
+            factor (float): How many times the relative coarse threshold is looser.
+
+        Returns:
+            int: The coarse threshold in bits (at most the coarse hash length).
+        """
+        coarse_bits = cls.COARSE_SIZE * cls.COARSE_SIZE
+        return min(coarse_bits, math.ceil(threshold / n_bits * coarse_bits * factor))
+
+
+    def find_pairs(self, matrix: np.ndarray, threshold: int) -> HashPairs:
+        """
+        Finds pairs within the threshold using the coarse filter and full verification.
+
+        Args:
+            matrix (np.ndarray): A 2D array of full packed hashes (N x words).
+            threshold (int): The maximal full distance in bits for a match.
+
+        Returns:
+            HashPairs: Confirmed pairs with 'first < second' and full distances.
+
+        Raises:
+            ValueError: If the coarse and full matrices have different numbers of rows.
+        """
+        self._check_rows(matrix)
+        candidates = self.coarse_index.find_pairs(self.coarse_matrix, self.coarse_threshold)
+        pairs = self.confirm(matrix, matrix, candidates, threshold)
+        self.survivors = {
+            "all": len(matrix) * (len(matrix) - 1) // 2,
+            "coarse": candidates.size,
+            "full": pairs.size,
+        }
+        self.logger.info(
+            f"Cascade search: {self.survivors['all']} pairs -> {self.survivors['coarse']} coarse candidates "
+            f"(threshold {self.coarse_threshold}/64 bits, {self.coarse_index.__class__.__name__}) "
+            f"-> {self.survivors['full']} confirmed (threshold {threshold} bits)"
+        )
+        return pairs
+
+
+    def iter_band_pairs(
+            self,
+            matrix: np.ndarray,
+            threshold: int,
+            batch_rows: int
+    ) -> Iterator[Tuple[int, int, HashPairs]]:
+        """
+        Finds pairs band by band with the coarse filter and full verification.
+
+        The bands of the coarse index are confirmed with the full hashes, so
+        a streamed search gives the same pairs as 'find_pairs'.
+
+        Args:
+            matrix (np.ndarray): A 2D array of full packed hashes (N x words).
+            threshold (int): The maximal full distance in bits for a match.
+            batch_rows (int): Number of rows in one band.
+
+        Yields:
+            Tuple[int, int, HashPairs]: The band start and stop and all confirmed
+                pairs with 'first < second' whose 'second' row is in the band.
+
+        Raises:
+            ValueError: If the coarse and full matrices have different numbers of rows.
+        """
+        self._check_rows(matrix)
+
+        for start, stop, candidates in self.coarse_index.iter_band_pairs(
+                self.coarse_matrix, self.coarse_threshold, batch_rows
+        ):
+            yield start, stop, self.confirm(matrix, matrix, candidates, threshold)
+
+
+    def _check_rows(self, matrix: np.ndarray) -> None:
+        """Internal helper: Raises a ValueError if the coarse hashes do not have the rows of the full matrix."""
+        if len(self.coarse_matrix) != len(matrix):
+            msg = f"Coarse hashes ({len(self.coarse_matrix)}) do not match full hashes ({len(matrix)})"
+            self.logger.error(msg)
+            raise ValueError(msg)
+
+
+    def confirm(self, queries: np.ndarray, matrix: np.ndarray, candidates: HashPairs, threshold: int) -> HashPairs:
+        """
+        Compares candidate pairs with the full hashes in batches of 'BATCH_SIZE'.
+
+        Args:
+            queries (np.ndarray): Full hashes of the 'first' rows of the candidates.
+            matrix (np.ndarray): Full hashes of the 'second' rows of the candidates.
+            candidates (HashPairs): Pairs found with the coarse hashes.
+            threshold (int): The maximal full distance in bits for a match.
+
+        Returns:
+            HashPairs: The candidates within the threshold with full distances.
+        """
+        parts = []
+
+        for start in range(0, candidates.size, self.BATCH_SIZE):
+            first = candidates.first[start:start + self.BATCH_SIZE]
+            second = candidates.second[start:start + self.BATCH_SIZE]
+            distances = popcount(np.bitwise_xor(queries[first], matrix[second]))
+            matches = distances <= threshold
+            parts.append(HashPairs(first[matches], second[matches], distances[matches]))
+
+        return HashPairs.concat(parts)
+
+
+    def subset(self, rows: np.ndarray) -> "CascadeIndex":
+        """
+        Returns a cascade over the coarse hashes of some rows.
+
+        Args:
+            rows (np.ndarray): Row indices of the full matrix.
+
+        Returns:
+            CascadeIndex: A cascade that searches 'matrix[rows]'.
+        """
+        return CascadeIndex(self.settings, self.coarse_index, self.coarse_matrix[rows], self.coarse_threshold)
+
+
+    def find_cross_rows(
+            self,
+            matrix: np.ndarray,
+            query_rows: np.ndarray,
+            rows: np.ndarray,
+            threshold: int
+    ) -> HashPairs:
+        """
+        Finds pairs between two sets of rows with the coarse filter and full verification.
+
+        Args:
+            matrix (np.ndarray): The full 2D array of packed hashes (N x words).
+            query_rows (np.ndarray): Row indices of the queries.
+            rows (np.ndarray): Row indices to search in.
+            threshold (int): The maximal full distance in bits for a match.
+
+        Returns:
+            HashPairs: Confirmed pairs with positions in 'query_rows' in 'first'
+                and positions in 'rows' in 'second'.
+        """
+        candidates = self.coarse_index.find_cross_pairs(
+            self.coarse_matrix[query_rows], self.coarse_matrix[rows], self.coarse_threshold
+        )
+        return self.confirm(matrix[query_rows], matrix[rows], candidates, threshold)
@@ -0,0 +1,156 @@
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from const_utils.default_values import AppSettings
+from logger.logger import LoggerConfigurator
+from tools.cache import CacheIO
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+
+
+class DedupIndex:
+    """
+    Duplicate-free hashes kept between deduplication cycles.
+
+    After every cycle the index holds the hashes of all images that were
+    not found as duplicates. In the next cycle only images that are not in
+    the index (new, changed, or duplicates that were not removed) are
+    searched: against the index and among themselves. This costs
+    O(new x N) instead of O(N^2) for the full search and gives the same
+    result as the first-seen rule with the indexed images first.
+
+    The index is kept in memory and saved to a Parquet file next to the
+    hash cache after every update. The file name contains the hash column,
+    the threshold and the search mode, so changing any of them starts a new
+    index: images indexed as distinct in one mode (e.g. a flipped copy
+    without the invariant mode) would never be compared again otherwise.
+
+    Attributes:
+        settings (AppSettings): Global configuration for paths and parameters.
+        logger (logging.Logger): Logger instance for incremental search.
+        cache_io (CacheIO): Tool for saving and loading the index.
+        index_file (Path): The Parquet file of the index.
+        table (Optional[HashTable]): Duplicate-free hashes of the previous
+            cycle, None until loaded.
+    """
+    def __init__(self, settings: AppSettings, cache_io: CacheIO, index_file: Path):
+        """
+        Initializes the index for one cache file.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+            cache_io (CacheIO): Tool for saving and loading the index.
+            index_file (Path): The Parquet file of the index.
+        """
+        self.settings = settings
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+        self.cache_io = cache_io
+        self.index_file = index_file
+        self.table: Optional[HashTable] = None
+
+
+    @staticmethod
+    def index_file_for(cache_file: Path, hash_column: str, threshold: int, mode: str) -> Path:
+        """
+        Builds the index file name for a hash cache.
+
+        Args:
+            cache_file (Path): The Parquet hash cache of the folder.
+            hash_column (str): The searched hash column (e.g., 'dhash_16').
+            threshold (int): The search threshold in bits.
+            mode (str): The search mode (e.g., 'exact', see 'NeighbourGraph.mode_of').
+
+        Returns:
+            Path: The index file next to the cache.
+        """
+        return cache_file.with_name(f"{cache_file.stem}_index_{hash_column}_{threshold}_{mode}{cache_file.suffix}")
+
+
+    def load(self) -> HashTable:
+        """
+        Returns the index, reading it from disk on first use.
+
+        Returns:
+            HashTable: Duplicate-free hashes of the previous cycle (may be empty).
+        """
+        if self.table is None:
+            self.table = HashTable.from_arrow(self.cache_io.load_table(self.index_file))
+
+            if len(self.table):
+                self.logger.info(f"Loaded dedup index with {len(self.table)} images from {self.index_file.name}")
+
+        return self.table
+
+
+    def update(
+            self,
+            hash_table: HashTable,
+            search_index: BaseIndex,
+            threshold: int,
+            confirm: Optional[Callable[[HashPairs], HashPairs]] = None
+    ) -> np.ndarray:
+        """
+        Finds duplicates among images that are not in the index yet.
+
+        Indexed images that are gone from 'hash_table' or whose hash has
+        changed are dropped from the index. The remaining images are searched
+        against the index with 'find_cross_rows' and among themselves with
+        'find_pairs' of the index 'subset', so indexes with hashes per row
+        (cascade, invariant) work as well. Images that are not duplicates are added to the index,
+        which is then saved.
+
+        Args:
+            hash_table (HashTable): Hashes of all current images.
+            search_index (BaseIndex): Search strategy built for all rows of 'hash_table'.
+            threshold (int): The maximal distance in bits for a match.
+            confirm (Optional[Callable[[HashPairs], HashPairs]]): Filters the found pairs
+                of rows of 'hash_table' before they are resolved (e.g. 'BaseHasher.confirm_pairs').
+
+        Returns:
+            np.ndarray: Sorted row indices of duplicates in 'hash_table'.
+        """
+        known = self.load()
+        matrix = hash_table.hashes
+        index_rows = np.empty(0, dtype=np.int64)
+
+        if len(known) and known.key == hash_table.key and known.words == hash_table.words:
+            positions = pd.Index(hash_table.paths).get_indexer(known.paths)
+            is_alive = positions >= 0
+            positions = positions[is_alive]
+            is_same = np.all(matrix[positions] == known.hashes[is_alive], axis=1)
+            index_rows = np.unique(positions[is_same])
+
+        is_new = np.ones(len(hash_table), dtype=bool)
+        is_new[index_rows] = False
+        new_rows = np.flatnonzero(is_new)
+        self.logger.info(f"Incremental search: {len(new_rows)} new images against {len(index_rows)} indexed")
+
+        cross = search_index.find_cross_rows(matrix, new_rows, index_rows, threshold)
+        inner = search_index.subset(new_rows).find_pairs(matrix[new_rows], threshold)
+        offset = len(index_rows)
+        pairs = HashPairs.concat([
+            HashPairs(cross.second, cross.first + offset, cross.distance),
+            HashPairs(inner.first + offset, inner.second + offset, inner.distance),
+        ])
+
+        if confirm is not None:
+            table_rows = np.concatenate([index_rows, new_rows])
+            positions = np.empty(len(hash_table), dtype=np.int64)
+            positions[table_rows] = np.arange(len(table_rows))
+            confirmed = confirm(HashPairs(table_rows[pairs.first], table_rows[pairs.second], pairs.distance))
+            pairs = HashPairs(positions[confirmed.first], positions[confirmed.second], confirmed.distance)
+
+        is_duplicate = np.zeros(len(new_rows), dtype=bool)
+        is_duplicate[search_index.resolve_duplicates(pairs, offset + len(new_rows)) - offset] = True
+
+        kept_rows = np.sort(np.concatenate([index_rows, new_rows[~is_duplicate]]))
+        self.table = hash_table.take(kept_rows).select([hash_table.key])
+        self.cache_io.save(self.table.to_arrow(), self.index_file)
+        return new_rows[is_duplicate]
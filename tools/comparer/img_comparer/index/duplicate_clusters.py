@@ -0,0 +1,191 @@
+import json
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from const_utils.default_values import AppSettings
+from logger.logger import LoggerConfigurator
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+from tools.comparer.img_comparer.index.base_index import HashPairs
+
+
+class DuplicateClusters:
+    """
+    Groups matched images into clusters and keeps the best image of each.
+
+    The greedy first-seen rule of 'BaseIndex.resolve_duplicates' keeps an
+    arbitrary (the first) image of a group and does not follow chains of
+    matches. Here the match graph is split into connected components with
+    a vectorized union-find: every edge hooks the larger root to the
+    smaller one with 'np.minimum.at', and pointer jumping flattens the
+    trees, so the cost is a few passes over the edge arrays. In every
+    cluster the image with the most pixels is kept, ties are broken by the
+    sharpness and then by the row order. Both metrics come from the hashing
+    pass (see 'BaseHasher.quality_metrics'); without them the first image
+    of a cluster is kept.
+
+    Attributes:
+        CLUSTER (str): Result column with the cluster id.
+        PATH (str): Result column with the image path.
+        KEEP (str): Result column that is True for the kept image of a cluster.
+        settings (AppSettings): Global configuration for paths and parameters.
+        logger (logging.Logger): Logger instance for cluster operations.
+    """
+    CLUSTER: str = "cluster"
+    PATH: str = "path"
+    KEEP: str = "keep"
+
+    def __init__(self, settings: AppSettings):
+        """
+        Initializes the clustering with project settings.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+        """
+        self.settings = settings
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+
+
+    @staticmethod
+    def connected_components(pairs: HashPairs, size: int) -> np.ndarray:
+        """
+        Labels every row with the smallest row of its connected component.
+
+        Args:
+            pairs (HashPairs): Matched pairs (the edges of the graph).
+            size (int): The number of rows.
+
+        Returns:
+            np.ndarray: The component label (int64) of every row.
+        """
+        labels = np.arange(size, dtype=np.int64)
+        first, second = pairs.first.astype(np.int64), pairs.second.astype(np.int64)
+
+        while first.size:
+            first_roots, second_roots = labels[first], labels[second]
+            is_open = first_roots != second_roots
+
+            if not is_open.any():
+                break
+
+            first, second = first[is_open], second[is_open]
+            first_roots, second_roots = first_roots[is_open], second_roots[is_open]
+            np.minimum.at(labels, np.maximum(first_roots, second_roots), np.minimum(first_roots, second_roots))
+
+            while True:
+                jumped = labels[labels]
+
+                if np.array_equal(jumped, labels):
+                    break
+
+                labels = jumped
+
+        return labels
+
+
+    @staticmethod
+    def select_keepers(labels: np.ndarray, hash_table: HashTable) -> np.ndarray:
+        """
+        Chooses the kept row of every component.
+
+        Args:
+            labels (np.ndarray): Component labels from 'connected_components'.
+            hash_table (HashTable): The clustered rows with optional quality metrics.
+
+        Returns:
+            np.ndarray: A boolean mask of kept rows (one per component).
+        """
+        rows = np.arange(len(labels), dtype=np.int64)
+        zeros = np.zeros(len(labels), dtype=np.float64)
+        pixels = hash_table.metrics.get(HashTable.PIXELS, zeros)
+        sharpness = hash_table.metrics.get(HashTable.SHARPNESS, zeros)
+        order = np.lexsort((rows, -sharpness, -pixels, labels))
+        sorted_labels = labels[order]
+        is_first = np.ones(len(order), dtype=bool)
+        is_first[1:] = sorted_labels[1:] != sorted_labels[:-1]
+        keep = np.zeros(len(labels), dtype=bool)
+        keep[order[is_first]] = True
+        return keep
+
+
+    def build(self, pairs: HashPairs, hash_table: HashTable) -> Tuple[np.ndarray, pa.Table]:
+        """
+        Clusters matched images and chooses the kept image of each cluster.
+
+        Args:
+            pairs (HashPairs): Matched pairs of rows of 'hash_table'.
+            hash_table (HashTable): The searched hashes with optional quality metrics.
+
+        Returns:
+            Tuple[np.ndarray, pa.Table]: Sorted rows of duplicates (every
+                clustered image except the kept one) and the clusters with
+                columns 'cluster', 'path', 'keep' and the quality metrics,
+                sorted by cluster with the kept image first.
+        """
+        labels = self.connected_components(pairs, len(hash_table))
+        keep = self.select_keepers(labels, hash_table)
+        cluster_sizes = np.bincount(labels, minlength=len(labels))
+        clustered = np.flatnonzero(cluster_sizes[labels] > 1)
+        clustered = clustered[np.lexsort((~keep[clustered], labels[clustered]))]
+        cluster_ids = np.unique(labels[clustered], return_inverse=True)[1]
+        data = {
+            self.CLUSTER: pa.array(cluster_ids, type=pa.int64()),
+            self.PATH: pa.array(hash_table.paths[clustered], type=pa.string()),
+            self.KEEP: pa.array(keep[clustered], type=pa.bool_()),
+        }
+
+        for name, values in hash_table.metrics.items():
+            data[name] = pa.array(values[clustered])
+
+        duplicates = np.sort(clustered[~keep[clustered]])
+        self.logger.info(
+            f"Grouped {len(clustered)} images into {int(cluster_ids.max(initial=-1)) + 1} clusters, "
+            f"{len(duplicates)} duplicates"
+        )
+        return duplicates, pa.table(data)
+
+
+    def save(self, clusters: pa.Table, name: str) -> Tuple[Path, Path]:
+        """
+        Writes the clusters to 'report_path' as Parquet and JSON.
+
+        The Parquet file holds one row per clustered image. The JSON file
+        holds a list of clusters with the kept image and its duplicates.
+
+        Args:
+            clusters (pa.Table): The clusters from 'build'.
+            name (str): The base name of the report files.
+
+        Returns:
+            Tuple[Path, Path]: Paths of the Parquet and the JSON file.
+        """
+        report_dir = Path(self.settings.report_path)
+        report_dir.mkdir(parents=True, exist_ok=True)
+        parquet_file = report_dir / f"{name}_clusters.parquet"
+        json_file = report_dir / f"{name}_clusters.json"
+        pq.write_table(clusters, parquet_file, compression="snappy")
+
+        records = []
+
+        for row in clusters.to_pylist():
+            if row[self.KEEP]:
+                records.append({self.CLUSTER: row[self.CLUSTER], self.KEEP: row, "duplicates": []})
+            else:
+                records[-1]["duplicates"].append(row)
+
+        for record in records:
+            for row in (record[self.KEEP], *record["duplicates"]):
+                del row[self.CLUSTER], row[self.KEEP]
+
+        with open(json_file, "w", encoding="utf-8") as file:
+            json.dump(records, file, indent=2)
+
+        self.logger.info(f"Saved {len(records)} clusters to {parquet_file} and {json_file.name}")
+        return parquet_file, json_file
@@ -0,0 +1,205 @@
+from typing import Iterator, Tuple, Union
+
+import numpy as np
+
+from const_utils.default_values import AppSettings
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+
+
+class InvariantIndex(BaseIndex):
+    """
+    Search that also matches flipped and 90-degree rotated copies.
+
+    Every image has the hashes of its 8 dihedral transforms stored in one
+    row of 'variants' (see 'BaseHasher.hash_dihedral'). Only the upper
+    triangle is searched: the identity variant of every row is matched with
+    the variants of the later rows, band by band, by cross searches of the
+    inner index. So the search compares about 8 times as many hashes as
+    the ordinary one, not 16 times as a search of all hashes against all
+    variants would. The distance of a pair is the smallest distance between
+    the identity variant of the earlier row and the variants of the later row.
+
+    The identity variant is used instead of the searched hash because the
+    variants come from another resize than the plain hash: the two differ
+    by a few bits even for identical images, so exact copies would be
+    missed at small thresholds. The searched matrix only gives the row
+    count and the hash width.
+
+    Attributes:
+        VARIANTS (int): Number of dihedral transforms per image.
+        BANDS (int): Number of bands of 'find_pairs'; more bands skip more of
+            the lower triangle but run more cross searches.
+        index (BaseIndex): Index used for the cross search.
+        variants (np.ndarray): Dihedral hashes (N x 8 * words) in the row order of the searched matrix.
+    """
+    VARIANTS: int = 8
+    BANDS: int = 8
+
+    def __init__(self, settings: AppSettings, index: BaseIndex, variants: np.ndarray):
+        """
+        Initializes the index with the inner index and the dihedral hashes.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+            index (BaseIndex): Index used for the cross search.
+            variants (np.ndarray): Dihedral hashes (N x 8 * words) in the row order of the searched matrix.
+        """
+        super().__init__(settings)
+        self.index = index
+        self.variants = variants
+
+
+    def find_pairs(self, matrix: np.ndarray, threshold: int) -> HashPairs:
+        """
+        Finds all pairs of rows within the threshold under any flip or rotation.
+
+        Args:
+            matrix (np.ndarray): A 2D array of packed hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            HashPairs: Matched pairs with 'first < second' and the smallest distance.
+        """
+        if len(matrix) < 2:
+            return HashPairs.empty()
+
+        band_rows = -(-len(matrix) // self.BANDS)
+        result = HashPairs.concat(pairs for _, _, pairs in self.iter_band_pairs(matrix, threshold, band_rows))
+        self.logger.info(
+            f"Invariant search over {len(matrix)} hashes and their {self.VARIANTS} variants found {result.size} pairs"
+        )
+        return result
+
+
+    @staticmethod
+    def best_pairs(pairs: HashPairs) -> HashPairs:
+        """
+        Keeps the smallest distance of every pair found through several variants.
+
+        Args:
+            pairs (HashPairs): Pairs that may repeat.
+
+        Returns:
+            HashPairs: Unique pairs sorted by 'first' and 'second'.
+        """
+        order = np.lexsort((pairs.distance, pairs.second, pairs.first))
+        first, second, distance = pairs.first[order], pairs.second[order], pairs.distance[order]
+        is_best = np.ones(len(first), dtype=bool)
+        is_best[1:] = (first[1:] != first[:-1]) | (second[1:] != second[:-1])
+        return HashPairs(first[is_best], second[is_best], distance[is_best])
+
+
+    def identity(self, rows: Union[slice, np.ndarray], words: int) -> np.ndarray:
+        """
+        Returns the hashes of the untransformed images of some rows.
+
+        Args:
+            rows (Union[slice, np.ndarray]): Rows of 'variants'.
+            words (int): The number of uint64 words per hash.
+
+        Returns:
+            np.ndarray: The first variant of every row (rows x words).
+        """
+        return np.ascontiguousarray(self.variants[rows, :words])
+
+
+    def subset(self, rows: np.ndarray) -> "InvariantIndex":
+        """
+        Returns an invariant index over the dihedral hashes of some rows.
+
+        Args:
+            rows (np.ndarray): Row indices of the full matrix.
+
+        Returns:
+            InvariantIndex: An index that searches 'matrix[rows]'.
+        """
+        return InvariantIndex(self.settings, self.index, self.variants[rows])
+
+
+    def find_cross_rows(
+            self,
+            matrix: np.ndarray,
+            query_rows: np.ndarray,
+            rows: np.ndarray,
+            threshold: int
+    ) -> HashPairs:
+        """
+        Finds pairs between two sets of rows under any flip or rotation.
+
+        Like in 'find_pairs', the identity variant of the earlier row of a
+        pair is matched with the variants of the later row. A direction is
+        searched only if some query row is before (or after) some searched
+        row, so new rows appended after the indexed ones need one cross search.
+
+        Args:
+            matrix (np.ndarray): The full 2D array of packed hashes (N x words).
+            query_rows (np.ndarray): Row indices of the queries.
+            rows (np.ndarray): Row indices to search in.
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            HashPairs: Matched pairs with positions in 'query_rows' in 'first'
+                and positions in 'rows' in 'second', with the smallest distance.
+        """
+        words = matrix.shape[1]
+        query_rows, rows = np.asarray(query_rows), np.asarray(rows)
+
+        if not len(query_rows) or not len(rows):
+            return HashPairs.empty()
+
+        parts = []
+
+        if query_rows.min() < rows.max():
+            forward = self.index.find_cross_pairs(
+                self.identity(query_rows, words),
+                np.ascontiguousarray(self.variants[rows]).reshape(-1, words),
+                threshold
+            )
+            second = forward.second // self.VARIANTS
+            is_later = query_rows[forward.first] < rows[second]
+            parts.append(HashPairs(forward.first[is_later], second[is_later], forward.distance[is_later]))
+
+        if rows.min() < query_rows.max():
+            backward = self.index.find_cross_pairs(
+                self.identity(rows, words),
+                np.ascontiguousarray(self.variants[query_rows]).reshape(-1, words),
+                threshold
+            )
+            first = backward.second // self.VARIANTS
+            is_later = rows[backward.first] < query_rows[first]
+            parts.append(HashPairs(first[is_later], backward.first[is_later], backward.distance[is_later]))
+
+        return self.best_pairs(HashPairs.concat(parts))
+
+
+    def iter_band_pairs(
+            self,
+            matrix: np.ndarray,
+            threshold: int,
+            batch_rows: int
+    ) -> Iterator[Tuple[int, int, HashPairs]]:
+        """
+        Finds pairs band by band, each band matched with all earlier rows.
+
+        The identity variants of the rows up to the end of the band are matched with
+        the variants of the band rows, so a band is final once it is yielded.
+
+        Args:
+            matrix (np.ndarray): A 2D array of packed hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+            batch_rows (int): Number of rows in one band.
+
+        Yields:
+            Tuple[int, int, HashPairs]: The band start and stop and all pairs
+                with 'first < second' whose 'second' row is in the band.
+        """
+        words = matrix.shape[1]
+
+        for start in range(0, len(matrix), batch_rows):
+            stop = min(len(matrix), start + batch_rows)
+            stored = np.ascontiguousarray(self.variants[start:stop]).reshape(-1, words)
+            pairs = self.index.find_cross_pairs(self.identity(slice(0, stop), words), stored, threshold)
+            second = pairs.second // self.VARIANTS + start
+            is_later = pairs.first < second
+            band_pairs = HashPairs(pairs.first[is_later], second[is_later], pairs.distance[is_later])
+            yield start, stop, self.best_pairs(band_pairs)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from services.hamming import hamming_distances
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+
+
+class LinearIndex(BaseIndex):
+    """
+    Exhaustive each-with-each search over the packed hash matrix.
+
+    Every row is compared with all following rows (upper triangle only)
+    using XOR plus popcount. This is the reference strategy: it is exact for
+    any threshold and is the fastest choice for small folders.
+    """
+    def find_pairs(self, matrix: np.ndarray, threshold: int) -> HashPairs:
+        """
+        Finds all pairs of rows within the Hamming distance threshold.
+
+        Args:
+            matrix (np.ndarray): A 2D array of packed hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            HashPairs: Matched pairs with 'first < second'.
+        """
+        parts = []
+
+        for index in range(len(matrix) - 1):
+            distances = hamming_distances(matrix[index + 1:], matrix[index])
+            matches = np.flatnonzero(distances <= threshold)
+
+            if matches.size:
+                parts.append(HashPairs(
+                    np.full(matches.size, index, dtype=np.int64),
+                    matches.astype(np.int64) + index + 1,
+                    distances[matches]
+                ))
+
+        pairs = HashPairs.concat(parts)
+        self.logger.debug(f"Linear search over {len(matrix)} hashes found {pairs.size} pairs")
+        return pairs
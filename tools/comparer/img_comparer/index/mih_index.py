@@ -0,0 +1,340 @@
+from itertools import combinations
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from services.hamming import popcount
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+
+
+class MultiIndexHashing(BaseIndex):
+    """
+    Sub-quadratic exact range search based on multi-index hashing.
+
+    Each packed hash is split into 16-bit substrings. By the pigeonhole
+    principle two hashes within 'threshold' bits must have at least one
+    substring within 'threshold // substrings' bits of each other. Every
+    substring column is kept as a sorted lookup table, so candidates are
+    found by probing a few neighbouring keys instead of scanning the whole
+    matrix. Candidates are then verified with the full Hamming distance,
+    so the result is identical to the exhaustive search. Only whole 16-bit
+    substrings of the used bits are indexed: substrings with the zero
+    padding of the last word have the same few keys in every row, so they
+    would turn each probe into a scan of the matrix. The pigeonhole bound
+    holds for any subset of the substrings and the skipped bits are still
+    compared during the verification.
+
+    Attributes:
+        CHUNK_BITS (int): Substring width in bits.
+        MAX_CHUNK_RADIUS (int): The largest per-substring radius that keeps
+            the number of probes small enough to beat the exhaustive search.
+        MIN_ITEMS (int): Below this number of hashes the exhaustive search is faster.
+        BATCH_SIZE (int): Number of query rows probed at once.
+    """
+    CHUNK_BITS: int = 16
+    CHUNK_DTYPE: np.dtype = np.dtype("<u2")
+    MAX_CHUNK_RADIUS: int = 2
+    MIN_ITEMS: int = 10_000
+    BATCH_SIZE: int = 1024
+
+
+    @classmethod
+    def chunk_count(cls, n_bits: int) -> int:
+        """
+        Calculates the number of indexed substrings of a hash.
+
+        Args:
+            n_bits (int): The length of the hash in bits.
+
+        Returns:
+            int: The number of whole substrings, or one for hashes shorter than a substring.
+        """
+        return max(1, n_bits // cls.CHUNK_BITS)
+
+
+    @classmethod
+    def chunk_radius(cls, n_bits: int, threshold: int) -> int:
+        """
+        Calculates the search radius for every substring.
+
+        Args:
+            n_bits (int): The length of the hash in bits.
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            int: The per-substring radius guaranteed by the pigeonhole principle.
+        """
+        return threshold // cls.chunk_count(n_bits)
+
+
+    @classmethod
+    def used_bits(cls, *matrices: np.ndarray) -> int:
+        """
+        Finds the hash length without the zero padding of the last word.
+
+        Packed hashes are padded with zero bits (see 'pack_bits'), so the
+        bits after the last bit set in any row hold no information.
+
+        Args:
+            *matrices (np.ndarray): 2D arrays of packed hashes with the same number of words.
+
+        Returns:
+            int: The number of bits up to the last set bit.
+        """
+        used = np.zeros(matrices[0].shape[1], dtype=matrices[0].dtype)
+
+        for matrix in matrices:
+            if len(matrix):
+                used |= np.bitwise_or.reduce(matrix, axis=0)
+
+        used_bytes = np.ascontiguousarray(used).view(np.uint8)
+        nonzero = np.flatnonzero(used_bytes)
+
+        if not nonzero.size:
+            return 0
+
+        # bits are packed from the most significant bit of every byte
+        last_byte = int(used_bytes[nonzero[-1]])
+        lowest_bit = (last_byte & -last_byte).bit_length() - 1
+        return int(nonzero[-1]) * 8 + 8 - lowest_bit
+
+
+    @classmethod
+    def is_efficient(cls, size: int, n_bits: int, threshold: int) -> bool:
+        """
+        Estimates whether the index beats the exhaustive search.
+
+        Args:
+            size (int): The number of hashes to search.
+            n_bits (int): The length of the hash in bits.
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            bool: True if the multi-index search is expected to be faster.
+        """
+        return size >= cls.MIN_ITEMS and cls.chunk_radius(n_bits, threshold) <= cls.MAX_CHUNK_RADIUS
+
+
+    @classmethod
+    def probe_masks(cls, radius: int) -> np.ndarray:
+        """
+        Builds all substring XOR masks with at most 'radius' set bits.
+
+        Args:
+            radius (int): The per-substring search radius.
+
+        Returns:
+            np.ndarray: Masks to XOR with a substring to enumerate its neighbours.
+        """
+        masks = [0]
+
+        for bit_count in range(1, radius + 1):
+            for bits in combinations(range(cls.CHUNK_BITS), bit_count):
+                masks.append(sum(1 << bit for bit in bits))
+
+        return np.array(masks, dtype=np.int32)
+
+
+    @staticmethod
+    def _expand_ranges(starts: np.ndarray, ends: np.ndarray, owners: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Internal helper: Expands [start, end) ranges into flat positions with their owners."""
+        lengths = ends - starts
+        total = int(lengths.sum())
+
+        if not total:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        non_empty = lengths > 0
+        starts, lengths, owners = starts[non_empty], lengths[non_empty], owners[non_empty]
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.arange(total, dtype=np.int64) - np.repeat(offsets - starts, lengths)
+        return np.repeat(owners, lengths), positions
+
+
+    def _build_keys(self, matrix: np.ndarray, n_bits: int) -> np.ndarray:
+        """Internal helper: Converts the used substrings of hashes into keys prefixed by the substring number."""
+        chunks_count = self.chunk_count(n_bits)
+        chunks = np.ascontiguousarray(matrix).view(self.CHUNK_DTYPE)[:, :chunks_count].astype(np.int32)
+        chunk_ids = np.arange(chunks_count, dtype=np.int32) << self.CHUNK_BITS
+        return chunks + chunk_ids
+
+
+    def _candidates(
+            self,
+            query_keys: np.ndarray,
+            batch_rows: np.ndarray,
+            sorted_keys: np.ndarray,
+            owners: np.ndarray,
+            masks: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Internal helper: Probes the sorted substring table and returns (query row, owner row) candidates."""
+        chunks_count = query_keys.shape[1]
+        probes = (query_keys[batch_rows][:, :, None] ^ masks[None, None, :]).ravel()
+        left = np.searchsorted(sorted_keys, probes, side="left")
+        right = np.searchsorted(sorted_keys, probes, side="right")
+        query_rows = np.repeat(batch_rows, chunks_count * len(masks))
+
+        first, positions = self._expand_ranges(left, right, query_rows)
+        return first, owners[positions]
+
+
+    def _prepare(
+            self,
+            keys: np.ndarray,
+            n_bits: int,
+            threshold: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Internal helper: Builds the sorted substring table from the matrix keys and the probe masks."""
+        chunks_count = self.chunk_count(n_bits)
+        radius = self.chunk_radius(n_bits, threshold)
+        masks = self.probe_masks(radius)
+        self.logger.info(
+            f"Multi-index search: {chunks_count} substrings, radius {radius}, {len(masks)} probes per substring"
+        )
+
+        flat_keys = keys.ravel()
+        order = np.argsort(flat_keys, kind="stable")
+        return flat_keys[order], order // chunks_count, masks
+
+
+    def find_pairs(self, matrix: np.ndarray, threshold: int) -> HashPairs:
+        """
+        Finds all pairs of rows within the Hamming distance threshold.
+
+        Args:
+            matrix (np.ndarray): A 2D array of packed hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            HashPairs: Matched pairs with 'first < second'.
+        """
+        size = len(matrix)
+
+        if size < 2:
+            return HashPairs.empty()
+
+        n_bits = self.used_bits(matrix)
+        keys = self._build_keys(matrix, n_bits)
+        table = self._prepare(keys, n_bits, threshold)
+        pairs = HashPairs.concat(
+            self._match_rows(matrix, keys, table, np.arange(start, min(start + self.BATCH_SIZE, size)), threshold)
+            for start in range(0, size, self.BATCH_SIZE)
+        )
+        self.logger.debug(f"Multi-index search over {size} hashes found {pairs.size} pairs")
+        return pairs
+
+
+    def _match_rows(
+            self,
+            matrix: np.ndarray,
+            keys: np.ndarray,
+            table: Tuple[np.ndarray, np.ndarray, np.ndarray],
+            batch_rows: np.ndarray,
+            threshold: int,
+            earlier: bool = False
+    ) -> HashPairs:
+        """Internal helper: Verifies the candidates of a batch of rows with later (or earlier) rows."""
+        first, second = self._candidates(keys, batch_rows.astype(np.int64), *table)
+
+        if earlier:
+            first, second = second, first
+
+        return self._verify_pairs(matrix, first, second, threshold)
+
+
+    @staticmethod
+    def _verify_pairs(matrix: np.ndarray, first: np.ndarray, second: np.ndarray, threshold: int) -> HashPairs:
+        """Internal helper: Keeps unique candidates with 'first < second' within the full Hamming distance."""
+        size = len(matrix)
+        is_ordered = first < second
+
+        if not is_ordered.any():
+            return HashPairs.empty()
+
+        pair_keys = np.unique(first[is_ordered] * size + second[is_ordered])
+        first, second = pair_keys // size, pair_keys % size
+        distances = popcount(np.bitwise_xor(matrix[first], matrix[second]))
+        matches = distances <= threshold
+        return HashPairs(first[matches], second[matches], distances[matches])
+
+
+    def iter_band_pairs(
+            self,
+            matrix: np.ndarray,
+            threshold: int,
+            batch_rows: int
+    ) -> Iterator[Tuple[int, int, HashPairs]]:
+        """
+        Finds pairs band by band, each band matched with all earlier rows.
+
+        The substring table is built once for the whole matrix; the rows of
+        every band are probed against it and only earlier owners are kept.
+
+        Args:
+            matrix (np.ndarray): A 2D array of packed hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+            batch_rows (int): Number of rows in one band.
+
+        Yields:
+            Tuple[int, int, HashPairs]: The band start and stop and all pairs
+                with 'first < second' whose 'second' row is in the band.
+        """
+        size = len(matrix)
+
+        if not size:
+            return
+
+        n_bits = self.used_bits(matrix)
+        keys = self._build_keys(matrix, n_bits)
+        table = self._prepare(keys, n_bits, threshold)
+
+        for start in range(0, size, batch_rows):
+            stop = min(size, start + batch_rows)
+            yield start, stop, HashPairs.concat(
+                self._match_rows(matrix, keys, table, np.arange(row, min(row + self.BATCH_SIZE, stop)), threshold, True)
+                for row in range(start, stop, self.BATCH_SIZE)
+            )
+
+
+    def find_cross_pairs(self, queries: np.ndarray, matrix: np.ndarray, threshold: int) -> HashPairs:
+        """
+        Finds all pairs of a query row and a matrix row within the threshold.
+
+        The substring table is built for 'matrix' only, and the queries are
+        probed against it in batches, so the cost grows with the number of
+        queries rather than with the product of both sizes.
+
+        Args:
+            queries (np.ndarray): A 2D array of packed query hashes (Q x words).
+            matrix (np.ndarray): A 2D array of packed hashes to search in (N x words).
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            HashPairs: Matched pairs with query rows in 'first' and matrix rows in 'second'.
+        """
+        size = len(matrix)
+
+        if not len(queries) or not size:
+            return HashPairs.empty()
+
+        n_bits = self.used_bits(queries, matrix)
+        query_keys = self._build_keys(queries, n_bits)
+        sorted_keys, owners, masks = self._prepare(self._build_keys(matrix, n_bits), n_bits, threshold)
+        parts = []
+
+        for batch_start in range(0, len(queries), self.BATCH_SIZE):
+            batch_rows = np.arange(batch_start, min(batch_start + self.BATCH_SIZE, len(queries)), dtype=np.int64)
+            first, second = self._candidates(query_keys, batch_rows, sorted_keys, owners, masks)
+
+            if not first.size:
+                continue
+
+            pair_keys = np.unique(first * size + second)
+            first, second = pair_keys // size, pair_keys % size
+            distances = popcount(np.bitwise_xor(queries[first], matrix[second]))
+            matches = distances <= threshold
+            parts.append(HashPairs(first[matches], second[matches], distances[matches]))
+
+        pairs = HashPairs.concat(parts)
+        self.logger.debug(f"Multi-index cross search of {len(queries)} against {size} hashes found {pairs.size} pairs")
+        return pairs
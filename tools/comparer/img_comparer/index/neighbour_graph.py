@@ -0,0 +1,212 @@
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from const_utils.default_values import AppSettings
+from logger.logger import LoggerConfigurator
+from tools.cache import CacheIO
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+from tools.comparer.img_comparer.index.cascade_index import CascadeIndex
+from tools.comparer.img_comparer.index.invariant_index import InvariantIndex
+
+
+class NeighbourGraph:
+    """
+    A persisted sparse graph of all hash pairs within a maximal distance.
+
+    The graph is computed once at 'max_distance' and saved next to the hash
+    cache as a Parquet edge list (i, j, distance), where i and j are rows of
+    the cached hash table. Any search at a threshold at or below the
+    maximum is answered by filtering the edges, without comparing hashes.
+    The row count, the hash column, the maximal distance and the search
+    mode (see 'mode_of') are stored in the Parquet metadata; the graph is
+    used only while it is not older than the cache, has the same number of
+    rows and was built in the same mode, since the cascade and invariant
+    searches find other pairs than the exact one.
+
+    Attributes:
+        FIRST (str): Parquet column with the first row of an edge.
+        SECOND (str): Parquet column with the second row of an edge.
+        DISTANCE (str): Parquet column with the Hamming distance in bits.
+        EXACT (str): The mode of a graph built with an exact search.
+        settings (AppSettings): Global configuration for paths and parameters.
+        logger (logging.Logger): Logger instance for graph operations.
+        cache_io (CacheIO): Tool for saving and loading the graph.
+        cache_file (Path): The Parquet hash cache the graph belongs to.
+        column (str): The hash column the distances were computed for.
+        mode (str): The search mode the graph is built in.
+    """
+    FIRST: str = "i"
+    SECOND: str = "j"
+    DISTANCE: str = "distance"
+    EXACT: str = "exact"
+
+    def __init__(self, settings: AppSettings, cache_io: CacheIO, cache_file: Path, column: str, mode: str = EXACT):
+        """
+        Initializes the graph for one cache file and hash column.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+            cache_io (CacheIO): Tool for saving and loading the graph.
+            cache_file (Path): The Parquet hash cache the graph belongs to.
+            column (str): The hash column the distances are computed for.
+            mode (str): The search mode the graph is built in (see 'mode_of').
+        """
+        self.settings = settings
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+        self.cache_io = cache_io
+        self.cache_file = cache_file
+        self.column = column
+        self.mode = mode
+
+
+    @classmethod
+    def mode_of(cls, search_index: BaseIndex) -> str:
+        """
+        Describes which pairs a search index finds.
+
+        Args:
+            search_index (BaseIndex): The index the graph is built with.
+
+        Returns:
+            str: 'invariant', 'cascade_<coarse threshold>' or 'exact'.
+        """
+        if isinstance(search_index, InvariantIndex):
+            return "invariant"
+
+        if isinstance(search_index, CascadeIndex):
+            return f"cascade_{search_index.coarse_threshold}"
+
+        return cls.EXACT
+
+
+    @property
+    def graph_file(self) -> Path:
+        """Path: The Parquet edge list next to the cache."""
+        return self.cache_file.with_name(f"{self.cache_file.stem}_graph_{self.column}{self.cache_file.suffix}")
+
+
+    def load(self, rows: int, threshold: int) -> Optional[HashPairs]:
+        """
+        Reads the edges within a threshold if the saved graph covers it.
+
+        Args:
+            rows (int): The number of rows in the current hash table.
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            Optional[HashPairs]: Edges within the threshold, or None if the
+                graph is missing, outdated, computed at a smaller distance or
+                in another mode.
+        """
+        if not self.graph_file.exists():
+            return None
+
+        cache_mtime = self.cache_file.stat().st_mtime_ns if self.cache_file.exists() else 0
+
+        if self.graph_file.stat().st_mtime_ns < cache_mtime:
+            return None
+
+        table = self.cache_io.load_table(self.graph_file)
+
+        if table is None:
+            return None
+
+        metadata = {key.decode(): value.decode() for key, value in (table.schema.metadata or {}).items()}
+
+        if int(metadata.get("rows", -1)) != rows or int(metadata.get("max_distance", -1)) < threshold:
+            return None
+
+        if metadata.get("mode") != self.mode:
+            self.logger.info(
+                f"Neighbour graph {self.graph_file.name} was built in mode {metadata.get('mode')}, "
+                f"not {self.mode}; it will be rebuilt"
+            )
+            return None
+
+        distances = table.column(self.DISTANCE).to_numpy()
+        is_within = distances <= threshold
+        self.logger.info(f"Answered from neighbour graph {self.graph_file.name} at {threshold} bits")
+        return HashPairs(
+            table.column(self.FIRST).to_numpy()[is_within].astype(np.int64),
+            table.column(self.SECOND).to_numpy()[is_within].astype(np.int64),
+            distances[is_within].astype(np.int32)
+        )
+
+
+    def save(self, pairs: HashPairs, rows: int, max_distance: int) -> None:
+        """
+        Saves the edges computed at the maximal distance.
+
+        Args:
+            pairs (HashPairs): All pairs within 'max_distance'.
+            rows (int): The number of rows in the hash table.
+            max_distance (int): The distance in bits the graph was computed at.
+        """
+        table = pa.table({
+            self.FIRST: pa.array(pairs.first, type=pa.int64()),
+            self.SECOND: pa.array(pairs.second, type=pa.int64()),
+            self.DISTANCE: pa.array(pairs.distance, type=pa.int32()),
+        }).replace_schema_metadata({
+            "rows": str(rows),
+            "max_distance": str(max_distance),
+            "column": self.column,
+            "mode": self.mode,
+        })
+
+        self.graph_file.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            pq.write_table(table, self.graph_file, compression="snappy")
+        except Exception as e:
+            self.logger.error(f"Failed to save neighbour graph {self.graph_file.name}: {e}")
+            return
+
+        self.logger.info(f"Saved neighbour graph with {table.num_rows} edges at {max_distance} bits")
+
+
+    def build(self, hash_matrix: np.ndarray, search_index: BaseIndex, max_distance: int) -> HashPairs:
+        """
+        Computes and saves all pairs within the maximal distance.
+
+        Args:
+            hash_matrix (np.ndarray): The packed hash matrix (N x words).
+            search_index (BaseIndex): Search strategy for the pairs.
+            max_distance (int): The distance in bits to compute the graph at.
+
+        Returns:
+            HashPairs: All pairs within 'max_distance'.
+        """
+        pairs = search_index.find_pairs(hash_matrix, max_distance)
+        self.save(pairs, len(hash_matrix), max_distance)
+        return pairs
+
+
+    @staticmethod
+    def sweep(pairs: HashPairs, size: int, thresholds: Iterable[int]) -> Dict[int, int]:
+        """
+        Counts duplicates for every threshold from one set of pairs.
+
+        Args:
+            pairs (HashPairs): Pairs within the largest threshold.
+            size (int): The number of rows in the hash table.
+            thresholds (Iterable[int]): Thresholds in bits.
+
+        Returns:
+            Dict[int, int]: The number of duplicates per threshold.
+        """
+        counts = {}
+
+        for threshold in thresholds:
+            is_within = pairs.distance <= threshold
+            subset = HashPairs(pairs.first[is_within], pairs.second[is_within], pairs.distance[is_within])
+            counts[threshold] = len(BaseIndex.resolve_duplicates(subset, size))
+
+        return counts
@@ -0,0 +1,390 @@
+import hashlib
+import os
+import socket
+import time
+from pathlib import Path
+from functools import partial
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from const_utils.default_values import AppSettings
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+from tools.comparer.img_comparer.index.base_index import HashPairs
+from tools.comparer.img_comparer.index.mih_index import MultiIndexHashing
+
+
+class ShardedIndex(MultiIndexHashing):
+    """
+    Multi-index hashing search split into shards shared by several nodes.
+
+    The work of 'MultiIndexHashing' is split into units of one substring
+    position and one part of the query rows (see 'shard_units'): a unit
+    sorts the substring column of its position and probes it with the
+    substrings of its query rows only. A pair is found by the unit of the
+    substring the pair shares and the part of its first row, so all shards
+    together give the same pairs as the exhaustive search, and every probe
+    is generated, looked up and verified by one shard only. With fewer
+    shards than substrings a shard takes several positions; with more, the
+    rows of a position are split into parts, and every part sorts the same
+    column again.
+
+    Nodes (or processes) are coordinated only through a shared directory:
+    1. 'hashes.parquet' is written by the first node, so all nodes search
+       the same rows. A digest of its sorted paths and hash column is
+       stored in the Parquet metadata; a node that scanned other files is
+       stopped instead of adopting the published table.
+    2. A node processes a shard after creating 'claims/shard_NNNNN' with
+       O_EXCL, and writes its pairs to 'pairs/shard_NNNNN.parquet'.
+    3. The node that creates 'merge.lock' waits for all shards and merges
+       their pairs; the other nodes return without a result.
+    Files are written under a temporary name and renamed, so readers never
+    see a partial file. A directory serves one job.
+
+    A shard claim older than 'wait_timeout' without a pairs file belongs to
+    a node that died (or is too slow) and is taken over by the next node
+    that looks at it, including the merging node while it waits. At worst
+    a shard is processed twice, which writes the same pairs, so the
+    timeout should exceed the time of one shard. A node that died while
+    publishing or merging is not replaced: delete 'hashes.lock' or
+    'merge.lock' and start the nodes again.
+
+    Attributes:
+        HASHES_FILE (str): The published hash table.
+        PUBLISH_LOCK (str): Claim file of the node that publishes the hashes.
+        MERGE_LOCK (str): Claim file of the node that merges the pairs.
+        CLAIMS_DIR (str): Directory with the claim files of the shards.
+        PAIRS_DIR (str): Directory with the pairs of finished shards.
+        SHARD_NAME (str): Name template of the shard files.
+        FIRST (str): Parquet column with the first row of a pair.
+        SECOND (str): Parquet column with the second row of a pair.
+        DISTANCE (str): Parquet column with the Hamming distance in bits.
+        DIGEST_KEY (bytes): Parquet metadata key with the digest of the published table.
+        POLL_INTERVAL (float): Seconds between checks for files of other nodes.
+        shard_dir (Path): The shared directory.
+        shards (int): The number of shards.
+        wait_timeout (float): Seconds without progress of other nodes before giving
+            up, and the age of a stale shard claim ('shard_timeout').
+    """
+    HASHES_FILE: str = "hashes.parquet"
+    PUBLISH_LOCK: str = "hashes.lock"
+    MERGE_LOCK: str = "merge.lock"
+    CLAIMS_DIR: str = "claims"
+    PAIRS_DIR: str = "pairs"
+    SHARD_NAME: str = "shard_{:05d}"
+    FIRST: str = "i"
+    SECOND: str = "j"
+    DISTANCE: str = "distance"
+    DIGEST_KEY: bytes = b"digest"
+    POLL_INTERVAL: float = 1.0
+
+    def __init__(self, settings: AppSettings, shard_dir: Path, shards: int):
+        """
+        Initializes the index and creates the shared directory layout.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+            shard_dir (Path): The shared directory.
+            shards (int): The number of shards.
+        """
+        super().__init__(settings)
+        self.shard_dir = Path(shard_dir)
+        self.shards = shards
+        self.wait_timeout = float(self.settings.shard_timeout)
+        (self.shard_dir / self.CLAIMS_DIR).mkdir(parents=True, exist_ok=True)
+        (self.shard_dir / self.PAIRS_DIR).mkdir(parents=True, exist_ok=True)
+
+
+    def shard_units(self, shard: int, chunks_count: int) -> List[Tuple[int, int, int]]:
+        """
+        Lists the work units of a shard.
+
+        Every substring position is split into as many row parts as there
+        are shards for it (at least one), and the units are dealt out to
+        the shards in turn, so every unit belongs to exactly one shard.
+
+        Args:
+            shard (int): The shard number.
+            chunks_count (int): The number of indexed substrings.
+
+        Returns:
+            List[Tuple[int, int, int]]: The (substring, part, parts) of every unit.
+        """
+        units = []
+
+        for chunk in range(chunks_count):
+            parts = max(1, len(range(chunk, self.shards, chunks_count)))
+
+            for part in range(parts):
+                if (part * chunks_count + chunk) % self.shards == shard:
+                    units.append((chunk, part, parts))
+
+        return units
+
+
+    def pairs_file(self, shard: int) -> Path:
+        """
+        Returns the file with the pairs of a shard.
+
+        Args:
+            shard (int): The shard number.
+
+        Returns:
+            Path: The Parquet file in the pairs directory.
+        """
+        return self.shard_dir / self.PAIRS_DIR / f"{self.SHARD_NAME.format(shard)}.parquet"
+
+
+    def find_shard_pairs(
+            self,
+            matrix: np.ndarray,
+            threshold: int,
+            shard: int,
+            keys: Optional[np.ndarray] = None
+    ) -> HashPairs:
+        """
+        Finds the pairs within the threshold found by the units of a shard.
+
+        A pair sharing several substrings is found by the unit of each of
+        them; the duplicates are dropped by 'merge'.
+
+        Args:
+            matrix (np.ndarray): A 2D array of packed hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+            shard (int): The shard number.
+            keys (Optional[np.ndarray]): Substring keys of the matrix, if already built.
+
+        Returns:
+            HashPairs: Matched pairs with 'first < second'.
+        """
+        size = len(matrix)
+
+        if size < 2:
+            return HashPairs.empty()
+
+        n_bits = self.used_bits(matrix)
+        keys = self._build_keys(matrix, n_bits) if keys is None else keys
+        masks = self.probe_masks(self.chunk_radius(n_bits, threshold))
+        found = []
+
+        for chunk, part, parts in self.shard_units(shard, self.chunk_count(n_bits)):
+            chunk_keys = keys[:, chunk:chunk + 1]
+            owners = np.argsort(chunk_keys[:, 0], kind="stable")
+            sorted_keys = chunk_keys[owners, 0]
+
+            for start in range(part * size // parts, (part + 1) * size // parts, self.BATCH_SIZE):
+                batch_rows = np.arange(start, min(start + self.BATCH_SIZE, (part + 1) * size // parts), dtype=np.int64)
+                first, second = self._candidates(chunk_keys, batch_rows, sorted_keys, owners, masks)
+                found.append(self._verify_pairs(matrix, first, second, threshold))
+
+        return HashPairs.concat(found)
+
+
+    @staticmethod
+    def digest(hash_table: HashTable) -> str:
+        """
+        Identifies the searched files and hashes independently of the row order.
+
+        Args:
+            hash_table (HashTable): The hashes of a node.
+
+        Returns:
+            str: The MD5 hex digest of the active column and the sorted paths.
+        """
+        digest = hashlib.md5(str(hash_table.key).encode("utf-8"))
+
+        for path in sorted(str(path) for path in hash_table.paths):
+            digest.update(b"\n" + path.encode("utf-8"))
+
+        return digest.hexdigest()
+
+
+    def publish(self, hash_table: HashTable) -> HashTable:
+        """
+        Shares the hash table of the first node with all nodes.
+
+        Args:
+            hash_table (HashTable): The hashes of this node.
+
+        Returns:
+            HashTable: The published hashes with the same active column.
+
+        Raises:
+            TimeoutError: If the first node does not publish in time.
+            ValueError: If the published table has other paths or another hash column,
+                i.e. the nodes do not search the same files.
+        """
+        hashes_file = self.shard_dir / self.HASHES_FILE
+        digest = self.digest(hash_table)
+
+        if self._claim(self.shard_dir / self.PUBLISH_LOCK):
+            table = hash_table.to_arrow()
+            self._write(table.replace_schema_metadata({**(table.schema.metadata or {}), self.DIGEST_KEY: digest}),
+                        hashes_file)
+            self.logger.info(f"Published {len(hash_table)} hashes to {hashes_file}")
+        else:
+            self._wait_for([hashes_file])
+
+        table = pq.read_table(hashes_file)
+        published_digest = (table.schema.metadata or {}).get(self.DIGEST_KEY, b"").decode()
+
+        if published_digest != digest:
+            msg = (f"Published table in {hashes_file} ({table.num_rows} rows) does not match the "
+                   f"{len(hash_table)} files of this node. All nodes must search the same files with the same "
+                   f"method; use a new 'shard_dir' for another job")
+            self.logger.error(msg)
+            raise ValueError(msg)
+
+        published = HashTable.from_arrow(table)
+
+        return published.select(list(published.columns), hash_table.key)
+
+
+    def run(self, matrix: np.ndarray, threshold: int, keys: Optional[np.ndarray] = None) -> int:
+        """
+        Claims and processes shards until every shard is taken.
+
+        Shards with a stale claim (see the class description) are taken over.
+
+        Args:
+            matrix (np.ndarray): The published hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+            keys (Optional[np.ndarray]): Substring keys of the matrix, if already built.
+
+        Returns:
+            int: The number of shards processed by this node.
+        """
+        keys = self._build_keys(matrix, self.used_bits(matrix)) if keys is None else keys
+        processed = 0
+
+        for shard in range(self.shards):
+            claim_file = self.shard_dir / self.CLAIMS_DIR / self.SHARD_NAME.format(shard)
+
+            if self.pairs_file(shard).exists() or not (self._claim(claim_file) or self._reclaim(claim_file)):
+                continue
+
+            pairs = self.find_shard_pairs(matrix, threshold, shard, keys)
+            self._write(
+                pa.table({self.FIRST: pairs.first, self.SECOND: pairs.second, self.DISTANCE: pairs.distance}),
+                self.pairs_file(shard)
+            )
+            processed += 1
+            self.logger.debug(f"Shard {shard} found {pairs.size} pairs")
+
+        if processed:
+            self.logger.info(f"Processed {processed} of {self.shards} shards")
+
+        return processed
+
+
+    def merge(self, size: int, matrix: Optional[np.ndarray] = None, threshold: int = 0) -> Optional[HashPairs]:
+        """
+        Joins the pairs of all shards on a single node.
+
+        With the published hashes, the merging node takes over stale shards
+        while it waits, so a dead node does not stall the job.
+
+        Args:
+            size (int): The number of rows in the published table.
+            matrix (Optional[np.ndarray]): The published hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            Optional[HashPairs]: Unique pairs of all shards, or None if
+                another node merges them.
+
+        Raises:
+            TimeoutError: If some shards are not finished in time.
+        """
+        if not self._claim(self.shard_dir / self.MERGE_LOCK):
+            self.logger.info("Pairs are merged by another node")
+            return None
+
+        pairs_files = [self.pairs_file(shard) for shard in range(self.shards)]
+        recover = None
+
+        if matrix is not None:
+            recover = partial(self.run, matrix, threshold, self._build_keys(matrix, self.used_bits(matrix)))
+
+        self._wait_for(pairs_files, recover)
+        parts = []
+
+        for pairs_file in pairs_files:
+            table = pq.read_table(pairs_file)
+            parts.append(HashPairs(*(table.column(name).to_numpy() for name in (self.FIRST, self.SECOND, self.DISTANCE))))
+
+        pairs = HashPairs.concat(parts)
+        unique_rows = np.unique(pairs.first * size + pairs.second, return_index=True)[1]
+        result = HashPairs(pairs.first[unique_rows], pairs.second[unique_rows], pairs.distance[unique_rows])
+        self.logger.info(f"Merged {self.shards} shards into {result.size} pairs")
+        return result
+
+
+    @staticmethod
+    def _claim(path: Path) -> bool:
+        """Internal helper: Atomically creates a claim file and returns False if it already exists."""
+        try:
+            descriptor = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+
+        with os.fdopen(descriptor, "w") as file:
+            file.write(f"{socket.gethostname()}:{os.getpid()}")
+
+        return True
+
+
+    def _reclaim(self, path: Path) -> bool:
+        """Internal helper: Moves a claim file older than 'wait_timeout' aside and claims it again."""
+        try:
+            age = time.time() - path.stat().st_mtime
+
+            if age <= self.wait_timeout:
+                return False
+
+            os.rename(path, path.with_name(f".{path.name}.{socket.gethostname()}.{os.getpid()}.stale"))
+        except FileNotFoundError:
+            # finished or taken over by another node in the meantime
+            return False
+
+        self.logger.warning(f"Taking over {path.name}: claimed {age:.0f} s ago without a result")
+        return self._claim(path)
+
+
+    @staticmethod
+    def _write(table: pa.Table, path: Path) -> None:
+        """Internal helper: Writes a Parquet file under a temporary name and renames it into place."""
+        temp_file = path.with_name(f".{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+        pq.write_table(table, temp_file, compression="snappy")
+        os.replace(temp_file, path)
+
+
+    def _wait_for(self, paths: Iterable[Path], recover: Optional[Callable[[], int]] = None) -> None:
+        """
+        Internal helper: Polls until all files exist, calling 'recover' on every poll,
+        or raises TimeoutError after 'wait_timeout' seconds without a new file.
+        """
+        missing = list(paths)
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            if recover is not None:
+                recover()
+
+            still_missing = [path for path in missing if not path.exists()]
+
+            if not still_missing:
+                return
+
+            if len(still_missing) < len(missing):
+                deadline = time.monotonic() + self.wait_timeout
+
+            missing = still_missing
+
+            if time.monotonic() > deadline:
+                self.logger.error(f"Timed out waiting for {len(missing)} files of other nodes, e.g. {missing[0]}")
+                raise TimeoutError(f"Files of other nodes are missing in {self.shard_dir}")
+
+            time.sleep(self.POLL_INTERVAL)
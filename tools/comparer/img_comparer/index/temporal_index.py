@@ -0,0 +1,122 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from const_utils.default_values import AppSettings
+from services.hamming import popcount
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+
+
+class TemporalIndex(BaseIndex):
+    """
+    Windowed search for frames sliced from videos.
+
+    Frames written by 'slice' are named '{video_stem}_{n}'. Near-duplicates
+    are almost always neighbouring frames of the same video, so every frame
+    is compared only with the previous 'window' frames of its video (in
+    frame number order). This costs O(N * window) instead of O(N^2).
+    Files that do not follow the naming scheme form single-frame videos and
+    are not compared at all. Duplicates are resolved in frame order, so
+    the first frame of a static scene is kept.
+
+    Attributes:
+        FRAME_PATTERN (str): Regular expression splitting a path into video and frame number.
+        BATCH_SIZE (int): Number of frame pairs compared at once.
+        window (int): How many previous frames every frame is compared with.
+        videos (np.ndarray): Video id of every row.
+        frames (np.ndarray): Frame number of every row.
+        order (np.ndarray): Rows sorted by video and frame number.
+    """
+    FRAME_PATTERN: str = r"^(?P<video>.*)_(?P<frame>\d+)\.[^./\\]+$"
+    BATCH_SIZE: int = 1_000_000
+
+    def __init__(self, settings: AppSettings, paths: Sequence[str], window: int):
+        """
+        Initializes the index with the frame order of the searched rows.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+            paths (Sequence[str]): Paths of the searched rows.
+            window (int): How many previous frames every frame is compared with.
+        """
+        super().__init__(settings)
+        self.window = max(1, int(window))
+        self.videos, self.frames = self.parse_frames(paths)
+        self.order = np.lexsort((self.frames, self.videos))
+
+
+    @classmethod
+    def parse_frames(cls, paths: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Splits frame paths into video ids and frame numbers.
+
+        The video id includes the parent folder, so equally named videos in
+        different folders are different videos. Paths that do not match
+        'FRAME_PATTERN' get their own video id and frame number 0.
+
+        Args:
+            paths (Sequence[str]): Frame paths.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Video ids (int64) and frame numbers (int64) per path.
+        """
+        paths = pd.Series(np.asarray(paths, dtype=object), dtype=object).astype(str)
+        parts = paths.str.extract(cls.FRAME_PATTERN)
+        is_frame = parts["frame"].notna().to_numpy()
+        videos = parts["video"].where(is_frame, paths)
+        frames = pd.to_numeric(parts["frame"], errors="coerce").fillna(0).astype(np.int64)
+        return pd.factorize(videos)[0].astype(np.int64), frames.to_numpy()
+
+
+    def find_pairs(self, matrix: np.ndarray, threshold: int) -> HashPairs:
+        """
+        Finds pairs of frames of one video within the window and the threshold.
+
+        Args:
+            matrix (np.ndarray): A 2D array of packed hashes (N x words) in the row order of 'paths'.
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            HashPairs: Matched pairs with 'first < second'.
+        """
+        parts = []
+        videos = self.videos[self.order]
+
+        for offset in range(1, min(self.window, len(self.order) - 1) + 1):
+            is_same_video = videos[:-offset] == videos[offset:]
+            earlier = self.order[:-offset][is_same_video]
+            later = self.order[offset:][is_same_video]
+
+            for start in range(0, len(earlier), self.BATCH_SIZE):
+                first = earlier[start:start + self.BATCH_SIZE]
+                second = later[start:start + self.BATCH_SIZE]
+                distances = popcount(np.bitwise_xor(matrix[first], matrix[second]))
+                matches = distances <= threshold
+                first, second = first[matches], second[matches]
+                parts.append(HashPairs(np.minimum(first, second), np.maximum(first, second), distances[matches]))
+
+        pairs = HashPairs.concat(parts)
+        self.logger.info(
+            f"Temporal search: {len(matrix)} frames of {len(np.unique(self.videos))} videos, "
+            f"window {self.window}, found {pairs.size} pairs"
+        )
+        return pairs
+
+
+    def resolve_duplicates(self, pairs: HashPairs, size: int) -> np.ndarray:
+        """
+        Selects duplicate rows with the first-seen rule in frame order.
+
+        Args:
+            pairs (HashPairs): Matched pairs with 'first < second'.
+            size (int): The total number of rows in the searched matrix.
+
+        Returns:
+            np.ndarray: Sorted indices of rows that are duplicates.
+        """
+        rank = np.empty(size, dtype=np.int64)
+        rank[self.order] = np.arange(size, dtype=np.int64)
+        first, second = rank[pairs.first], rank[pairs.second]
+        ranked_pairs = HashPairs(np.minimum(first, second), np.maximum(first, second), pairs.distance)
+        return np.sort(self.order[BaseIndex.resolve_duplicates(ranked_pairs, size)])
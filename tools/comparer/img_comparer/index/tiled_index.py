@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from const_utils.default_values import AppSettings
+from services.hamming import WORD_DTYPE, popcount
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+
+
+class TiledIndex(BaseIndex):
+    """
+    Exhaustive multi-core search that compares the hash matrix tile by tile.
+
+    The matrix is split into square tiles sized to fit into the CPU cache
+    budget, and only tiles of the upper triangle are compared. Each worker
+    thread processes one band of rows against all following column tiles.
+    Workers read the same matrix in shared memory (NumPy releases the GIL
+    for XOR and popcount), and the per-band matches are merged at the end.
+
+    Attributes:
+        TILE_BYTES (int): Memory budget for one tile of XOR results.
+        MIN_TILE (int): The smallest allowed tile side in rows.
+        n_jobs (int): Number of worker threads.
+    """
+    TILE_BYTES: int = 32 * 1024 * 1024
+    MIN_TILE: int = 64
+
+    def __init__(self, settings: AppSettings):
+        """
+        Initializes the tiled index with project settings.
+
+        Args:
+            settings (AppSettings): Configuration containing 'n_jobs'.
+        """
+        super().__init__(settings)
+        self.n_jobs = max(1, int(self.settings.n_jobs))
+
+
+    def tile_size(self, words: int) -> int:
+        """
+        Calculates the tile side so that one tile of XOR results fits the budget.
+
+        Args:
+            words (int): Number of uint64 words per hash.
+
+        Returns:
+            int: The number of rows (and columns) in one tile.
+        """
+        return max(self.MIN_TILE, int(np.sqrt(self.TILE_BYTES / (words * WORD_DTYPE.itemsize))))
+
+
+    @staticmethod
+    def _compare_tile(matrix: np.ndarray, threshold: int, row_start: int, col_start: int, tile: int) -> HashPairs:
+        """Internal helper: Compares one tile and returns its matches in global indices."""
+        rows = matrix[row_start:row_start + tile]
+        cols = matrix[col_start:col_start + tile]
+        distances = popcount(np.bitwise_xor(rows[:, None, :], cols[None, :, :]))
+        matches = distances <= threshold
+
+        if row_start == col_start:
+            matches = np.triu(matches, k=1)
+
+        first, second = np.nonzero(matches)
+        return HashPairs(
+            first.astype(np.int64) + row_start,
+            second.astype(np.int64) + col_start,
+            distances[first, second]
+        )
+
+
+    @classmethod
+    def _compare_band(cls, row_start: int, matrix: np.ndarray, threshold: int, tile: int) -> HashPairs:
+        """Internal helper: Compares one band of rows with all tiles on and right of the diagonal."""
+        return HashPairs.concat(
+            cls._compare_tile(matrix, threshold, row_start, col_start, tile)
+            for col_start in range(row_start, len(matrix), tile)
+        )
+
+
+    def find_pairs(self, matrix: np.ndarray, threshold: int) -> HashPairs:
+        """
+        Finds all pairs of rows within the Hamming distance threshold.
+
+        Args:
+            matrix (np.ndarray): A 2D array of packed hashes (N x words).
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            HashPairs: Matched pairs with 'first < second'.
+        """
+        matrix = np.ascontiguousarray(matrix)
+        tile = self.tile_size(matrix.shape[1])
+        band_starts = range(0, len(matrix), tile)
+        self.logger.info(f"Tiled search: {len(band_starts)} bands of {tile} rows on {self.n_jobs} threads")
+
+        compare_band = partial(self._compare_band, matrix=matrix, threshold=threshold, tile=tile)
+
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+            pairs = HashPairs.concat(executor.map(compare_band, band_starts))
+
+        self.logger.debug(f"Tiled search over {len(matrix)} hashes found {pairs.size} pairs")
+        return pairs
+
+
+    @classmethod
+    def _compare_cross_band(
+            cls,
+            row_start: int,
+            queries: np.ndarray,
+            matrix: np.ndarray,
+            threshold: int,
+            tile: int
+    ) -> HashPairs:
+        """Internal helper: Compares one band of queries with all tiles of the matrix."""
+        return HashPairs.concat(
+            cls._compare_cross_tile(queries, matrix, threshold, row_start, col_start, tile)
+            for col_start in range(0, len(matrix), tile)
+        )
+
+
+    def find_cross_pairs(self, queries: np.ndarray, matrix: np.ndarray, threshold: int) -> HashPairs:
+        """
+        Finds all pairs of a query row and a matrix row within the threshold.
+
+        Bands of query rows are compared with the whole matrix on 'n_jobs' threads.
+
+        Args:
+            queries (np.ndarray): A 2D array of packed query hashes (Q x words).
+            matrix (np.ndarray): A 2D array of packed hashes to search in (N x words).
+            threshold (int): The maximal distance in bits for a match.
+
+        Returns:
+            HashPairs: Matched pairs with query rows in 'first' and matrix rows in 'second'.
+        """
+        if not len(queries) or not len(matrix):
+            return HashPairs.empty()
+
+        queries = np.ascontiguousarray(queries)
+        matrix = np.ascontiguousarray(matrix)
+        tile = self.tile_size(matrix.shape[1])
+        compare_band = partial(self._compare_cross_band, queries=queries, matrix=matrix, threshold=threshold, tile=tile)
+
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+            pairs = HashPairs.concat(executor.map(compare_band, range(0, len(queries), tile)))
+
+        self.logger.debug(f"Tiled cross search of {len(queries)} against {len(matrix)} hashes found {pairs.size} pairs")
+        return pairs
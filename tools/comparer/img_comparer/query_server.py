@@ -0,0 +1,217 @@
+import json
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from const_utils.default_values import AppSettings
+from logger.logger import LoggerConfigurator
+from tools.comparer.img_comparer.similarity_index import SimilarityIndex
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """An HTTP server on a Unix socket that handles every request in its own thread."""
+    daemon_threads = True
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Passes JSON requests to 'QueryServer.handle' and writes its JSON answers."""
+
+    def do_GET(self) -> None:
+        """Answers GET requests."""
+        self._respond(*self.server.query_server.handle("GET", self.path, {}))
+
+
+    def do_POST(self) -> None:
+        """Answers POST requests with a JSON body."""
+        length = int(self.headers.get("Content-Length", 0))
+
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._respond(400, {"error": f"Invalid JSON: {e}"})
+            return
+
+        self._respond(*self.server.query_server.handle("POST", self.path, payload))
+
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Writes the access log to the server logger instead of stderr."""
+        self.server.query_server.logger.debug(format % args)
+
+
+    def _respond(self, status: int, body: Dict[str, Any]) -> None:
+        """Internal helper: Sends a JSON response."""
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class QueryServer:
+    """
+    A long-running service for similarity queries over a warm hash index.
+
+    Requests and answers are JSON over HTTP, on a local TCP port or, if
+    'serve_socket' is set, on a Unix socket:
+    1. 'GET /status' returns the number of indexed images and the hash column.
+    2. 'POST /query' with '{"path": ..., "k": ..., "threshold": ...}' returns
+       the nearest images as '{"matches": [{"path", "distance"}], "elapsed_ms"}'.
+       'threshold' (0-100, like '--threshold') returns all images within
+       it, 'k' limits the number of results; without both 'serve_top_k'
+       images are returned.
+    3. 'POST /insert' with '{"paths": [...]}' hashes new or changed images
+       and adds them to the index.
+    Every request runs in its own thread; inserts are serialized by the index.
+
+    Attributes:
+        settings (AppSettings): Global configuration for paths and parameters.
+        logger (logging.Logger): Logger instance for the server.
+        index (SimilarityIndex): The index that answers the queries.
+    """
+    def __init__(self, settings: AppSettings, index: SimilarityIndex):
+        """
+        Initializes the server for an index.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+            index (SimilarityIndex): The index that answers the queries.
+        """
+        self.settings = settings
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+        self.index = index
+
+
+    def handle(self, method: str, route: str, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Answers one request.
+
+        Args:
+            method (str): The HTTP method.
+            route (str): The request path, e.g. '/query'.
+            payload (Dict[str, Any]): The decoded JSON body.
+
+        Returns:
+            Tuple[int, Dict[str, Any]]: The HTTP status and the JSON answer.
+        """
+        routes = {
+            ("GET", "/status"): self.status,
+            ("POST", "/query"): self.query,
+            ("POST", "/insert"): self.insert,
+        }
+        action = routes.get((method, route))
+
+        if action is None:
+            return 404, {"error": f"Unknown request {method} {route}"}
+
+        try:
+            return 200, action(payload)
+        except (KeyError, TypeError, ValueError) as e:
+            self.logger.warning(f"Bad request {method} {route}: {e}")
+            return 400, {"error": str(e)}
+
+
+    def status(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Describes the index.
+
+        Args:
+            payload (Dict[str, Any]): Not used.
+
+        Returns:
+            Dict[str, Any]: The number of images and the hash column.
+        """
+        return {"images": len(self.index), "column": self.index.spec.column}
+
+
+    def query(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Finds the indexed images that look like an image file.
+
+        Args:
+            payload (Dict[str, Any]): 'path' and optional 'k' and 'threshold' (0-100).
+
+        Returns:
+            Dict[str, Any]: The matches (path and distance in bits) and the query time.
+
+        Raises:
+            KeyError: If 'path' is missing.
+            ValueError: If the image cannot be read or a parameter is invalid.
+        """
+        started = time.perf_counter()
+        k, threshold = payload.get("k"), payload.get("threshold")
+
+        if k is None and threshold is None:
+            k = self.settings.serve_top_k
+
+        if k is not None and int(k) < 1:
+            raise ValueError(f"k must be positive, got {k}")
+
+        if threshold is not None and not 0 <= float(threshold) <= self.settings.max_percentage:
+            raise ValueError(f"threshold must be within 0-{self.settings.max_percentage}, got {threshold}")
+
+        matches = self.index.query(
+            Path(payload["path"]),
+            None if k is None else int(k),
+            None if threshold is None else self.index.hasher.threshold_bits(float(threshold))
+        )
+        return {
+            "matches": [{"path": path, "distance": distance} for path, distance in matches],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+
+
+    def insert(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Adds new or changed images to the index.
+
+        Args:
+            payload (Dict[str, Any]): 'paths' to the image files.
+
+        Returns:
+            Dict[str, Any]: The number of inserted images and the index size.
+
+        Raises:
+            KeyError: If 'paths' is missing.
+        """
+        inserted = self.index.insert(Path(path) for path in payload["paths"])
+        return {"inserted": inserted, "images": len(self.index)}
+
+
+    def create_server(self) -> socketserver.BaseServer:
+        """
+        Binds the HTTP server to the configured TCP port or Unix socket.
+
+        Returns:
+            socketserver.BaseServer: The bound server; 'query_server' points back to this object.
+        """
+        if self.settings.serve_socket:
+            socket_path = Path(self.settings.serve_socket)
+            socket_path.unlink(missing_ok=True)
+            server = ThreadingUnixHTTPServer(str(socket_path), QueryRequestHandler)
+        else:
+            server = ThreadingHTTPServer((self.settings.serve_host, int(self.settings.serve_port)), QueryRequestHandler)
+
+        server.query_server = self
+        return server
+
+
+    def serve(self) -> None:
+        """Serves requests until the process is interrupted (Ctrl+C)."""
+        server = self.create_server()
+        self.logger.info(f"Serving {len(self.index)} images on {server.server_address}")
+
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+            if self.settings.serve_socket:
+                Path(self.settings.serve_socket).unlink(missing_ok=True)
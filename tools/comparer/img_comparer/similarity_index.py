@@ -0,0 +1,230 @@
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from const_utils.default_values import AppSettings
+from logger.logger import LoggerConfigurator
+from services.hamming import WORD_DTYPE, hamming_distances, words_count
+from tools.comparer.img_comparer.hasher.base_hasher import BaseHasher
+from tools.comparer.img_comparer.hasher.hash_table import HashTable
+
+
+class SimilarityIndex:
+    """
+    A warm in-memory index that answers "which images look like this one?".
+
+    The hashes of the searched column are loaded once from the cache into
+    a preallocated matrix. A query hashes one image and scans the matrix
+    with a single vectorized XOR + popcount, which takes milliseconds even
+    for millions of rows, so no search index has to be built or updated.
+    New files are appended in place; the matrix grows by doubling, so an
+    insert costs O(1) amortized. A file inserted again replaces its row.
+    Rows are looked up with a pandas index for the loaded paths and a dict
+    for inserted ones, so no dict of the whole corpus is built. Inserts
+    only change the memory copy; the cache is updated by the next 'dedup'
+    run.
+
+    Attributes:
+        INITIAL_CAPACITY (int): The smallest number of preallocated rows.
+        settings (AppSettings): Global configuration for paths and parameters.
+        logger (logging.Logger): Logger instance for queries and inserts.
+        hasher (BaseHasher): The hasher used for the cached hashes and the queries.
+        spec (HashSpec): The searched hash column.
+        lock (threading.Lock): Guards inserts against concurrent queries.
+    """
+    INITIAL_CAPACITY: int = 1024
+
+    def __init__(self, settings: AppSettings, hasher: BaseHasher, hash_table: HashTable):
+        """
+        Loads the searched column of a hash table.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+            hasher (BaseHasher): The hasher used for the cached hashes and the queries.
+            hash_table (HashTable): Cached paths and hashes with the searched column.
+        """
+        self.settings = settings
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+        self.hasher = hasher
+        self.spec = hasher.hash_specs[0]
+        self.lock = threading.Lock()
+
+        empty = np.empty((0, words_count(self.spec.core_size ** 2)), dtype=WORD_DTYPE)
+        hashes = hash_table.columns.get(self.spec.column, empty) if len(hash_table) else empty
+        capacity = max(self.INITIAL_CAPACITY, len(hash_table))
+        self._matrix = np.zeros((capacity, hashes.shape[1]), dtype=WORD_DTYPE)
+        self._matrix[:len(hash_table)] = hashes
+        self._paths = np.empty(capacity, dtype=object)
+        self._paths[:len(hash_table)] = hash_table.paths
+        self._loaded = pd.Index(hash_table.paths)
+        self._inserted = {}
+        self._size = len(hash_table)
+        self.logger.info(f"Loaded {self._size} '{self.spec.column}' hashes into memory")
+
+
+    def __len__(self) -> int:
+        """Returns the number of indexed images."""
+        return self._size
+
+
+    def find_row(self, path: str) -> Optional[int]:
+        """
+        Finds the row of an indexed image.
+
+        Args:
+            path (str): The resolved image path.
+
+        Returns:
+            Optional[int]: The row, or None if the image is not indexed.
+        """
+        if path in self._inserted:
+            return self._inserted[path]
+
+        position = self._loaded.get_indexer([path])[0]
+        return None if position < 0 else int(position)
+
+
+    def hash_file(self, image_path: Path) -> np.ndarray:
+        """
+        Hashes one image with the searched column settings.
+
+        Args:
+            image_path (Path): Path to the image file.
+
+        Returns:
+            np.ndarray: The packed hash (words,).
+
+        Raises:
+            ValueError: If the image cannot be read.
+        """
+        hashes = self.hasher.compute_hashes(image_path, (self.spec,), self.hasher.reduced_decode)
+
+        if hashes is None:
+            msg = f"Unable to read image {image_path}"
+            self.logger.error(msg)
+            raise ValueError(msg)
+
+        return hashes[self.spec.column]
+
+
+    def search(
+            self,
+            query: np.ndarray,
+            k: Optional[int] = None,
+            threshold: Optional[int] = None,
+            exclude: Optional[int] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Finds the nearest indexed images of a hash.
+
+        With a threshold all images within it are returned (at most 'k' if
+        set); otherwise the 'k' nearest images are returned.
+
+        Args:
+            query (np.ndarray): A packed hash (words,).
+            k (Optional[int]): The maximal number of results.
+            threshold (Optional[int]): The maximal distance in bits.
+            exclude (Optional[int]): A row that is never returned (the query image itself).
+
+        Returns:
+            List[Tuple[str, int]]: Paths and distances in bits, nearest first.
+        """
+        with self.lock:
+            size, matrix, paths = self._size, self._matrix, self._paths
+
+        distances = hamming_distances(matrix[:size], query)
+        is_candidate = np.ones(size, dtype=bool) if threshold is None else distances <= threshold
+
+        if exclude is not None:
+            is_candidate[exclude] = False
+
+        rows = np.flatnonzero(is_candidate)
+
+        if k is not None and k < len(rows):
+            rows = rows[np.argpartition(distances[rows], k - 1)[:k]]
+
+        rows = rows[np.lexsort((rows, distances[rows]))]
+        return [(paths[row], int(distances[row])) for row in rows]
+
+
+    def query(
+            self,
+            image_path: Path,
+            k: Optional[int] = None,
+            threshold: Optional[int] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Finds the indexed images that look like an image file.
+
+        The image itself is never returned if it is indexed.
+
+        Args:
+            image_path (Path): Path to the query image.
+            k (Optional[int]): The maximal number of results.
+            threshold (Optional[int]): The maximal distance in bits.
+
+        Returns:
+            List[Tuple[str, int]]: Paths and distances in bits, nearest first.
+
+        Raises:
+            ValueError: If the image cannot be read.
+        """
+        image_path = Path(image_path).resolve()
+        return self.search(self.hash_file(image_path), k, threshold, self.find_row(str(image_path)))
+
+
+    def insert(self, image_paths: Iterable[Path]) -> int:
+        """
+        Hashes new (or changed) images and adds them to the index.
+
+        Args:
+            image_paths (Iterable[Path]): Paths to the image files.
+
+        Returns:
+            int: The number of added or replaced images. Unreadable images are skipped.
+        """
+        inserted = 0
+
+        for image_path in image_paths:
+            image_path = Path(image_path).resolve()
+            hashes = self.hasher.compute_hashes(image_path, (self.spec,), self.hasher.reduced_decode)
+
+            if hashes is None:
+                self.logger.warning(f"Unable to read image {image_path}, not inserted")
+                continue
+
+            with self.lock:
+                self._store(str(image_path), hashes[self.spec.column])
+
+            inserted += 1
+
+        self.logger.info(f"Inserted {inserted} images, {self._size} in the index")
+        return inserted
+
+
+    def _store(self, path: str, image_hash: np.ndarray) -> None:
+        """Internal helper: Replaces the row of a known path or appends a new one, growing the buffers if full."""
+        row = self.find_row(path)
+
+        if row is not None:
+            self._matrix[row] = image_hash
+            return
+
+        if self._size == len(self._matrix):
+            matrix = np.zeros((2 * len(self._matrix), self._matrix.shape[1]), dtype=WORD_DTYPE)
+            matrix[:self._size] = self._matrix[:self._size]
+            paths = np.empty(len(matrix), dtype=object)
+            paths[:self._size] = self._paths[:self._size]
+            self._matrix, self._paths = matrix, paths
+
+        self._matrix[self._size] = image_hash
+        self._paths[self._size] = path
+        self._inserted[path] = self._size
+        self._size += 1
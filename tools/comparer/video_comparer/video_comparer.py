@@ -0,0 +1,203 @@
+import multiprocessing
+import os
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from const_utils.default_values import AppSettings
+from logger.logger import LoggerConfigurator
+from tools.comparer.img_comparer.img_comparer import ImageComparer
+from tools.comparer.img_comparer.index.base_index import BaseIndex, HashPairs
+
+
+class VideoFingerprint(NamedTuple):
+    """
+    A compact description of a video.
+
+    Attributes:
+        hashes (np.ndarray): The packed hashes of the sampled frames, concatenated into one row.
+        duration (float): The length in seconds (frame count / fps).
+        fps (float): The frame rate reported by the container.
+    """
+    hashes: np.ndarray
+    duration: float
+    fps: float
+
+
+class VideoComparer:
+    """
+    Finds near-duplicate videos (re-uploads, transcodes) before they are sliced.
+
+    A video is not decoded in full: 'FRAME_COUNT' frames are seeked at
+    the same fractions of its length and hashed with the configured image
+    hasher, and the duration is computed from the frame count and fps.
+    Since the frames are taken at relative positions, a transcode with
+    another frame rate or resolution gets the same fingerprint. Two videos
+    match if their concatenated frame hashes are within the image
+    threshold per frame and their durations differ by at most
+    'DURATION_TOLERANCE' (or 'MIN_DURATION_GAP' seconds for short videos).
+    From every group the first-seen video is kept, like in 'ImageComparer'.
+    Removing a duplicate video before 'slice' saves decoding, writing and
+    hashing all its frames.
+
+    Attributes:
+        FRAME_COUNT (int): The number of sampled frames per video.
+        DURATION_TOLERANCE (float): The allowed relative difference of durations.
+        MIN_DURATION_GAP (float): The allowed difference of durations in seconds.
+        settings (AppSettings): Global configuration for paths and parameters.
+        logger (logging.Logger): Logger instance for video comparison.
+        image_comparer (ImageComparer): Provides the configured hasher and search index.
+        method (BaseHasher): The hasher of the sampled frames.
+    """
+    FRAME_COUNT: int = 8
+    DURATION_TOLERANCE: float = 0.02
+    MIN_DURATION_GAP: float = 1.0
+
+    def __init__(self, settings: AppSettings):
+        """
+        Initializes the comparer with the configured image hasher.
+
+        Args:
+            settings (AppSettings): Global configuration for paths and parameters.
+        """
+        self.settings = settings
+        self.logger = LoggerConfigurator.setup(
+            name=self.__class__.__name__,
+            log_path=Path(self.settings.log_path) / f"{self.__class__.__name__}.log" if self.settings.log_path else None,
+            log_level=self.settings.log_level
+        )
+        self.image_comparer = ImageComparer(self.settings)
+        self.method = self.image_comparer.method
+
+
+    @classmethod
+    def fingerprint(cls, video_path: Path, hasher: type, core_size: int) -> Optional[VideoFingerprint]:
+        """
+        Seeks the sampled frames of a video and hashes them.
+
+        The frames are taken from the middles of 'FRAME_COUNT' equal parts
+        of the video.
+
+        Args:
+            video_path (Path): Path to the video file.
+            hasher (type): The 'BaseHasher' subclass that hashes the frames.
+            core_size (int): The hash grid size.
+
+        Returns:
+            Optional[VideoFingerprint]: The fingerprint, or None if the video cannot
+                be opened, has no known length or a frame cannot be read.
+        """
+        capture = cv2.VideoCapture(str(video_path))
+
+        try:
+            if not capture.isOpened():
+                return None
+
+            frame_count = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+            fps = capture.get(cv2.CAP_PROP_FPS)
+
+            if frame_count < 1 or fps <= 0:
+                return None
+
+            hashes = []
+
+            for part in range(cls.FRAME_COUNT):
+                capture.set(cv2.CAP_PROP_POS_FRAMES, int((part + 0.5) * frame_count / cls.FRAME_COUNT))
+                is_read, frame = capture.read()
+
+                if not is_read:
+                    return None
+
+                hashes.append(hasher.hash_image(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), core_size))
+
+            return VideoFingerprint(np.concatenate(hashes), float(frame_count / fps), float(fps))
+        finally:
+            capture.release()
+
+
+    def fingerprint_files(self, video_paths: Tuple[Path, ...]) -> List[Optional[VideoFingerprint]]:
+        """
+        Fingerprints videos on 'n_jobs' processes.
+
+        Args:
+            video_paths (Tuple[Path, ...]): The videos to fingerprint.
+
+        Returns:
+            List[Optional[VideoFingerprint]]: Fingerprints in the order of 'video_paths'
+                (None for unreadable videos).
+        """
+        fingerprint_func = partial(
+            self.__class__.fingerprint,
+            hasher=self.method.__class__,
+            core_size=self.method.core_size
+        )
+
+        with multiprocessing.Pool(processes=self.method.n_jobs) as pool:
+            fingerprints = pool.map(fingerprint_func, video_paths)
+
+        unreadable = sum(fingerprint is None for fingerprint in fingerprints)
+
+        if unreadable:
+            self.logger.warning(f"Skipped {unreadable} videos that cannot be read or seeked")
+
+        return fingerprints
+
+
+    def compare(
+            self,
+            file_paths: Tuple[Path],
+            files_stats: Optional[Dict[Path, os.stat_result]] = None
+    ) -> List[Path]:
+        """
+        Finds near-duplicate videos.
+
+        Args:
+            file_paths (Tuple[Path]): A collection of paths to the video files.
+            files_stats (Optional[Dict[Path, os.stat_result]]): Not used, kept for
+                the interface of 'ImageComparer'.
+
+        Returns:
+            List[Path]: Videos that duplicate an earlier video.
+        """
+        fingerprints = self.fingerprint_files(tuple(file_paths))
+        rows = np.array([row for row, fingerprint in enumerate(fingerprints) if fingerprint is not None], dtype=np.int64)
+
+        if len(rows) < 2:
+            return []
+
+        matrix = np.vstack([fingerprints[row].hashes for row in rows])
+        durations = np.array([fingerprints[row].duration for row in rows], dtype=np.float64)
+        threshold = self.method.threshold * self.FRAME_COUNT
+        n_bits = self.method.core_size * self.method.core_size * self.FRAME_COUNT
+        index = self.image_comparer.create_index(len(rows), n_bits, threshold)
+        pairs = index.find_pairs(matrix, threshold)
+
+        first, second = durations[pairs.first], durations[pairs.second]
+        gap = np.maximum(self.MIN_DURATION_GAP, self.DURATION_TOLERANCE * np.maximum(first, second))
+        is_same_length = np.abs(first - second) <= gap
+        pairs = HashPairs(pairs.first[is_same_length], pairs.second[is_same_length], pairs.distance[is_same_length])
+
+        duplicates = [file_paths[row] for row in rows[BaseIndex.resolve_duplicates(pairs, len(rows))]]
+        self.logger.info(f"Video search finished. Found {len(duplicates)} duplicates among {len(rows)} videos.")
+        return duplicates
+
+
+    def iter_duplicates(
+            self,
+            file_paths: Tuple[Path],
+            files_stats: Optional[Dict[Path, os.stat_result]] = None
+    ) -> Iterator[List[Path]]:
+        """
+        Yields the duplicates of 'compare' in one batch.
+
+        Args:
+            file_paths (Tuple[Path]): A collection of paths to the video files.
+            files_stats (Optional[Dict[Path, os.stat_result]]): Not used.
+
+        Yields:
+            List[Path]: All duplicate videos.
+        """
+        yield self.compare(file_paths, files_stats)
@@ -0,0 +1,172 @@
+import errno
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Sequence
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from const_utils.copmarer import Constants
+from logger.logger_protocol import LoggerProtocol
+
+
+class FileLinkerMixin:
+    """
+    A helper class to replace identical files with links to one canonical copy.
+
+    Every path is kept: a duplicate becomes a hardlink to the canonical
+    file (the same inode) or a reflink (a copy-on-write clone that shares
+    the data blocks, e.g. on Btrfs or XFS). The link is created under a
+    temporary name next to the duplicate and renamed over it, so the path
+    never disappears, even if the process is killed.
+
+    Attributes:
+        LINK_WORKERS (int): Number of I/O threads used by 'link_groups'.
+        LINK_MODES (Tuple[str, ...]): Supported modes; 'auto' tries a reflink and falls back to a hardlink.
+        FICLONE (int): The Linux ioctl request that clones a file.
+        LINK_TEMP_SUFFIX (str): Suffix of the temporary '.{name}' link, skipped by directory scans.
+    """
+    LINK_WORKERS: int = 8
+    LINK_MODES: tuple = (Constants.hardlink, Constants.reflink, Constants.auto)
+    FICLONE: int = 0x40049409
+    LINK_TEMP_SUFFIX: str = ".link.tmp"
+
+    def link_groups(
+            self: LoggerProtocol,
+            groups: Sequence[Sequence[Path]],
+            mode: str,
+            workers: int = LINK_WORKERS
+    ) -> int:
+        """Links every group of identical files to its first file, one group per thread.
+
+        Args:
+            groups (Sequence[Sequence[Path]]): Groups of byte-identical files; the first one is kept.
+            mode (str): 'hardlink', 'reflink' or 'auto'.
+            workers (int): Number of I/O threads.
+
+        Returns:
+            int: The number of bytes reclaimed.
+
+        Raises:
+            ValueError: If the mode is unknown.
+        """
+        if mode not in self.LINK_MODES:
+            msg = f"Unknown link mode '{mode}'. Use one of: {list(self.LINK_MODES)}"
+            self.logger.error(msg)
+            raise ValueError(msg)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return sum(pool.map(partial(self.link_group, mode=mode), groups))
+
+
+    def link_group(self, group: Sequence[Path], mode: str) -> int:
+        """Replaces all files of a group except the first one with links to it.
+
+        Args:
+            group (Sequence[Path]): Byte-identical files; the first one is kept.
+            mode (str): 'hardlink', 'reflink' or 'auto'.
+
+        Returns:
+            int: The number of bytes reclaimed.
+        """
+        return sum(self.link_file(group[0], path, mode) for path in group[1:])
+
+
+    def link_file(self: LoggerProtocol, source: Path, target: Path, mode: str) -> int:
+        """Replaces one file with a link to an identical file.
+
+        Files that are already hardlinks of the source, or whose size no
+        longer matches it, are skipped. Only the last link of a file frees
+        its blocks, so a target with other hardlinks reclaims nothing.
+
+        Args:
+            source (Path): The canonical file.
+            target (Path): The identical file to replace.
+            mode (str): 'hardlink', 'reflink' or 'auto'.
+
+        Returns:
+            int: The number of bytes reclaimed (0 if the file was skipped or linking failed).
+        """
+        try:
+            source_stat, target_stat = source.stat(), target.stat()
+        except OSError as e:
+            self.logger.warning(f"Unable to link {target}: {e}")
+            return 0
+
+        if (source_stat.st_dev, source_stat.st_ino) == (target_stat.st_dev, target_stat.st_ino):
+            return 0
+
+        if source_stat.st_size != target_stat.st_size:
+            self.logger.warning(f"{target} changed since the scan, not linked")
+            return 0
+
+        temp_path = target.with_name(f".{target.name}{self.LINK_TEMP_SUFFIX}")
+        temp_path.unlink(missing_ok=True)
+
+        try:
+            kind = self.create_link(source, temp_path, mode)
+
+            if kind == Constants.reflink:
+                shutil.copystat(target, temp_path)
+
+            os.replace(temp_path, target)
+        except OSError as e:
+            temp_path.unlink(missing_ok=True)
+            self.logger.warning(f"Unable to link {target} to {source} ({mode}): {e}")
+            return 0
+
+        self.logger.info(f"{target} replaced with a {kind} to {source}")
+        return target_stat.st_size if target_stat.st_nlink == 1 else 0
+
+
+    @classmethod
+    def create_link(cls, source: Path, link_path: Path, mode: str) -> str:
+        """Creates a new hardlink or reflink of a file.
+
+        Args:
+            source (Path): The file to link.
+            link_path (Path): The new path; it must not exist.
+            mode (str): 'hardlink', 'reflink' or 'auto'.
+
+        Returns:
+            str: The kind of the created link ('hardlink' or 'reflink').
+
+        Raises:
+            OSError: If the link cannot be created (e.g. reflinks are not
+                supported in the 'reflink' mode, or the files are on different devices).
+        """
+        if mode != Constants.hardlink:
+            try:
+                cls.reflink(source, link_path)
+                return Constants.reflink
+            except OSError:
+                link_path.unlink(missing_ok=True)
+
+                if mode == Constants.reflink:
+                    raise
+
+        os.link(source, link_path)
+        return Constants.hardlink
+
+
+    @classmethod
+    def reflink(cls, source: Path, link_path: Path) -> None:
+        """Clones a file with the Linux FICLONE ioctl.
+
+        Args:
+            source (Path): The file to clone.
+            link_path (Path): The new path; it must not exist.
+
+        Raises:
+            OSError: If the platform or the file system does not support reflinks.
+        """
+        if fcntl is None:
+            raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform")
+
+        with open(source, "rb") as source_file, open(link_path, "xb") as link_file:
+            fcntl.ioctl(link_file.fileno(), cls.FICLONE, source_file.fileno())
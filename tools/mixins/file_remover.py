@@ -1,11 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Union, List, Tuple
+from typing import Iterable, Union, List, Tuple
 
 from logger.logger_protocol import LoggerProtocol
 
 
 class FileRemoverMixin:
-    """A helper class to delete files from the system."""
+    """
+    A helper class to delete files from the system.
+
+    Attributes:
+        REMOVE_WORKERS (int): Number of I/O threads used by 'remove_streaming'.
+    """
+    REMOVE_WORKERS: int = 8
+
     def remove_all(self, filepaths: Union[List[Path], Tuple[Path], Path]) -> None:
         """Deletes all the files in the given iterable or path.
 
@@ -45,3 +53,49 @@ class FileRemoverMixin:
         except FileNotFoundError:
             self.logger.warning(f"{path} file not exists, skipping")
             return False
+
+
+    def remove_streaming(self, batches: Iterable[List[Path]], workers: int = REMOVE_WORKERS) -> List[Path]:
+        """Deletes files on a background thread pool while the batches are still produced.
+
+        Every batch is handed to the pool as soon as it arrives, so slow
+        unlinks (e.g. on network storage) overlap with the work that
+        produces the next batch. The call returns when all files are
+        processed; deletion errors are logged and do not stop the others.
+
+        Args:
+            batches (Iterable[List[Path]]): Batches of paths to delete, e.g. from a generator.
+            workers (int): Number of I/O threads.
+
+        Returns:
+            List[Path]: All paths that were scheduled for deletion, in order.
+        """
+        scheduled = []
+        futures = []
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for batch in batches:
+                scheduled.extend(batch)
+                futures.extend(pool.submit(self.remove_file, path) for path in batch)
+
+        for path, future in zip(scheduled, futures):
+            if future.exception() is not None:
+                self.logger.error(f"Failed to remove {path}: {future.exception()}")
+
+        return scheduled
+
+
+    def find_remaining(self, filepaths: List[Path], workers: int = REMOVE_WORKERS) -> List[Path]:
+        """Checks that deleted files are really gone.
+
+        Args:
+            filepaths (List[Path]): Paths that were deleted.
+            workers (int): Number of I/O threads for the existence checks.
+
+        Returns:
+            List[Path]: Paths that still exist on disk.
+        """
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            exists = list(pool.map(Path.exists, filepaths))
+
+        return [path for path, is_present in zip(filepaths, exists) if is_present]